@@ -1,29 +1,63 @@
-from typing import List, Optional
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional
 
-import pandas as pd
 import streamlit as st
 
 from config import (
+    APP_STAGE_TIMINGS,
+    DEFAULT_INGEST_CACHE_DIR,
+    DEFAULT_SNAPSHOT_DIR,
     ID_COL_ARTISTS,
     ID_COL_GENRE,
     ID_COL_TRACK_ID,
     ID_COL_TRACK_NAME,
+    SEARCH_MAX_RESULTS,
 )
-from recommender import VibeRecommender
+from hot_reload import REJECTED, ReloadingLoader
+from profiling import HistogramSink, set_sink, stage, timed
+from startup import FAILED, READY, SEARCH_READY
+
+# pandas, scikit-learn and the recommender load on the startup thread
+# (see startup.py), so the first page renders without waiting for them.
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from indexes import TrackFilter
+    from recommender import VibeRecommender
+    from results import Recommendations
 
 
 SPOTIFY_TRACK_BASE_URL: str = "https://open.spotify.com/track/"
 
 
 @st.cache_resource
-def load_recommender() -> VibeRecommender:
-    """Load and cache the VibeRecommender instance."""
-    # Adjust path if running from a different working directory
-    return VibeRecommender.from_csv("data/spotify_tracks.csv")
+def startup_loader() -> ReloadingLoader:
+    """Start (once per process) the background build of the recommender."""
+    # Adjust path if running from a different working directory.
+    # Reuses the on-disk snapshot unless the CSV has changed since it was built.
+    # Per-genre duplicate rows are collapsed at ingest (one vector per track).
+    # Later edits to the CSV are rebuilt in the background and swapped in.
+    return ReloadingLoader(
+        "data/spotify_tracks.csv",
+        DEFAULT_SNAPSHOT_DIR,
+        dedupe="track_id",
+        ingest_cache_dir=DEFAULT_INGEST_CACHE_DIR,
+    ).start()
+
+
+@st.cache_resource
+def stage_timings() -> HistogramSink:
+    """Install (once per process) the sink behind the debug sidebar."""
+    sink = HistogramSink()
+    set_sink(sink)
+    return sink
 
 
 def make_track_link(row: pd.Series) -> str:
     """Return HTML link for a single track using its Spotify ID."""
+    import pandas as pd
+
     track_id = row.get(ID_COL_TRACK_ID)
     name = row.get(ID_COL_TRACK_NAME, "Unknown track")
     if pd.isna(track_id):
@@ -32,7 +66,8 @@ def make_track_link(row: pd.Series) -> str:
     return f'<a href="{url}" target="_blank">{name}</a>'
 
 
-def render_recs_table(recs: pd.DataFrame, extra_cols: List[str]) -> None:
+@timed("app.render_recs_table")
+def render_recs_table(recs: Recommendations, extra_cols: List[str]) -> None:
     """
     Render recommendations as a standard Streamlit dataframe, similar to the
     cluster pages. The title is shown as plain text (no hyperlink) so the
@@ -42,7 +77,12 @@ def render_recs_table(recs: pd.DataFrame, extra_cols: List[str]) -> None:
         st.info("No recommendations found.")
         return
 
-    recs = recs.copy()
+    # Only the displayed columns are materialized, once, here at the UI edge.
+    available = set(recs.catalog.columns) | {"distance"}
+    wanted = [ID_COL_TRACK_NAME] + [c for c in extra_cols if c in available]
+    if ID_COL_TRACK_ID in available:
+        wanted.append(ID_COL_TRACK_ID)
+    recs = recs.to_frame(wanted)
 
     # Base columns: Title first
     cols = [ID_COL_TRACK_NAME] + [c for c in extra_cols if c in recs.columns]
@@ -73,7 +113,72 @@ def render_recs_table(recs: pd.DataFrame, extra_cols: List[str]) -> None:
 
 
 
-def page_seed_track(rec: VibeRecommender) -> None:
+def sidebar_filters(rec: VibeRecommender) -> Optional[TrackFilter]:
+    """Sidebar controls restricting recommendations; None when unused."""
+    from indexes import TrackFilter
+
+    st.sidebar.subheader("Filters")
+    genres = st.sidebar.multiselect("Genres", options=rec.filter_index.genres)
+    clusters = st.sidebar.multiselect(
+        "Mood clusters",
+        options=rec.cluster_stats.labels.tolist(),
+    )
+
+    ranges = {}
+    if "popularity" in rec.feature_columns:
+        min_popularity = st.sidebar.slider("Minimum popularity", 0, 100, 0)
+        if min_popularity > 0:
+            ranges["popularity"] = (min_popularity, None)
+
+    filters = TrackFilter(genres=genres, clusters=clusters, ranges=ranges)
+    return filters if filters else None
+
+
+def sidebar_debug(sink: HistogramSink) -> None:
+    """Sidebar table of p50/p95/p99 stage latencies recorded so far."""
+    st.sidebar.subheader("Stage timings (ms)")
+    summary = sink.summary()
+    if not summary:
+        st.sidebar.caption("No stages recorded yet.")
+        return
+    import pandas as pd
+
+    table = pd.DataFrame.from_dict(summary, orient="index")
+    st.sidebar.dataframe(table[["count", "p50_ms", "p95_ms", "p99_ms"]].round(2))
+    if st.sidebar.button("Reset timings"):
+        sink.clear()
+
+
+@st.fragment(run_every=1.0)
+def startup_status(loader: ReloadingLoader) -> None:
+    """Progress notice while the models build; reruns the app once ready."""
+    if loader.status == READY:
+        st.rerun()
+    elif loader.status == FAILED:
+        st.error(f"Could not load the recommender: {loader.error}")
+    elif loader.status == SEARCH_READY:
+        st.info(
+            f"Track search is ready ({loader.timings[SEARCH_READY]:.1f} s). "
+            "Fitting the recommendation models in the background..."
+        )
+    else:
+        st.info("Loading the track catalog...")
+
+
+def startup_caption(loader: ReloadingLoader) -> None:
+    """Sidebar note with the measured startup times and the catalog version."""
+    parts = [f"{name.replace('_', ' ')} {seconds:.1f} s" for name, seconds in loader.timings.items()]
+    st.sidebar.caption("Startup: " + ", ".join(parts))
+    if loader.version > 1:
+        st.sidebar.caption(f"Catalog version {loader.version} (reloaded after a CSV update)")
+    if loader.reload_status == REJECTED:
+        st.sidebar.warning(f"Catalog update not applied: {loader.reload_error}")
+
+
+def page_seed_track(
+    loader: ReloadingLoader,
+    filters: Optional[TrackFilter] = None,
+) -> None:
     """Streamlit page: recommend tracks based on a seed track."""
     st.header("Recommend by Seed Track")
 
@@ -83,37 +188,20 @@ def page_seed_track(rec: VibeRecommender) -> None:
     search_name = st.text_input("Track name (or part of it)")
     search_artist = st.text_input("Optional: artist name filter")
 
-    candidates = rec.df[[ID_COL_TRACK_NAME, ID_COL_ARTISTS]].drop_duplicates()
-
-    if search_name:
-        candidates = candidates[
-            candidates[ID_COL_TRACK_NAME].str.contains(
-                search_name,
-                case=False,
-                na=False,
-            )
-        ]
-
-    if search_artist:
-        candidates = candidates[
-            candidates[ID_COL_ARTISTS].str.contains(
-                search_artist,
-                case=False,
-                na=False,
-            )
-        ]
-
-    MAX_OPTIONS = 50
-    total_matches = len(candidates)
+    # Search works as soon as the catalog metadata is loaded.
+    found = loader.search_tracks(search_name, search_artist, limit=SEARCH_MAX_RESULTS)
+    if found is None:
+        st.caption("Track search will be available in a moment.")
+        return
+    candidates, total_matches = found
 
     if total_matches == 0:
         st.info("Start typing a track name above to see matching songs.")
         return
 
-    if total_matches > MAX_OPTIONS:
-        candidates = candidates.head(MAX_OPTIONS)
+    if total_matches > SEARCH_MAX_RESULTS:
         st.caption(
-            f"Showing first {MAX_OPTIONS} matches out of {total_matches}. "
+            f"Showing top {SEARCH_MAX_RESULTS} matches out of {total_matches}. "
             "Refine your search to narrow down further."
         )
 
@@ -130,13 +218,15 @@ def page_seed_track(rec: VibeRecommender) -> None:
 
     N_RECS = 10  # fixed number of recommendations
 
-    if st.button("Recommend similar tracks"):
+    if st.button("Recommend similar tracks", disabled=not loader.ready):
+        rec = loader.recommender
         name, artist = selected_label.split(" — ", 1)
 
         seed_row, recs = rec.recommend_by_track(
             track_name=name,
             n=N_RECS,
             artist_hint=artist,
+            filters=filters,
         )
 
         if seed_row is None or recs.empty:
@@ -156,7 +246,7 @@ def page_seed_track(rec: VibeRecommender) -> None:
         )
 
 
-def page_mood(rec: VibeRecommender) -> None:
+def page_mood(rec: VibeRecommender, filters: Optional[TrackFilter] = None) -> None:
     """Streamlit page: recommend tracks based on mood sliders."""
     st.header("Recommend by Mood")
 
@@ -212,6 +302,7 @@ def page_mood(rec: VibeRecommender) -> None:
             danceability=danceability,
             n=N_RECS,
             extra_overrides=extra_overrides,
+            filters=filters,
         )
 
         recs = recs.head(N_RECS)
@@ -235,12 +326,16 @@ def page_clusters(rec: VibeRecommender) -> None:
     """Streamlit page: inspect cluster summaries and sample tracks."""
     st.header("Mood Clusters")
 
+    st.subheader("Cluster sizes and representative tracks")
+    st.dataframe(rec.cluster_overview(), hide_index=True)
+
     st.subheader("Cluster summary (average features)")
-    summary = rec.describe_clusters()
-    st.dataframe(summary)
+    st.dataframe(rec.describe_clusters(), hide_index=True)
+
+    with st.expander("Feature spread (standard deviation)"):
+        st.dataframe(rec.describe_clusters(stat="std"), hide_index=True)
 
-    cluster_labels = sorted(rec.df["mood_cluster"].unique())
-    cluster = st.selectbox("Inspect cluster", options=cluster_labels)
+    cluster = st.selectbox("Inspect cluster", options=rec.cluster_stats.labels.tolist())
 
     samples = rec.sample_cluster_tracks(cluster_label=cluster, n=30)
     st.subheader(f"Example tracks in cluster {cluster}")
@@ -254,19 +349,36 @@ def main() -> None:
     st.title("Mood To Song Bot")
     st.write("An AI-driven vibe-based song recommender using Spotify audio features.")
 
-    rec = load_recommender()
+    # Recording is process-wide. It starts with the app under
+    # APP_STAGE_TIMINGS, otherwise the first time any session ticks the box,
+    # and then stays on; the box only shows or hides this session's view.
+    debug = st.sidebar.checkbox("Debug: stage timings")
+    sink = stage_timings() if debug or APP_STAGE_TIMINGS else None
+
+    loader = startup_loader()
+    rec = loader.recommender
+    if rec is None:
+        startup_status(loader)
 
     mode = st.sidebar.radio(
         "Mode",
         options=["Seed track", "Mood sliders", "Mood clusters"],
     )
 
-    if mode == "Seed track":
-        page_seed_track(rec)
-    elif mode == "Mood sliders":
-        page_mood(rec)
-    else:
-        page_clusters(rec)
+    with stage("app.page"):
+        if mode == "Seed track":
+            page_seed_track(loader, sidebar_filters(rec) if rec is not None else None)
+        elif rec is None:
+            st.info("This page becomes available once the models are loaded.")
+        elif mode == "Mood sliders":
+            page_mood(rec, sidebar_filters(rec))
+        else:
+            page_clusters(rec)
+
+    startup_caption(loader)
+
+    if sink is not None and debug:
+        sidebar_debug(sink)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,19 @@
+"""Reproducible performance benchmarks on seeded synthetic catalogs.
+
+Run from the project root with ``src`` on the path:
+
+    PYTHONPATH=src python -m benchmarks run --sizes 100000 1000000 10000000
+    PYTHONPATH=src python -m benchmarks compare old.json new.json
+"""
+
+from benchmarks.suite import compare_reports, run_size, run_suite
+from benchmarks.synthetic import generate_catalog, iter_catalog_chunks, write_catalog_csv
+
+__all__ = [
+    "compare_reports",
+    "generate_catalog",
+    "iter_catalog_chunks",
+    "run_size",
+    "run_suite",
+    "write_catalog_csv",
+]
@@ -0,0 +1,110 @@
+"""Command-line entry point: generate catalogs, run the suite, compare reports.
+
+Usage (from the project root):
+
+    PYTHONPATH=src python -m benchmarks generate --rows 1000000
+    PYTHONPATH=src python -m benchmarks run --sizes 100000 1000000 --queries 200
+    PYTHONPATH=src python -m benchmarks compare data/benchmarks/a.json data/benchmarks/b.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+
+from config import (
+    BENCHMARK_SIZES,
+    DEFAULT_BENCHMARK_DIR,
+    DEFAULT_CLUSTER_BACKEND,
+    DEFAULT_KNN_BACKEND,
+    DEFAULT_N_CLUSTERS,
+    RANDOM_STATE,
+)
+from preprocess import DEDUPE_KEYS
+from snapshot import atomic_output
+
+from benchmarks.suite import catalog_path, compare_reports, run_suite
+from benchmarks.synthetic import write_catalog_csv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="benchmarks", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="write a synthetic catalog CSV")
+    gen.add_argument("--rows", type=int, required=True)
+    gen.add_argument("--seed", type=int, default=RANDOM_STATE)
+    gen.add_argument("--out", help="CSV path (default: under --data-dir)")
+    gen.add_argument("--data-dir", default=DEFAULT_BENCHMARK_DIR)
+
+    run = sub.add_parser("run", help="benchmark the pipeline and write a JSON report")
+    run.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES)
+    run.add_argument("--queries", type=int, default=200, help="calls per query stage")
+    run.add_argument("--seed", type=int, default=RANDOM_STATE)
+    run.add_argument("--dedupe", choices=sorted(DEDUPE_KEYS), default="track_id")
+    run.add_argument("--backend", choices=["sklearn", "brute", "sharded"],
+                     default=DEFAULT_KNN_BACKEND)
+    run.add_argument("--cluster-backend", choices=["kmeans", "minibatch"],
+                     default=DEFAULT_CLUSTER_BACKEND)
+    run.add_argument("--clusters", type=int, default=DEFAULT_N_CLUSTERS)
+    run.add_argument("--data-dir", default=DEFAULT_BENCHMARK_DIR)
+    run.add_argument("--out", help="report path (default: <data-dir>/bench_<commit>.json)")
+
+    cmp_ = sub.add_parser("compare", help="compare two JSON reports stage by stage")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("candidate")
+    cmp_.add_argument("--metric", default="p50_ms",
+                      choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"])
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        path = args.out or catalog_path(args.data_dir, args.rows, args.seed)
+        write_catalog_csv(path, args.rows, seed=args.seed)
+        print(f"Wrote {path}")
+
+    elif args.command == "run":
+        report = run_suite(
+            args.sizes,
+            args.data_dir,
+            seed=args.seed,
+            n_queries=args.queries,
+            dedupe=args.dedupe,
+            backend=args.backend,
+            cluster_backend=args.cluster_backend,
+            n_clusters=args.clusters,
+        )
+        for result in report["results"]:
+            print(f"\n{result['n_rows']} rows ({result['n_indexed']} indexed)")
+            print(f"{'stage':>30} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak MiB':>9}")
+            for name, r in result["stages"].items():
+                print(
+                    f"{name:>30} {r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} "
+                    f"{r['p99_ms']:>10.2f} {r['peak_rss_mb']:>9.0f}"
+                )
+
+        out = args.out or os.path.join(
+            args.data_dir, f"bench_{(report['git_commit'] or 'nogit')[:12]}.json"
+        )
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        with atomic_output(out) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+        print(f"\nWrote {out}")
+
+    else:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        with open(args.candidate, encoding="utf-8") as fh:
+            candidate = json.load(fh)
+        print(f"{'n_rows':>10} {'stage':>30} {'baseline':>10} {'candidate':>10} {'ratio':>7}")
+        for r in compare_reports(baseline, candidate, metric=args.metric):
+            print(
+                f"{r['n_rows']:>10} {r['stage']:>30} {r['baseline']:>10.2f} "
+                f"{r['candidate']:>10.2f} {r['ratio']:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
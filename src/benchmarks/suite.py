@@ -0,0 +1,242 @@
+"""Time the recommender pipeline on synthetic catalogs and report JSON.
+
+For each catalog size, a fresh ``spawn`` process runs these stages:
+
+- ``preprocess_pipeline``
+- ``VibeModels.fit``
+- building the ``VibeRecommender`` lookup indexes
+- ``n_queries`` calls each of ``recommend_by_track``, ``recommend_by_mood``,
+  ``describe_clusters`` and ``sample_cluster_tracks``
+
+Each stage records latency percentiles and the process's peak RSS so far. A
+fresh process per size keeps one size's peak RSS out of the next. The
+finer-grained profiling.py stages captured during the run (CSV load,
+dedupe, neighbor query, ...) are included as ``inner_stages``. The report
+records the git commit and environment, so runs can be compared with
+``compare_reports``.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import (
+    DEFAULT_CLUSTER_BACKEND,
+    DEFAULT_KNN_BACKEND,
+    DEFAULT_N_CLUSTERS,
+    FEATURE_COLUMNS,
+    ID_COL_ARTISTS,
+    ID_COL_TRACK_NAME,
+    MOOD_CACHE_QUANTUM,
+    RANDOM_STATE,
+)
+import profiling
+from models import VibeModels
+from preprocess import preprocess_pipeline
+from recommender import VibeRecommender
+
+from benchmarks.synthetic import write_catalog_csv
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _latency_record(seconds: Sequence[float]) -> Dict[str, float]:
+    ms = 1000.0 * np.asarray(seconds, dtype=float)
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "n": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _time_calls(fn: Callable[[int], Any], n_calls: int) -> Dict[str, float]:
+    """Call ``fn(i)`` for i in range(n_calls) and summarize the latencies."""
+    seconds = []
+    for i in range(n_calls):
+        start = time.perf_counter()
+        fn(i)
+        seconds.append(time.perf_counter() - start)
+    return _latency_record(seconds)
+
+
+def run_size(
+    csv_path: str,
+    n_queries: int = 200,
+    dedupe: Optional[str] = "track_id",
+    backend: str = DEFAULT_KNN_BACKEND,
+    cluster_backend: str = DEFAULT_CLUSTER_BACKEND,
+    n_clusters: int = DEFAULT_N_CLUSTERS,
+    seed: int = RANDOM_STATE,
+) -> Dict[str, Any]:
+    """Benchmark every stage on one catalog CSV (run in a fresh process)."""
+    sink = profiling.HistogramSink()
+    profiling.set_sink(sink)
+    stages: Dict[str, Dict[str, float]] = {}
+    rss_at_start = _peak_rss_mb()
+
+    start = time.perf_counter()
+    prep = preprocess_pipeline(csv_path, FEATURE_COLUMNS, dedupe=dedupe)
+    stages["preprocess_pipeline"] = _latency_record([time.perf_counter() - start])
+
+    start = time.perf_counter()
+    models = VibeModels.fit(
+        prep.X_scaled,
+        n_clusters=n_clusters,
+        backend=backend,
+        cluster_backend=cluster_backend,
+    )
+    stages["VibeModels.fit"] = _latency_record([time.perf_counter() - start])
+
+    start = time.perf_counter()
+    df = prep.df
+    df["mood_cluster"] = models.assign_clusters(prep.X_scaled)
+    rec = VibeRecommender(
+        df=df,
+        X_scaled=prep.X_scaled,
+        feature_columns=prep.feature_columns,
+        models=models,
+        scaler=prep.scaler,
+    )
+    stages["VibeRecommender.build_indexes"] = _latency_record([time.perf_counter() - start])
+
+    rng = np.random.default_rng(seed)
+    seed_rows = rng.integers(len(df), size=n_queries)
+    names = df[ID_COL_TRACK_NAME].to_numpy()[seed_rows]
+    artists = np.asarray(df[ID_COL_ARTISTS].to_numpy())[seed_rows]
+    stages["recommend_by_track"] = _time_calls(
+        lambda i: rec.recommend_by_track(names[i], n=10, artist_hint=artists[i]),
+        n_queries,
+    )
+
+    # Slider values on the app's grid; the cache is cleared so every call searches.
+    moods = np.round(rng.random((n_queries, 3)) / MOOD_CACHE_QUANTUM) * MOOD_CACHE_QUANTUM
+
+    def mood_query(i: int) -> None:
+        rec.mood_cache.clear()
+        rec.recommend_by_mood(*moods[i], n=10)
+
+    stages["recommend_by_mood"] = _time_calls(mood_query, n_queries)
+
+    stages["describe_clusters"] = _time_calls(lambda i: rec.describe_clusters(), n_queries)
+    clusters = rng.integers(n_clusters, size=n_queries)
+    stages["sample_cluster_tracks"] = _time_calls(
+        lambda i: rec.sample_cluster_tracks(int(clusters[i]), n=30),
+        n_queries,
+    )
+
+    profiling.set_sink(None)
+    return {
+        "n_rows": int(prep.report.rows_read),
+        "n_indexed": int(models.n_rows),
+        "rss_at_start_mb": rss_at_start,
+        "stages": stages,
+        "inner_stages": sink.summary(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def catalog_path(data_dir: str, n_rows: int, seed: int) -> str:
+    """Where the synthetic catalog for (n_rows, seed) is written."""
+    return os.path.join(data_dir, f"synthetic_{n_rows}_{seed}.csv")
+
+
+def run_suite(
+    sizes: Sequence[int],
+    data_dir: str,
+    seed: int = RANDOM_STATE,
+    **run_kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Benchmark each catalog size; returns the JSON-ready report.
+
+    Synthetic catalogs are generated into ``data_dir`` on first use and reused
+    afterwards. ``run_kwargs`` are passed to ``run_size``.
+    """
+    results: List[Dict[str, Any]] = []
+    for n_rows in sizes:
+        path = catalog_path(data_dir, n_rows, seed)
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            write_catalog_csv(path, n_rows, seed=seed)
+            print(f"generated {path} in {time.perf_counter() - start:.1f}s", flush=True)
+
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            result = pool.submit(run_size, path, seed=seed, **run_kwargs).result()
+        result["catalog"] = os.path.basename(path)
+        results.append(result)
+        print(f"finished {n_rows} rows", flush=True)
+
+    return {
+        "git_commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "seed": seed,
+        "params": run_kwargs,
+        "results": results,
+    }
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    candidate: Dict[str, Any],
+    metric: str = "p50_ms",
+) -> List[Dict[str, Any]]:
+    """Per (n_rows, stage) ``metric`` in both reports and the candidate/baseline ratio."""
+    base = {
+        (r["n_rows"], stage): rec
+        for r in baseline["results"]
+        for stage, rec in r["stages"].items()
+    }
+    rows: List[Dict[str, Any]] = []
+    for r in candidate["results"]:
+        for stage, rec in r["stages"].items():
+            old = base.get((r["n_rows"], stage))
+            if old is None:
+                continue
+            rows.append(
+                {
+                    "n_rows": r["n_rows"],
+                    "stage": stage,
+                    "baseline": old[metric],
+                    "candidate": rec[metric],
+                    "ratio": rec[metric] / old[metric] if old[metric] else float("nan"),
+                }
+            )
+    return rows
@@ -0,0 +1,149 @@
+"""Seeded synthetic Spotify-like catalogs matching the schema in config.py.
+
+Rows have the ID columns (``track_id``, ``track_name``, ``artists``,
+``track_genre``) and every column in FEATURE_COLUMNS. Features are drawn
+from a mixture of mood components, so the clusters have real structure.
+``loudness`` follows ``energy`` and ``acousticness`` runs against it, as in
+real data. Like the Spotify dataset, some tracks repeat on consecutive rows
+under another genre (``DUPLICATE_FRACTION``), so ``dedupe`` has work to do.
+
+Rows are generated in chunks, and each chunk draws from
+``np.random.default_rng([seed, chunk_index])``. The same ``(n_rows, seed,
+chunk_rows)`` therefore always produces the same catalog, and memory stays
+bounded by one chunk even at 10M rows.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    FEATURE_COLUMNS,
+    ID_COL_ARTISTS,
+    ID_COL_GENRE,
+    ID_COL_TRACK_ID,
+    ID_COL_TRACK_NAME,
+    INGEST_CHUNK_ROWS,
+    RANDOM_STATE,
+)
+from snapshot import atomic_output
+
+GENRES = [
+    "acoustic", "afrobeat", "alt-rock", "ambient", "blues", "chill", "classical",
+    "country", "dance", "deep-house", "disco", "drum-and-bass", "dubstep", "edm",
+    "electronic", "folk", "funk", "garage", "gospel", "grunge", "hard-rock",
+    "hip-hop", "house", "indie", "jazz", "k-pop", "latin", "metal", "opera",
+    "piano", "pop", "punk", "r-n-b", "reggae", "reggaeton", "rock", "salsa",
+    "sleep", "soul", "techno", "trance",
+]
+
+# Fraction of rows that repeat the previous row's track under another genre
+DUPLICATE_FRACTION: float = 0.2
+
+# Mood components: mean (energy, valence, danceability, acousticness)
+_MOODS = np.array(
+    [
+        [0.85, 0.75, 0.75, 0.05],  # upbeat / party
+        [0.90, 0.30, 0.50, 0.02],  # aggressive
+        [0.30, 0.25, 0.40, 0.80],  # sad / acoustic
+        [0.40, 0.70, 0.60, 0.60],  # mellow / happy
+        [0.15, 0.15, 0.25, 0.90],  # calm / ambient
+        [0.65, 0.55, 0.80, 0.15],  # groove
+    ]
+)
+
+_BASE62 = np.frombuffer(
+    b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz", dtype=np.uint8
+)
+
+
+def _track_ids(track_numbers: np.ndarray, seed: int) -> np.ndarray:
+    """22-character base62 ids (like Spotify's), unique per (seed, track number)."""
+    digits = np.empty((len(track_numbers), 22), dtype=np.uint8)
+    for half, salt in enumerate((0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F)):
+        # splitmix64-style mixing of (seed, track number); wraps mod 2**64
+        with np.errstate(over="ignore"):
+            x = track_numbers.astype(np.uint64) + np.uint64(seed) * np.uint64(salt)
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            x ^= x >> np.uint64(31)
+        for j in range(11):
+            digits[:, half * 11 + j] = _BASE62[(x % np.uint64(62)).astype(np.intp)]
+            x //= np.uint64(62)
+    return digits.view("S22").ravel().astype(str)
+
+
+def _features(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    """Feature columns for ``n`` tracks."""
+    mood = _MOODS[rng.integers(len(_MOODS), size=n)]
+    noise = rng.normal(0.0, 0.12, size=(n, 4))
+    energy, valence, danceability, acousticness = np.clip(mood + noise, 0.0, 1.0).T
+
+    instrumental = rng.random(n) < 0.2
+    features = {
+        "danceability": danceability,
+        "energy": energy,
+        "loudness": np.clip(-22.0 + 22.0 * energy + rng.normal(0.0, 2.5, n), -60.0, 2.0),
+        "speechiness": rng.beta(1.0, 12.0, n),
+        "acousticness": acousticness,
+        "instrumentalness": np.where(
+            instrumental, rng.beta(2.0, 1.0, n), rng.beta(0.5, 40.0, n)
+        ),
+        "liveness": rng.beta(1.5, 6.0, n),
+        "valence": valence,
+        "tempo": np.clip(rng.normal(90.0 + 50.0 * energy, 20.0), 40.0, 220.0),
+        "duration_ms": np.round(rng.lognormal(np.log(220_000.0), 0.35, n)),
+        "popularity": np.clip(np.round(rng.normal(35.0, 20.0, n)), 0, 100),
+    }
+    return pd.DataFrame({col: features[col] for col in FEATURE_COLUMNS})
+
+
+def iter_catalog_chunks(
+    n_rows: int,
+    seed: int = RANDOM_STATE,
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Yield the synthetic catalog as frames of at most ``chunk_rows`` rows."""
+    n_artists = max(50, n_rows // 20)
+    for chunk_index, start in enumerate(range(0, n_rows, chunk_rows)):
+        rng = np.random.default_rng([seed, chunk_index])
+        n = min(chunk_rows, n_rows - start)
+
+        # Each row either starts a new track or repeats the one above it.
+        is_new = rng.random(n) >= DUPLICATE_FRACTION
+        is_new[0] = True
+        source = np.maximum.accumulate(np.where(is_new, np.arange(n), 0))
+        track_numbers = start + source  # global row that introduced the track
+
+        tracks = _features(rng, n).iloc[source].reset_index(drop=True)
+        # Popular artists get many tracks (Zipf-like); repeats keep their artist.
+        artist = (rng.zipf(1.5, n) - 1) % n_artists
+        tracks.insert(0, ID_COL_TRACK_ID, _track_ids(track_numbers, seed))
+        tracks.insert(1, ID_COL_TRACK_NAME, "Track " + pd.Series(track_numbers).astype(str))
+        tracks.insert(2, ID_COL_ARTISTS, "Artist " + pd.Series(artist[source]).astype(str))
+        tracks.insert(3, ID_COL_GENRE, np.asarray(GENRES)[rng.integers(len(GENRES), size=n)])
+        yield tracks
+
+
+def generate_catalog(n_rows: int, seed: int = RANDOM_STATE) -> pd.DataFrame:
+    """The whole synthetic catalog in memory (for small sizes)."""
+    return pd.concat(list(iter_catalog_chunks(n_rows, seed)), ignore_index=True)
+
+
+def write_catalog_csv(
+    path: str,
+    n_rows: int,
+    seed: int = RANDOM_STATE,
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+) -> str:
+    """Write the catalog to ``path`` chunk by chunk (atomically); returns path."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_output(path) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as fh:
+            for i, chunk in enumerate(iter_catalog_chunks(n_rows, seed, chunk_rows)):
+                chunk.to_csv(fh, header=(i == 0), index=False, float_format="%.6g")
+    return path
@@ -0,0 +1,79 @@
+"""Offline build steps for precomputed serving artifacts.
+
+Each command loads (or builds) the snapshot for a CSV, computes one
+artifact, attaches it to the recommender and re-saves the snapshot.
+
+Usage (from the project root):
+
+    python src/build_artifacts.py lattice data/spotify_tracks.csv --top-k 50
+    python src/build_artifacts.py graph data/spotify_tracks.csv --k 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from config import DEFAULT_SNAPSHOT_DIR, MOOD_LATTICE_TOP_K, NEIGHBOR_GRAPH_K
+from recommender import VibeRecommender
+
+
+def build_lattice(rec: VibeRecommender, args: argparse.Namespace) -> None:
+    lattice = rec.build_mood_lattice(top_k=args.top_k)
+    print(
+        f"mood lattice: {lattice.rows.shape[0] ** 3} points x top {lattice.top_k}, "
+        f"{(lattice.rows.nbytes + lattice.distances.nbytes) / 2**20:.1f} MiB"
+    )
+
+
+def build_graph(rec: VibeRecommender, args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+
+    def report(done: int, total: int) -> None:
+        elapsed = time.perf_counter() - start
+        eta = elapsed / done * (total - done)
+        sys.stderr.write(f"\rneighbor graph: block {done}/{total}, ETA {eta:.0f}s   ")
+        sys.stderr.flush()
+
+    graph = rec.build_neighbor_graph(args.snapshot, k=args.k, progress=report)
+    sys.stderr.write("\n")
+    print(f"neighbor graph: {len(graph.rows)} rows x {graph.k} neighbors")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    lattice = sub.add_parser("lattice", help="Precompute basic mood-slider answers")
+    lattice.add_argument("--top-k", type=int, default=MOOD_LATTICE_TOP_K)
+    lattice.set_defaults(func=build_lattice)
+
+    graph = sub.add_parser(
+        "graph",
+        help="Precompute top-k neighbors of every track (resumable if interrupted)",
+    )
+    graph.add_argument("--k", type=int, default=NEIGHBOR_GRAPH_K)
+    graph.set_defaults(func=build_graph)
+
+    for command in sub.choices.values():
+        command.add_argument("csv_path")
+        command.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_DIR)
+        command.add_argument(
+            "--dedupe",
+            default="track_id",
+            help='Ingest dedupe mode used when (re)building the snapshot ("none" to disable)',
+        )
+
+    args = parser.parse_args()
+    dedupe = None if args.dedupe == "none" else args.dedupe
+
+    rec = VibeRecommender.load_or_build(args.csv_path, args.snapshot, dedupe=dedupe)
+    start = time.perf_counter()
+    args.func(rec, args)
+    rec.save(args.snapshot)
+    print(f"{args.command}: built in {time.perf_counter() - start:.1f}s, saved to {args.snapshot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 """Configuration constants for the VibeMatch recommender."""
 
@@ -22,9 +22,113 @@ ID_COL_TRACK_ID: str = "track_id"
 ID_COL_TRACK_NAME: str = "track_name"
 ID_COL_ARTISTS: str = "artists"
 ID_COL_GENRE: str = "track_genre"
+# Tuple of all genres of a track, present when ingest collapses duplicates
+ID_COL_GENRES: str = "track_genres"
 
 # Default modeling hyperparameters
 DEFAULT_N_CLUSTERS: int = 5
-# We'll filter out the seed, then take the top-n the user wants
+# Initial neighbor pool per query; it grows on demand when dedupe or paging
+# needs more (see VibeRecommender._iter_neighbor_rows)
 DEFAULT_N_NEIGHBORS: int = 30
 RANDOM_STATE: int = 42
+
+# Mood clustering backend: "kmeans" (full-batch, n_init=10) or "minibatch"
+# (MiniBatchKMeans, for large catalogs)
+DEFAULT_CLUSTER_BACKEND: str = "kmeans"
+MINIBATCH_KMEANS_BATCH_SIZE: int = 4096
+
+# k tuning (see tune_clusters.py): rows sampled for the silhouette score, and
+# where the report with the recommended k is written
+CLUSTER_TUNING_SAMPLE: int = 10_000
+DEFAULT_CLUSTER_REPORT: str = "data/cluster_tuning.json"
+
+# Exact nearest-neighbor backend: "sklearn" (NearestNeighbors) or "brute"
+# (blocked float32 GEMM, see models.BruteForceIndex)
+DEFAULT_KNN_BACKEND: str = "sklearn"
+BRUTE_FORCE_BLOCK_BYTES: int = 64 * 1024 * 1024
+
+# Worker processes for backend="sharded" (see models.ShardedIndex); None
+# means one per CPU core
+DEFAULT_N_SHARDS: Optional[int] = None
+
+# Optional IVF approximate index (see models.IVFIndex)
+DEFAULT_IVF_N_PROBE: int = 8
+IVF_TRAIN_POINTS_PER_LIST: int = 256
+
+# Mood-slider step, which is also the spacing of the precomputed mood lattice
+MOOD_CACHE_QUANTUM: float = 0.05
+# Mood-slider query cache: up to MOOD_CACHE_SIZE distinct (mood point, n,
+# offset) results are kept. Keys round the inputs to MOOD_CACHE_KEY_DECIMALS
+# places, so slider values that differ only by float noise (0.15 vs
+# 0.15000000000000002) share an entry; queries always use the exact values.
+MOOD_CACHE_SIZE: int = 4096
+MOOD_CACHE_KEY_DECIMALS: int = 9
+
+# Results stored per point of the precomputed mood lattice
+MOOD_LATTICE_TOP_K: int = 50
+
+# Neighbors stored per row in the precomputed neighbor graph
+NEIGHBOR_GRAPH_K: int = 50
+
+# Incremental updates (VibeRecommender.add_tracks/remove_tracks): compact,
+# i.e. rebuild the main index, once delta rows plus removed rows exceed this
+# fraction of the indexed catalog
+DELTA_COMPACTION_FRACTION: float = 0.1
+
+# Filtered recommendations (indexes.TrackFilter): filters matching at most
+# this fraction of the catalog are searched exactly over a sub-index of just
+# the matching rows; broader ones post-filter a growing pool from the main
+# index. Resolved filters are cached per recommender.
+FILTER_SUBINDEX_FRACTION: float = 0.05
+FILTER_CACHE_SIZE: int = 32
+
+# Queries per neighbor search in the batched recommend_by_tracks/moods APIs
+BATCH_QUERY_BLOCK_SIZE: int = 8192
+
+# Maximum number of matches returned by the seed-track search box
+SEARCH_MAX_RESULTS: int = 50
+
+# Directory for the persisted model snapshot (see snapshot.py)
+DEFAULT_SNAPSHOT_DIR: str = "data/snapshot"
+
+# CSV ingest: rows per streamed chunk, and where the columnar cache of the
+# cleaned catalog lives (see preprocess.write_ingest_cache)
+INGEST_CHUNK_ROWS: int = 200_000
+DEFAULT_INGEST_CACHE_DIR: str = "data/ingest_cache"
+
+# Out-of-core serving (see out_of_core.py): memory budget per scanned block
+# of the memory-mapped feature matrix, and metadata shards kept in memory
+OUT_OF_CORE_BLOCK_BYTES: int = 64 * 1024 * 1024
+OUT_OF_CORE_SHARD_CACHE: int = 8
+
+# Stage profiling (see profiling.py): samples kept per stage by the
+# in-memory histogram sink, whether installing a sink also starts
+# tracemalloc to record allocated bytes per stage (slows every allocation),
+# and whether the Streamlit app records stage timings from startup (otherwise
+# recording starts when the debug sidebar is first opened)
+PROFILE_HISTOGRAM_WINDOW: int = 2048
+PROFILE_TRACE_MEMORY: bool = False
+APP_STAGE_TIMINGS: bool = False
+
+# Benchmark suite (see benchmarks/): synthetic catalog sizes and where the
+# generated CSVs and JSON reports go
+BENCHMARK_SIZES: List[int] = [100_000, 1_000_000, 10_000_000]
+DEFAULT_BENCHMARK_DIR: str = "data/benchmarks"
+
+# JSON recommendation service (see service.py): bind address, how long
+# concurrent requests are collected into one batched neighbor search, the
+# largest batch, the most results one request may ask for (``n``), worker
+# threads for CPU work, and the request body limit
+SERVICE_HOST: str = "127.0.0.1"
+SERVICE_PORT: int = 8765
+SERVICE_BATCH_WINDOW_MS: float = 2.0
+SERVICE_MAX_BATCH: int = 256
+SERVICE_MAX_N: int = 1000
+SERVICE_WORKERS: int = 4
+SERVICE_MAX_BODY_BYTES: int = 1024 * 1024
+
+# Hot catalog reload (see hot_reload.py): seconds between checks of the CSV
+# for changes, and the smallest acceptable new catalog as a fraction of the
+# current one's rows (guards against swapping in a truncated file)
+CATALOG_POLL_SECONDS: float = 5.0
+RELOAD_MIN_ROW_FRACTION: float = 0.5
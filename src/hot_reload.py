@@ -0,0 +1,261 @@
+"""Zero-downtime reload of the recommender when the catalog CSV changes.
+
+``ReloadingLoader`` is a StartupLoader that keeps watching the CSV once the
+first recommender is ready. It checks the file every CATALOG_POLL_SECONDS. A
+change is acted on once the file's size and mtime have stopped changing for
+one poll, so a copy in progress is not read half-written. Then, on the
+loader's background thread:
+
+1. A new VibeRecommender is built from the CSV with the same options.
+2. It is validated (``validate_recommender``) and warmed up: search index
+   built, one mood query run.
+3. It replaces ``recommender`` with a single attribute assignment and
+   becomes the new snapshot.
+
+Requests read ``loader.recommender`` once and keep that reference, so
+queries already running finish on the old version, which is freed when the
+last of them returns. If the build or the validation fails, the current
+version keeps serving and ``reload_error`` says why. ``rollback()`` swaps
+back to the version before the last reload (only that one is kept) and
+saves it as the snapshot again, pinned to the current CSV, so a restart
+serves it too instead of rebuilding the rejected catalog.
+
+Usage (from the project root), to watch a CSV and log each reload:
+
+    python src/hot_reload.py data/spotify_tracks.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+from config import (
+    CATALOG_POLL_SECONDS,
+    DEFAULT_INGEST_CACHE_DIR,
+    DEFAULT_SNAPSHOT_DIR,
+    RELOAD_MIN_ROW_FRACTION,
+)
+from startup import READY, StartupLoader
+
+if TYPE_CHECKING:
+    from recommender import VibeRecommender
+
+# Reload states (``reload_status``)
+IDLE = "idle"
+BUILDING = "building"
+REJECTED = "rejected"
+
+
+class CatalogValidationError(ValueError):
+    """Raised when a rebuilt recommender is not fit to replace the current one."""
+
+
+def validate_recommender(
+    new: "VibeRecommender",
+    current: Optional["VibeRecommender"] = None,
+    min_row_fraction: float = RELOAD_MIN_ROW_FRACTION,
+) -> None:
+    """
+    Check that ``new`` can serve in place of ``current``.
+
+    It must have rows, finite scaled features, the same feature columns as
+    ``current`` and at least ``min_row_fraction`` of its rows. A basic mood
+    query must also return results. Raises CatalogValidationError listing
+    every problem found.
+    """
+    import numpy as np
+
+    problems = []
+    n_rows = len(new.df)
+    if n_rows == 0:
+        problems.append("the catalog is empty")
+    elif not np.isfinite(new.X_scaled).all():
+        problems.append("scaled features contain NaN or infinite values")
+    if current is not None:
+        if list(new.feature_columns) != list(current.feature_columns):
+            problems.append(
+                f"feature columns changed from {list(current.feature_columns)} "
+                f"to {list(new.feature_columns)}"
+            )
+        if n_rows < min_row_fraction * len(current.df):
+            problems.append(
+                f"{n_rows} rows, fewer than {min_row_fraction:.0%} "
+                f"of the current {len(current.df)}"
+            )
+    if not problems and new.recommend_by_mood(0.5, 0.5, 0.5, n=1).empty:
+        problems.append("a basic mood query returned no tracks")
+    if problems:
+        raise CatalogValidationError("; ".join(problems))
+
+
+class ReloadingLoader(StartupLoader):
+    """StartupLoader that swaps in a rebuilt recommender when the CSV changes."""
+
+    def __init__(
+        self,
+        csv_path: str,
+        snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+        poll_seconds: float = CATALOG_POLL_SECONDS,
+        **build_kwargs: Any,
+    ) -> None:
+        super().__init__(csv_path, snapshot_dir, **build_kwargs)
+        self.poll_seconds = poll_seconds
+        self.version = 0
+        self.previous: Optional["VibeRecommender"] = None
+        self.reload_status = IDLE
+        self.reload_error: Optional[BaseException] = None
+        self.reloaded_at: Optional[float] = None  # time.time() of the last swap
+        self.rolled_back_checksum: Optional[str] = None  # CSV version rollback() undid
+        self._swap_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _run(self) -> None:
+        super()._run()
+        if self.status != READY:
+            return
+        self.version = 1
+        self._watch()
+
+    def _file_state(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _watch(self) -> None:
+        seen = self._file_state()
+        changed = False
+        while not self._stop.wait(self.poll_seconds):
+            state = self._file_state()
+            if state != seen:
+                seen, changed = state, True  # wait for the file to settle
+            elif changed and state is not None:
+                changed = False
+                self.reload()
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Rebuild from the CSV and swap the result in if it validates.
+
+        Skipped (returning False) when the CSV's checksum matches the
+        current version or the version last rolled back, unless ``force``.
+        Returns True after a swap. A
+        failed build or validation is recorded in ``reload_error`` and
+        leaves the current version serving.
+        """
+        from recommender import VibeRecommender
+        from snapshot import file_checksum
+
+        with self._reload_lock:
+            current = self.recommender
+            if current is None:
+                return False
+            try:
+                checksum = file_checksum(self.csv_path)
+                if not force and checksum in (
+                    current.source_checksum,
+                    self.rolled_back_checksum,
+                ):
+                    return False
+                self.reload_status = BUILDING
+                new = VibeRecommender.from_csv(
+                    self.csv_path, source_checksum=checksum, **self.build_kwargs
+                )
+                validate_recommender(new, current)
+                new.search_tracks()  # build the search index off the request path
+            except Exception as exc:  # keep serving the current version
+                self.reload_error = exc
+                self.reload_status = REJECTED
+                return False
+
+            self._swap(new)
+            self.rolled_back_checksum = None
+            self.reload_error = None
+            self.reload_status = IDLE
+            # The old version may have the snapshot memory-mapped; the new one
+            # is written under new file names, so it keeps reading its data.
+            try:
+                new.save(self.snapshot_dir)
+            except OSError as exc:  # serving is unaffected; the next start rebuilds
+                self.reload_error = exc
+            return True
+
+    def _swap(self, new: "VibeRecommender") -> None:
+        with self._swap_lock:
+            self.previous = self.recommender
+            self.recommender = new
+            self.version += 1
+            self.reloaded_at = time.time()
+
+    def rollback(self) -> bool:
+        """
+        Serve the version before the last reload again; False if there is none.
+
+        The restored version is re-saved as the snapshot, pinned to the
+        current CSV (see VibeRecommender.save), so restarts and later
+        ``load_or_build`` calls load it rather than the rolled-back build.
+        Waits for a reload in progress to finish first.
+        """
+        with self._reload_lock:
+            with self._swap_lock:
+                if self.previous is None:
+                    return False
+                rejected = self.recommender
+                self.recommender, self.previous = self.previous, None
+                self.version += 1
+                self.reloaded_at = time.time()
+            restored = self.recommender
+            self.rolled_back_checksum = rejected.source_checksum
+            try:
+                restored.save(self.snapshot_dir, pinned_checksum=rejected.source_checksum)
+            except OSError as exc:  # serving is unaffected
+                self.reload_error = exc
+        return True
+
+    def stop(self) -> None:
+        """Stop watching the CSV (the current version keeps serving)."""
+        self._stop.set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Watch a catalog CSV and hot-reload it.")
+    parser.add_argument("csv_path", nargs="?", default="data/spotify_tracks.csv")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR)
+    parser.add_argument("--poll-seconds", type=float, default=CATALOG_POLL_SECONDS)
+    args = parser.parse_args()
+
+    loader = ReloadingLoader(
+        args.csv_path,
+        args.snapshot_dir,
+        poll_seconds=args.poll_seconds,
+        dedupe="track_id",
+        ingest_cache_dir=DEFAULT_INGEST_CACHE_DIR,
+    ).start()
+    rec = loader.wait()
+    print(f"version 1 ready: {len(rec.df)} rows after {loader.timings[READY]:.1f} s", flush=True)
+
+    seen = (loader.version, loader.reload_status)
+    try:
+        while True:
+            time.sleep(0.5)
+            state = (loader.version, loader.reload_status)
+            if state == seen:
+                continue
+            seen = state
+            if loader.reload_status == REJECTED:
+                print(f"reload rejected: {loader.reload_error}", flush=True)
+            elif loader.reload_status == IDLE:
+                print(f"version {loader.version} live: {len(loader.recommender.df)} rows",
+                      flush=True)
+    except KeyboardInterrupt:
+        loader.stop()
+
+
+if __name__ == "__main__":
+    main()
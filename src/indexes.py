@@ -0,0 +1,813 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import ID_COL_ARTISTS, ID_COL_GENRE, ID_COL_GENRES, ID_COL_TRACK_NAME
+
+
+def normalize_key(value: object) -> str:
+    """Normalize a track or artist name for exact lookups (case-insensitive)."""
+    return str(value).lower()
+
+
+def duplicate_group_ids(df: pd.DataFrame) -> np.ndarray:
+    """
+    Integer id per row, shared by all rows with the same (track_name, artists).
+
+    The dataset lists a track once per genre; recommendations dedupe on these
+    ids with NumPy instead of comparing strings. Missing values form their own
+    group, matching ``drop_duplicates``.
+    """
+    groups = df.groupby(
+        [ID_COL_TRACK_NAME, ID_COL_ARTISTS],
+        sort=False,
+        dropna=False,
+        observed=True,
+    )
+    return groups.ngroup().to_numpy(dtype=np.int64)
+
+
+def first_unique_positions(
+    keys: np.ndarray,
+    skip: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Ascending positions of the first occurrence of each key.
+
+    Positions whose key is in ``skip`` are dropped. For a distance-sorted
+    neighbor list keyed by group id, this is "closest copy of each track".
+    """
+    _, first = np.unique(keys, return_index=True)
+    first.sort()
+    if skip is not None and len(skip):
+        first = first[~np.isin(keys[first], skip)]
+    return first
+
+
+def _normalized_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """Lowercased copy of a string column (NaN stays NaN)."""
+    return df[column].str.lower()
+
+
+@dataclass
+class TrackNameIndex:
+    """
+    Hash index from normalized track name (and name + artist) to row positions.
+
+    Positions are stored in ascending row order, so the first entry matches
+    what a full boolean scan over the dataframe would have returned first.
+    ``add`` and ``remove`` keep it current for incremental catalog updates.
+    """
+    by_name: Dict[str, np.ndarray]
+    by_name_artist: Dict[Tuple[str, str], np.ndarray]
+    artists: List[object]  # raw artist strings by row, for artist-hint fallback
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, live: Optional[np.ndarray] = None) -> "TrackNameIndex":
+        """
+        Build the index with two groupby passes over the catalog.
+
+        Rows where the boolean mask ``live`` is False (removed tracks) are
+        left out of the index but keep their positions.
+        """
+        names = _normalized_column(df, ID_COL_TRACK_NAME)
+        if live is not None:
+            names = names.where(live)
+        artists = _normalized_column(df, ID_COL_ARTISTS)
+
+        by_name = names.groupby(names, sort=False).indices
+        by_name_artist = names.groupby([names, artists], sort=False).indices
+
+        return cls(
+            by_name=dict(by_name),
+            by_name_artist=dict(by_name_artist),
+            artists=df[ID_COL_ARTISTS].tolist(),
+        )
+
+    def add(self, new: pd.DataFrame, start: int) -> None:
+        """Index the rows of ``new``, which sit at positions ``start`` onwards."""
+        names = _normalized_column(new, ID_COL_TRACK_NAME)
+        artists = _normalized_column(new, ID_COL_ARTISTS)
+        groups = (
+            (self.by_name, names.groupby(names, sort=False).indices),
+            (self.by_name_artist, names.groupby([names, artists], sort=False).indices),
+        )
+        for index, found in groups:
+            for key, positions in found.items():
+                positions = positions + start
+                old = index.get(key)
+                index[key] = positions if old is None else np.concatenate([old, positions])
+        self.artists.extend(new[ID_COL_ARTISTS].tolist())
+
+    def remove(self, df: pd.DataFrame, rows: np.ndarray) -> None:
+        """Drop catalog ``rows`` (positions in ``df``) from the lookups."""
+        subset = df.iloc[rows]
+        names = _normalized_column(subset, ID_COL_TRACK_NAME).tolist()
+        artists = _normalized_column(subset, ID_COL_ARTISTS).tolist()
+        for row, name, artist in zip(rows, names, artists):
+            _discard_position(self.by_name, name, row)
+            _discard_position(self.by_name_artist, (name, artist), row)
+
+    def lookup(self, track_name: str) -> np.ndarray:
+        """Return row positions whose track name matches (case-insensitive)."""
+        return self.by_name.get(normalize_key(track_name), np.empty(0, dtype=np.intp))
+
+    def resolve_seed(
+        self,
+        track_name: str,
+        artist_hint: Optional[str] = None,
+    ) -> Optional[int]:
+        """
+        Pick the seed row for a track name, preferring rows matching artist_hint.
+
+        The first row with that name whose artists match ``artist_hint`` as a
+        case-insensitive regular expression wins, as with
+        ``Series.str.contains(artist_hint, case=False)``; only rows with the
+        name are checked. Falls back to the first row with the name; None if
+        the name is unknown.
+        """
+        positions = self.lookup(track_name)
+        if len(positions) == 0:
+            return None
+
+        if artist_hint:
+            pattern = re.compile(artist_hint, re.IGNORECASE)
+            for pos in positions:
+                artist = self.artists[pos]
+                if isinstance(artist, str) and pattern.search(artist):
+                    return int(pos)
+
+        return int(positions[0])
+
+
+def _discard_position(index: Dict, key: object, row: int) -> None:
+    """Remove ``row`` from the position array under ``key``, dropping empty keys."""
+    positions = index.get(key)
+    if positions is None:
+        return
+    keep = positions[positions != row]
+    if len(keep):
+        index[key] = keep
+    else:
+        del index[key]
+
+
+def appended_group_ids(
+    group_ids: np.ndarray,
+    df: pd.DataFrame,
+    start: int,
+    name_index: TrackNameIndex,
+) -> np.ndarray:
+    """
+    duplicate_group_ids for the rows of ``df`` from ``start`` on.
+
+    ``group_ids`` holds the ids of the rows before ``start``. New rows join
+    the group of a live row with the same (track_name, artists), found
+    through ``name_index`` (built over the rows before ``start``), and
+    otherwise get fresh ids. Rows with a missing name or
+    artist only share ids within the new batch. Costs O(new rows).
+    """
+    new = df.iloc[start:]
+    local = duplicate_group_ids(new)
+    _, first = np.unique(local, return_index=True)
+    names = new[ID_COL_TRACK_NAME].to_numpy(dtype=object)
+    artists = new[ID_COL_ARTISTS].to_numpy(dtype=object)
+    name_col = df[ID_COL_TRACK_NAME]
+    artist_col = df[ID_COL_ARTISTS]
+
+    next_id = int(group_ids.max()) + 1 if len(group_ids) else 0
+    mapped = np.empty(len(first), dtype=np.int64)
+    for g, i in enumerate(first):
+        name, artist = names[i], artists[i]
+        mapped[g] = -1
+        if isinstance(name, str) and isinstance(artist, str):
+            for row in name_index.by_name_artist.get((name.lower(), artist.lower()), ()):
+                if name_col.iat[row] == name and artist_col.iat[row] == artist:
+                    mapped[g] = group_ids[row]
+                    break
+        if mapped[g] < 0:
+            mapped[g] = next_id
+            next_id += 1
+    return mapped[local]
+
+
+def _trigrams(text: str) -> set:
+    """Distinct 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass
+class SubstringIndex:
+    """
+    Trigram inverted index plus a sorted prefix table over one string column.
+
+    ``match`` returns the same rows as a case-insensitive literal
+    ``str.contains``, but only verifies rows sharing every trigram of the
+    query instead of scanning the whole column.
+    """
+    lowered: np.ndarray  # lowercased value per row ("" for missing)
+    postings: Dict[str, np.ndarray]  # trigram -> ascending row ids
+    sorted_rows: np.ndarray  # row ids ordered by lowered value
+    sorted_keys: List[str]  # lowered values in that order, for bisect
+
+    @classmethod
+    def build(cls, values: pd.Series) -> "SubstringIndex":
+        """Build postings and the prefix table in one pass over values."""
+        lowered = values.astype(object).fillna("").astype(str).str.lower().to_numpy(dtype=object)
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for row, text in enumerate(lowered):
+            for gram in _trigrams(text):
+                postings[gram].append(row)
+
+        sorted_rows = np.argsort(lowered, kind="stable")
+        return cls(
+            lowered=lowered,
+            postings={g: np.asarray(rows, dtype=np.int32) for g, rows in postings.items()},
+            sorted_rows=sorted_rows,
+            sorted_keys=lowered[sorted_rows].tolist(),
+        )
+
+    def match(self, query: str) -> np.ndarray:
+        """Ascending row ids whose value contains query (case-insensitive)."""
+        query = query.lower()
+        if len(query) < 3:
+            # Too short for the trigram index; these match a large share of
+            # the catalog anyway, so a vectorized scan is as good as it gets.
+            hits = pd.Series(self.lowered).str.contains(query, regex=False)
+            return np.flatnonzero(hits.to_numpy())
+
+        lists = []
+        for gram in _trigrams(query):
+            rows = self.postings.get(gram)
+            if rows is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(rows)
+
+        lists.sort(key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+
+        if len(query) == 3:
+            return candidates
+        # Sharing every trigram does not imply containing the query; verify.
+        keep = [row for row in candidates if query in self.lowered[row]]
+        return np.asarray(keep, dtype=np.int32)
+
+    def prefix(self, query: str) -> np.ndarray:
+        """Ascending row ids whose value starts with query (case-insensitive)."""
+        query = query.lower()
+        lo = bisect_left(self.sorted_keys, query)
+        hi = bisect_left(self.sorted_keys, query[:-1] + chr(ord(query[-1]) + 1))
+        return np.sort(self.sorted_rows[lo:hi])
+
+
+@dataclass
+class TrackSearchIndex:
+    """
+    Search engine behind the seed-track search box.
+
+    Holds the deduplicated (track_name, artists) candidate table and a
+    SubstringIndex over each column. Matches are ranked prefix-first, then
+    by catalog order.
+    """
+    candidates: pd.DataFrame  # unique (track_name, artists) pairs
+    names: SubstringIndex
+    artists: SubstringIndex
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "TrackSearchIndex":
+        """
+        Deduplicate (name, artist) pairs and index both columns.
+
+        Rows without a track name are left out; they cannot be picked as a
+        seed by name. Both the early index at startup and the recommender's
+        own index are built here, so they offer the same candidates.
+        """
+        candidates = (
+            df.loc[df[ID_COL_TRACK_NAME].notna(), [ID_COL_TRACK_NAME, ID_COL_ARTISTS]]
+            .drop_duplicates()
+            .reset_index(drop=True)
+        )
+        return cls(
+            candidates=candidates,
+            names=SubstringIndex.build(candidates[ID_COL_TRACK_NAME]),
+            artists=SubstringIndex.build(candidates[ID_COL_ARTISTS]),
+        )
+
+    def search(
+        self,
+        name_query: str = "",
+        artist_query: str = "",
+        limit: int = 50,
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Return up to ``limit`` matching candidates and the total match count.
+
+        Both queries are case-insensitive substrings; empty queries match all.
+        """
+        matches: Optional[np.ndarray] = None
+        if name_query:
+            matches = self.names.match(name_query)
+        if artist_query:
+            by_artist = self.artists.match(artist_query)
+            matches = (
+                by_artist
+                if matches is None
+                else np.intersect1d(matches, by_artist, assume_unique=True)
+            )
+
+        if matches is None:
+            total = len(self.candidates)
+            return self.candidates.head(limit), total
+
+        total = len(matches)
+        ranked_by, query = (
+            (self.names, name_query) if name_query else (self.artists, artist_query)
+        )
+        prefixed = np.intersect1d(ranked_by.prefix(query), matches, assume_unique=True)
+        top = prefixed[:limit]
+        if len(top) < limit:
+            rest = np.setdiff1d(matches, prefixed, assume_unique=True)
+            top = np.concatenate([top, rest[: limit - len(top)]])
+
+        return self.candidates.iloc[top], total
+
+
+@dataclass
+class MoodLattice:
+    """
+    Precomputed answers for every point of the basic mood-slider lattice.
+
+    Energy, valence and danceability each take ``steps`` values
+    (0, quantum, ..., 1). For each lattice point the top_k deduplicated
+    recommendations are stored as catalog row ids (-1 pads short lists)
+    and distances, so a basic-slider query is a single array lookup.
+    """
+    rows: np.ndarray  # (steps, steps, steps, top_k) int32
+    distances: np.ndarray  # (steps, steps, steps, top_k) float32
+    quantum: float
+
+    @property
+    def top_k(self) -> int:
+        return int(self.rows.shape[-1])
+
+    @staticmethod
+    def grid(quantum: float) -> np.ndarray:
+        """All lattice points as rows of (energy, valence, danceability)."""
+        steps = int(round(1.0 / quantum)) + 1
+        axis = np.round(np.arange(steps) * quantum, 10)
+        mesh = np.meshgrid(axis, axis, axis, indexing="ij")
+        return np.stack(mesh, axis=-1).reshape(-1, 3)
+
+    def lookup(
+        self,
+        energy: float,
+        valence: float,
+        danceability: float,
+        n: int,
+        offset: int = 0,
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (rows, distances) for results ``offset .. offset + n`` at a mood point.
+
+        Returns None if the point is off the lattice or the page goes past
+        top_k; callers then fall back to a live search.
+        """
+        if offset + n > self.top_k:
+            return None
+
+        steps = self.rows.shape[0]
+        cell = []
+        for value in (energy, valence, danceability):
+            i = int(round(value / self.quantum))
+            if not 0 <= i < steps or abs(i * self.quantum - value) > 1e-9:
+                return None
+            cell.append(i)
+
+        rows = self.rows[tuple(cell)][offset:offset + n]
+        distances = self.distances[tuple(cell)][offset:offset + n]
+        found = rows >= 0
+        return rows[found], distances[found]
+
+
+@dataclass(frozen=True)
+class TrackFilter:
+    """
+    Restrict recommendations to a subset of the catalog.
+
+    A row passes if it has any of ``genres`` (case-insensitive; with
+    deduped ingest, any genre in ``track_genres`` counts), is in any of
+    ``clusters``, and lies within every ``ranges`` entry, a mapping from
+    column to inclusive (low, high) bounds where None means unbounded.
+    Empty criteria do not restrict. Instances are hashable, so they can be
+    part of cache keys.
+    """
+    genres: Sequence[str] = ()
+    clusters: Sequence[int] = ()
+    ranges: Mapping[str, Tuple[Optional[float], Optional[float]]] = ()
+
+    def __post_init__(self) -> None:
+        ranges = dict(self.ranges)
+        object.__setattr__(self, "genres", tuple(sorted({normalize_key(g) for g in self.genres})))
+        object.__setattr__(self, "clusters", tuple(sorted({int(c) for c in self.clusters})))
+        object.__setattr__(self, "ranges", tuple(sorted(ranges.items())))
+
+    def __bool__(self) -> bool:
+        return bool(self.genres or self.clusters or self.ranges)
+
+
+@dataclass
+class FilterIndex:
+    """
+    Per-genre and per-cluster row lists plus sorted numeric columns.
+
+    Built once per catalog, so resolving a TrackFilter into a row mask
+    costs one pass over the matching row lists and one ``searchsorted``
+    per range, never a scan of the dataframe. Rows appended by ``add``
+    extend the row lists; their numeric values are kept unsorted in
+    ``appended_values`` and compared directly, until the next full build.
+    """
+    n_rows: int
+    by_genre: Dict[str, np.ndarray]  # lowercased genre -> ascending rows
+    by_cluster: Dict[int, np.ndarray]  # cluster label -> ascending rows
+    sorted_rows: Dict[str, np.ndarray]  # numeric column -> rows ordered by value
+    sorted_values: Dict[str, np.ndarray]  # numeric column -> values in that order
+    appended_values: Dict[str, np.ndarray] = field(default_factory=dict)  # rows n_sorted..
+
+    @property
+    def n_sorted(self) -> int:
+        """Rows covered by the sorted numeric columns."""
+        return self.n_rows - len(next(iter(self.appended_values.values()), ()))
+
+    @staticmethod
+    def _genre_rows(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Lowercased genre -> ascending positions in ``df``."""
+        n_rows = len(df)
+        if ID_COL_GENRES in df.columns:
+            tuples = df[ID_COL_GENRES].to_numpy(dtype=object)
+            genre_rows = np.repeat(np.arange(n_rows), [len(t) for t in tuples])
+            genres = pd.Series([g for t in tuples for g in t], dtype=object)
+        elif ID_COL_GENRE in df.columns:
+            present = df[ID_COL_GENRE].notna().to_numpy()
+            genre_rows = np.flatnonzero(present)
+            genres = df[ID_COL_GENRE].astype(object)[present].reset_index(drop=True)
+        else:
+            genre_rows = np.empty(0, dtype=np.intp)
+            genres = pd.Series([], dtype=object)
+
+        lowered = genres.str.lower()
+        return {
+            g: genre_rows[pos] for g, pos in lowered.groupby(lowered, sort=False).indices.items()
+        }
+
+    @staticmethod
+    def _cluster_rows(df: pd.DataFrame, cluster_column: str) -> Dict[int, np.ndarray]:
+        """Cluster label -> ascending positions in ``df``."""
+        if cluster_column not in df.columns:
+            return {}
+        labels = df[cluster_column].to_numpy()
+        groups = pd.Series(labels).groupby(labels).indices
+        return {int(c): rows for c, rows in groups.items()}
+
+    @classmethod
+    def build(
+        cls,
+        df: pd.DataFrame,
+        numeric_columns: Sequence[str],
+        cluster_column: str = "mood_cluster",
+    ) -> "FilterIndex":
+        """Group rows by genre and cluster and argsort each numeric column."""
+        sorted_rows = {}
+        sorted_values = {}
+        for col in numeric_columns:
+            values = df[col].to_numpy(dtype=float)
+            order = np.argsort(values, kind="stable")
+            sorted_rows[col] = order
+            sorted_values[col] = values[order]
+
+        return cls(
+            n_rows=len(df),
+            by_genre=cls._genre_rows(df),
+            by_cluster=cls._cluster_rows(df, cluster_column),
+            sorted_rows=sorted_rows,
+            sorted_values=sorted_values,
+        )
+
+    def add(self, new: pd.DataFrame, cluster_column: str = "mood_cluster") -> None:
+        """Append the rows of ``new`` (positions ``n_rows`` onwards) in O(len(new))."""
+        start = self.n_rows
+        for index, found in (
+            (self.by_genre, self._genre_rows(new)),
+            (self.by_cluster, self._cluster_rows(new, cluster_column)),
+        ):
+            for key, rows in found.items():
+                old = index.get(key)
+                index[key] = rows + start if old is None else np.concatenate([old, rows + start])
+        for col in self.sorted_values:
+            values = new[col].to_numpy(dtype=float)
+            old = self.appended_values.get(col)
+            self.appended_values[col] = values if old is None else np.concatenate([old, values])
+        self.n_rows += len(new)
+
+    @property
+    def genres(self) -> List[str]:
+        return sorted(self.by_genre)
+
+    @staticmethod
+    def _flatten(groups: Dict[Any, np.ndarray]) -> Tuple[List[Any], np.ndarray, np.ndarray]:
+        """Dict of row lists -> (keys, offsets, concatenated rows)."""
+        keys = list(groups)
+        sizes = [len(groups[k]) for k in keys]
+        offsets = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+        rows = np.concatenate([groups[k] for k in keys]) if keys else np.empty(0, dtype=np.intp)
+        return keys, offsets, rows
+
+    @staticmethod
+    def _unflatten(
+        keys: Sequence[Any],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+    ) -> Dict[Any, np.ndarray]:
+        """Inverse of ``_flatten``."""
+        return {k: rows[offsets[i]:offsets[i + 1]] for i, k in enumerate(keys)}
+
+    def save(self, path: str) -> None:
+        """Write the row lists and sorted columns to the .npz file ``path``."""
+        genres, genre_offsets, genre_rows = self._flatten(self.by_genre)
+        clusters, cluster_offsets, cluster_rows = self._flatten(self.by_cluster)
+        columns = list(self.sorted_values)
+        n_appended = self.n_rows - self.n_sorted
+        with open(path, "wb") as fh:  # a file object stops savez appending ".npz"
+            np.savez(
+                fh,
+                n_rows=self.n_rows,
+                genres=np.array(genres, dtype=str),
+                genre_offsets=genre_offsets,
+                genre_rows=genre_rows,
+                clusters=np.array(clusters, dtype=np.int64),
+                cluster_offsets=cluster_offsets,
+                cluster_rows=cluster_rows,
+                columns=np.array(columns, dtype=str),
+                sorted_rows=np.array([self.sorted_rows[c] for c in columns]),
+                sorted_values=np.array([self.sorted_values[c] for c in columns]),
+                appended_values=np.array(
+                    [self.appended_values.get(c, np.empty(0)) for c in columns]
+                ).reshape(len(columns), n_appended),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "FilterIndex":
+        with np.load(path) as arrays:
+            columns = arrays["columns"].tolist()
+            appended = arrays["appended_values"]
+            return cls(
+                n_rows=int(arrays["n_rows"]),
+                by_genre=cls._unflatten(
+                    arrays["genres"].tolist(), arrays["genre_offsets"], arrays["genre_rows"]
+                ),
+                by_cluster=cls._unflatten(
+                    arrays["clusters"].tolist(), arrays["cluster_offsets"], arrays["cluster_rows"]
+                ),
+                sorted_rows=dict(zip(columns, arrays["sorted_rows"])),
+                sorted_values=dict(zip(columns, arrays["sorted_values"])),
+                appended_values=dict(zip(columns, appended)) if appended.shape[1] else {},
+            )
+
+    def _rows_mask(self, row_lists: List[np.ndarray]) -> np.ndarray:
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for rows in row_lists:
+            mask[rows] = True
+        return mask
+
+    def mask(self, flt: TrackFilter) -> np.ndarray:
+        """Boolean mask of rows passing ``flt``."""
+        mask = np.ones(self.n_rows, dtype=bool)
+        empty = np.empty(0, dtype=np.intp)
+        if flt.genres:
+            mask &= self._rows_mask([self.by_genre.get(g, empty) for g in flt.genres])
+        if flt.clusters:
+            mask &= self._rows_mask([self.by_cluster.get(c, empty) for c in flt.clusters])
+        for col, (low, high) in flt.ranges:
+            if col not in self.sorted_values:
+                raise ValueError(
+                    f"Cannot filter on {col!r}; expected one of {sorted(self.sorted_values)}"
+                )
+            values = self.sorted_values[col]
+            lo = 0 if low is None else np.searchsorted(values, low, side="left")
+            hi = len(values) if high is None else np.searchsorted(values, high, side="right")
+            in_range = [self.sorted_rows[col][lo:hi]]
+            appended = self.appended_values.get(col)
+            if appended is not None:
+                hits = np.ones(len(appended), dtype=bool)
+                if low is not None:
+                    hits &= appended >= low
+                if high is not None:
+                    hits &= appended <= high
+                in_range.append(self.n_sorted + np.flatnonzero(hits))
+            mask &= self._rows_mask(in_range)
+        return mask
+
+
+@dataclass
+class ClusterStats:
+    """
+    Per-cluster summaries and row lists, computed once per catalog.
+
+    ``rows`` holds every live catalog row grouped by cluster (ascending
+    within each cluster) and ``offsets`` marks where each cluster starts,
+    so the members of ``labels[i]`` are ``rows[offsets[i]:offsets[i + 1]]``.
+    Means and standard deviations are over the raw feature values. The
+    representative track of a cluster is the member closest to its
+    centroid in scaled space, a cheap stand-in for the true medoid.
+    ``add`` and ``remove`` update everything from the changed rows alone
+    (means and spreads by merging per-cluster moments).
+    """
+    labels: np.ndarray  # (n_clusters,) sorted cluster labels
+    offsets: np.ndarray  # (n_clusters + 1,) int64
+    rows: np.ndarray  # (n_live,) int64
+    means: np.ndarray  # (n_clusters, n_features) float64
+    stds: np.ndarray  # (n_clusters, n_features) float64
+    medoid_rows: np.ndarray  # (n_clusters,) int64
+
+    @classmethod
+    def build(
+        cls,
+        df: pd.DataFrame,
+        feature_columns: Sequence[str],
+        X_scaled: np.ndarray,
+        centroids: np.ndarray,
+        live: Optional[np.ndarray] = None,
+        cluster_column: str = "mood_cluster",
+    ) -> "ClusterStats":
+        """Group live rows by cluster and summarize each cluster's features."""
+        rows = np.arange(len(df)) if live is None else np.flatnonzero(live)
+        stats = cls._summarize(
+            rows,
+            df[cluster_column].to_numpy()[rows],
+            df[list(feature_columns)].to_numpy(dtype=float)[rows],
+        )
+        for i in range(len(stats.labels)):
+            stats._update_medoid(i, X_scaled, centroids)
+        return stats
+
+    @classmethod
+    def _summarize(
+        cls,
+        rows: np.ndarray,
+        labels: np.ndarray,
+        values: np.ndarray,
+    ) -> "ClusterStats":
+        """Statistics of ``rows`` with their labels and raw feature values (no medoids)."""
+        order = np.argsort(labels, kind="stable")
+        labels, starts, counts = np.unique(labels[order], return_index=True, return_counts=True)
+        values = values[order]
+
+        # Segment sums over the grouped rows; two passes keep the spread exact.
+        sizes = counts[:, None].astype(float)
+        means = np.add.reduceat(values, starts, axis=0) / sizes if len(rows) else values[:0]
+        centered = values - np.repeat(means, counts, axis=0)
+        stds = (
+            np.sqrt(np.add.reduceat(centered * centered, starts, axis=0) / sizes)
+            if len(rows) else values[:0]
+        )
+        return cls(
+            labels=labels,
+            offsets=np.append(starts, len(rows)).astype(np.int64),
+            rows=rows[order].astype(np.int64),
+            means=means,
+            stds=stds,
+            medoid_rows=np.full(len(labels), -1, dtype=np.int64),
+        )
+
+    def _update_medoid(
+        self,
+        i: int,
+        X_scaled: np.ndarray,
+        centroids: np.ndarray,
+        members: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Set cluster i's representative to the member closest to its centroid.
+
+        ``members`` restricts the candidates to the current representative
+        plus those rows; by default every member is considered. Ties go to
+        the lowest row, as in a full build.
+        """
+        if members is None:
+            members = self.rows[self.offsets[i]:self.offsets[i + 1]]
+        elif self.medoid_rows[i] >= 0:
+            members = np.concatenate([[self.medoid_rows[i]], members])
+        diff = np.asarray(X_scaled[members], dtype=float) - centroids[int(self.labels[i])]
+        self.medoid_rows[i] = members[np.argmin(np.einsum("ij,ij->i", diff, diff))]
+
+    def _aligned(self, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Counts, means and second moments (count * variance) over ``labels``."""
+        counts = np.zeros(len(labels), dtype=np.int64)
+        means = np.zeros((len(labels), self.means.shape[1]))
+        m2 = np.zeros_like(means)
+        pos = np.searchsorted(labels, self.labels)
+        counts[pos] = self.counts
+        means[pos] = self.means
+        m2[pos] = self.stds ** 2 * self.counts[:, None]
+        return counts, means, m2
+
+    def add(
+        self,
+        rows: np.ndarray,
+        labels: np.ndarray,
+        values: np.ndarray,
+        X_scaled: np.ndarray,
+        centroids: np.ndarray,
+    ) -> None:
+        """Fold in appended catalog ``rows`` (above every row already present)."""
+        new = self._summarize(rows, labels, values)
+        all_labels = np.union1d(self.labels, new.labels)
+        n_a, mean_a, m2_a = self._aligned(all_labels)
+        n_b, mean_b, m2_b = new._aligned(all_labels)
+        n = (n_a + n_b)[:, None].astype(float)
+        delta = mean_b - mean_a
+        means = mean_a + delta * (n_b[:, None] / n)
+        m2 = m2_a + m2_b + delta ** 2 * (n_a * n_b)[:, None] / n
+
+        # New rows are larger than all old ones, so each lands at its segment's end.
+        offsets_a = np.concatenate([[0], np.cumsum(n_a)])
+        medoids = np.full(len(all_labels), -1, dtype=np.int64)
+        medoids[np.searchsorted(all_labels, self.labels)] = self.medoid_rows
+        self.rows = np.insert(self.rows, np.repeat(offsets_a[1:], n_b), new.rows)
+        self.offsets = np.concatenate([[0], np.cumsum(n_a + n_b)]).astype(np.int64)
+        self.labels = all_labels
+        self.means = means
+        self.stds = np.sqrt(m2 / n)
+        self.medoid_rows = medoids
+        for j, label in enumerate(new.labels):
+            i = int(np.searchsorted(all_labels, label))
+            members = new.rows[new.offsets[j]:new.offsets[j + 1]]
+            self._update_medoid(i, X_scaled, centroids, members)
+
+    def remove(
+        self,
+        rows: np.ndarray,
+        labels: np.ndarray,
+        values: np.ndarray,
+        X_scaled: np.ndarray,
+        centroids: np.ndarray,
+    ) -> None:
+        """Take out catalog ``rows`` (currently present, with their labels and values)."""
+        gone = self._summarize(rows, labels, values)
+        n_a, mean_a, m2_a = self._aligned(self.labels)
+        n_b, mean_b, m2_b = gone._aligned(self.labels)
+        n_left = n_a - n_b
+        n = np.maximum(n_left, 1)[:, None].astype(float)
+        means = (mean_a * n_a[:, None] - mean_b * n_b[:, None]) / n
+        delta = mean_b - means
+        m2 = m2_a - m2_b - delta ** 2 * (n_left * n_b)[:, None] / np.maximum(n_a, 1)[:, None]
+
+        keep = n_left > 0
+        self.rows = self.rows[~np.isin(self.rows, rows)]
+        self.offsets = np.concatenate([[0], np.cumsum(n_left[keep])]).astype(np.int64)
+        self.labels = self.labels[keep]
+        self.means = means[keep]
+        self.stds = np.sqrt(np.maximum(m2[keep], 0.0) / n[keep])
+        self.medoid_rows = self.medoid_rows[keep]
+        for i in np.flatnonzero(np.isin(self.medoid_rows, rows)):
+            self._update_medoid(int(i), X_scaled, centroids)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def rows_for(self, label: int) -> np.ndarray:
+        """Ascending catalog rows of cluster ``label`` (empty if unknown)."""
+        i = int(np.searchsorted(self.labels, label))
+        if i == len(self.labels) or self.labels[i] != label:
+            return self.rows[:0]
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def save(self, path: str) -> None:
+        """Write all arrays to the .npz file ``path``."""
+        with open(path, "wb") as fh:  # a file object stops savez appending ".npz"
+            np.savez(
+                fh,
+                labels=self.labels,
+                offsets=self.offsets,
+                rows=self.rows,
+                means=self.means,
+                stds=self.stds,
+                medoid_rows=self.medoid_rows,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "ClusterStats":
+        with np.load(path) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
@@ -0,0 +1,53 @@
+"""Recall-vs-latency report for the IVF approximate index.
+
+Usage (from the project root):
+
+    python src/ivf_report.py data/spotify_tracks.csv --lists 256 --queries 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+import numpy as np
+
+from config import DEFAULT_N_NEIGHBORS, DEFAULT_SNAPSHOT_DIR, RANDOM_STATE
+from models import IVFIndex, ivf_recall_report
+from recommender import VibeRecommender
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_path")
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_DIR)
+    parser.add_argument("--lists", type=int, default=256, help="IVF list count")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=DEFAULT_N_NEIGHBORS)
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    rec = VibeRecommender.load_or_build(args.csv_path, args.snapshot)
+    rec.models.ivf = IVFIndex.build(rec.X_scaled, n_lists=args.lists)
+
+    rng = np.random.default_rng(RANDOM_STATE)
+    rows = rng.choice(len(rec.X_scaled), size=min(args.queries, len(rec.X_scaled)), replace=False)
+    report = ivf_recall_report(rec.models, rec.X_scaled[rows], n_neighbors=args.k)
+
+    print(f"{'index':<6} {'n_probe':>7} {'recall':>7} {'ms/query':>9}")
+    for r in report:
+        n_probe = "-" if r["n_probe"] is None else r["n_probe"]
+        print(f"{r['index']:<6} {n_probe:>7} {r['recall']:>7.3f} {r['ms_per_query']:>9.3f}")
+
+    # Probing every list is an exhaustive search, so anything below 1.0
+    # means the recall measurement itself is wrong.
+    if report[-1]["recall"] != 1.0:
+        raise SystemExit(f"full-probe recall is {report[-1]['recall']:.4f}, expected 1.0")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
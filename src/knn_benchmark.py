@@ -0,0 +1,106 @@
+"""Benchmark the exact nearest-neighbor backends ("sklearn" vs "brute").
+
+Times ``kneighbors`` on random catalogs for each (catalog size, batch size)
+pair and reports the faster backend, so the crossover points are visible.
+
+Usage (from the project root):
+
+    python src/knn_benchmark.py --sizes 10000 100000 1000000 --batches 1 16 256 4096
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+from config import DEFAULT_N_NEIGHBORS, FEATURE_COLUMNS, RANDOM_STATE
+from models import BruteForceIndex
+
+
+def _time_queries(search, queries: np.ndarray, k: int, min_seconds: float) -> float:
+    """Milliseconds per query, repeating the batch until min_seconds elapse."""
+    search(queries[:1], k)  # warm-up
+    n_calls = 0
+    start = time.perf_counter()
+    while True:
+        search(queries, k)
+        n_calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return 1000.0 * elapsed / (n_calls * len(queries))
+
+
+def run_benchmark(
+    sizes: List[int],
+    batches: List[int],
+    k: int = DEFAULT_N_NEIGHBORS,
+    n_features: int = len(FEATURE_COLUMNS),
+    min_seconds: float = 0.5,
+) -> List[Dict[str, object]]:
+    """Return one record per (n_rows, batch_size) with ms/query per backend."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    results: List[Dict[str, object]] = []
+
+    for n_rows in sizes:
+        X = rng.standard_normal((n_rows, n_features))
+
+        start = time.perf_counter()
+        knn = NearestNeighbors(n_neighbors=k, metric="euclidean", algorithm="auto").fit(X)
+        sklearn_build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        brute = BruteForceIndex.build(X)
+        brute_build_s = time.perf_counter() - start
+
+        for batch in batches:
+            queries = rng.standard_normal((batch, n_features))
+            sk_ms = _time_queries(
+                lambda q, kk: knn.kneighbors(q, n_neighbors=kk), queries, k, min_seconds
+            )
+            br_ms = _time_queries(brute.kneighbors, queries, k, min_seconds)
+            results.append(
+                {
+                    "n_rows": n_rows,
+                    "batch_size": batch,
+                    "sklearn_ms_per_query": sk_ms,
+                    "brute_ms_per_query": br_ms,
+                    "sklearn_build_s": sklearn_build_s,
+                    "brute_build_s": brute_build_s,
+                    "faster": "brute" if br_ms < sk_ms else "sklearn",
+                }
+            )
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 16, 256, 4096])
+    parser.add_argument("--k", type=int, default=DEFAULT_N_NEIGHBORS)
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    parser.add_argument("--json", help="Also write the results to this path")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.batches, k=args.k, min_seconds=args.min_seconds)
+
+    print(f"{'n_rows':>10} {'batch':>6} {'sklearn ms/q':>13} {'brute ms/q':>11} {'faster':>8}")
+    for r in results:
+        print(
+            f"{r['n_rows']:>10} {r['batch_size']:>6} "
+            f"{r['sklearn_ms_per_query']:>13.4f} {r['brute_ms_per_query']:>11.4f} "
+            f"{r['faster']:>8}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Load-test the JSON recommendation service (service.py).
+
+Opens ``--concurrency`` keep-alive connections. Each one sends requests back
+to back for ``--seconds``, mixing mood and seed-track requests
+(``--track-fraction``). Seed track names are fetched from the service's
+cluster sample endpoint first. Reports throughput, latency percentiles and
+how many requests each batched neighbor search served.
+
+Usage (from the project root, with the service running):
+
+    python src/load_test.py --concurrency 64 --seconds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import RANDOM_STATE, SERVICE_HOST, SERVICE_PORT
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection speaking JSON."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[int, Any]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            if key.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def _seed_tracks(conn: Connection, n: int) -> List[Dict[str, str]]:
+    """Track names (with artists) sampled from every cluster."""
+    status, summary = await conn.request("GET", "/clusters")
+    if status != 200:
+        raise RuntimeError(f"GET /clusters failed: {summary}")
+    labels = [c["mood_cluster"] for c in summary["clusters"]]
+    per_cluster = max(1, n // max(len(labels), 1))
+    seeds = []
+    for label in labels:
+        _, sample = await conn.request("GET", f"/clusters/{label}/sample?n={per_cluster}")
+        seeds += [{"track_name": t["track_name"], "artist": t["artists"]}
+                  for t in sample["tracks"]]
+    return seeds
+
+
+async def _client(
+    conn: Connection,
+    deadline: float,
+    rng: np.random.Generator,
+    seeds: List[Dict[str, str]],
+    track_fraction: float,
+    latencies: List[float],
+    errors: List[int],
+) -> None:
+    while time.perf_counter() < deadline:
+        if seeds and rng.random() < track_fraction:
+            path, payload = "/recommend/track", dict(seeds[rng.integers(len(seeds))], n=10)
+        else:
+            energy, valence, danceability = np.round(rng.random(3) * 20) / 20
+            path = "/recommend/mood"
+            payload = {"energy": energy, "valence": valence,
+                       "danceability": danceability, "n": 10}
+        start = time.perf_counter()
+        status, _ = await conn.request("POST", path, payload)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+
+
+async def run_load_test(
+    host: str,
+    port: int,
+    concurrency: int,
+    seconds: float,
+    track_fraction: float,
+    seed: int = RANDOM_STATE,
+) -> Dict[str, Any]:
+    """Drive the service and return throughput/latency statistics."""
+    control = Connection(host, port)
+    seeds = await _seed_tracks(control, 200) if track_fraction > 0 else []
+    _, before = await control.request("GET", "/health")
+
+    latencies: List[float] = []
+    errors: List[int] = []
+    conns = [Connection(host, port) for _ in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _client(conn, start + seconds, np.random.default_rng([seed, i]), seeds,
+                    track_fraction, latencies, errors)
+            for i, conn in enumerate(conns)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    _, after = await control.request("GET", "/health")
+    for conn in conns + [control]:
+        conn.close()
+
+    ms = 1000.0 * np.asarray(latencies)
+    batches = (after["track_batches"] - before["track_batches"]
+               + after["mood_batches"] - before["mood_batches"])
+    items = (after["track_items"] - before["track_items"]
+             + after["mood_items"] - before["mood_items"])
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "mean_batch_size": items / batches if batches else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--track-fraction", type=float, default=0.5,
+                        help="share of seed-track requests (the rest are mood)")
+    parser.add_argument("--json", help="Also write the results to this path")
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        run_load_test(args.host, args.port, args.concurrency, args.seconds,
+                      args.track_fraction)
+    )
+    for key, value in result.items():
+        print(f"{key:>16}: {value:.2f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,430 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Tuple
+import json
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
-from sklearn.cluster import KMeans
+from joblib import Parallel, delayed, parallel_config
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
 from sklearn.neighbors import NearestNeighbors
+from threadpoolctl import threadpool_limits
 
-from config import DEFAULT_N_CLUSTERS, DEFAULT_N_NEIGHBORS, RANDOM_STATE
+from config import (
+    BRUTE_FORCE_BLOCK_BYTES,
+    CLUSTER_TUNING_SAMPLE,
+    DEFAULT_CLUSTER_BACKEND,
+    DEFAULT_IVF_N_PROBE,
+    DEFAULT_KNN_BACKEND,
+    DEFAULT_N_CLUSTERS,
+    DEFAULT_N_NEIGHBORS,
+    DEFAULT_N_SHARDS,
+    IVF_TRAIN_POINTS_PER_LIST,
+    MINIBATCH_KMEANS_BATCH_SIZE,
+    RANDOM_STATE,
+)
+from profiling import stage, timed
+
+Clusterer = Union[KMeans, MiniBatchKMeans]
+
+
+def _squared_distances(queries: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Pairwise squared Euclidean distances, shape (n_queries, n_points)."""
+    d2 = (
+        np.einsum("ij,ij->i", queries, queries)[:, None]
+        - 2.0 * queries @ points.T
+        + np.einsum("ij,ij->i", points, points)[None, :]
+    )
+    # Guard against tiny negatives from floating-point cancellation.
+    return np.maximum(d2, 0.0)
+
+
+@dataclass
+class BruteForceIndex:
+    """
+    Exact nearest-neighbor search by blocked matrix multiplication.
+
+    With only a handful of features, tree indexes prune little and add
+    per-query overhead. This keeps the catalog as contiguous float32 with
+    precomputed squared norms, so a block of queries costs one GEMM
+    (``|q|^2 - 2 q.x + |x|^2``) plus an ``argpartition`` per row.
+    """
+    X: np.ndarray  # (n_rows, n_features) float32, C-contiguous
+    sq_norms: np.ndarray  # (n_rows,) float32, |x|^2 per row
+
+    @classmethod
+    def build(cls, X_scaled: np.ndarray) -> "BruteForceIndex":
+        X = np.ascontiguousarray(X_scaled, dtype=np.float32)
+        return cls(X=X, sq_norms=np.einsum("ij,ij->i", X, X))
+
+    def block_rows(self, block_bytes: int = BRUTE_FORCE_BLOCK_BYTES) -> int:
+        """Queries per block so a (block, n_rows) float32 matrix fits block_bytes."""
+        return max(1, block_bytes // (4 * max(1, len(self.X))))
+
+    def squared_distances(self, queries: np.ndarray) -> np.ndarray:
+        """Squared distances from float32 ``queries`` to every row, (n_queries, n_rows)."""
+        d2 = queries @ self.X.T
+        d2 *= -2.0
+        d2 += self.sq_norms[None, :]
+        d2 += np.einsum("ij,ij->i", queries, queries)[:, None]
+        return d2
+
+    def kneighbors(
+        self,
+        query_vectors: np.ndarray,
+        n_neighbors: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact ``NearestNeighbors.kneighbors`` equivalent.
+
+        Queries are processed in blocks sized so the (block, n_rows)
+        distance matrix stays under BRUTE_FORCE_BLOCK_BYTES.
+        """
+        Q = np.ascontiguousarray(np.atleast_2d(query_vectors), dtype=np.float32)
+        n_rows = len(self.X)
+        k = min(n_neighbors, n_rows)
+
+        distances = np.empty((len(Q), k))
+        indices = np.empty((len(Q), k), dtype=np.intp)
+        if k == 0:  # empty catalog (e.g. every track removed)
+            return distances, indices
+
+        block = self.block_rows()
+        for start in range(0, len(Q), block):
+            q = Q[start:start + block]
+            d2 = self.squared_distances(q)
+
+            if k < n_rows:
+                top = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(n_rows), (len(q), n_rows))
+            top_d2 = np.take_along_axis(d2, top, axis=1)
+            order = np.argsort(top_d2, axis=1, kind="stable")
+
+            indices[start:start + len(q)] = np.take_along_axis(top, order, axis=1)
+            # Clamp tiny negatives from cancellation before the square root.
+            distances[start:start + len(q)] = np.sqrt(
+                np.maximum(np.take_along_axis(top_d2, order, axis=1), 0.0)
+            )
+
+        return distances, indices
+
+
+@dataclass
+class IVFIndex:
+    """
+    Approximate nearest-neighbor index in the inverted-file (IVF) style.
+
+    A fine-grained KMeans (``n_lists`` centroids, independent of the mood
+    clusters) acts as a coarse quantizer. Each row is stored in the list of
+    its nearest centroid; a query scans only the ``n_probe`` lists whose
+    centroids are closest to it and ranks those rows exactly.
+    """
+    centroids: np.ndarray  # (n_lists, n_features)
+    list_offsets: np.ndarray  # (n_lists + 1,) start of each list in list_rows
+    list_rows: np.ndarray  # catalog row ids, grouped by list
+    X_lists: np.ndarray  # X_scaled rows in list_rows order (contiguous per list)
+    n_probe: int = DEFAULT_IVF_N_PROBE
+
+    @classmethod
+    def build(
+        cls,
+        X_scaled: np.ndarray,
+        n_lists: int,
+        n_probe: int = DEFAULT_IVF_N_PROBE,
+    ) -> "IVFIndex":
+        """
+        Train the coarse quantizer and bucket every row into its list.
+
+        The quantizer is trained on at most IVF_TRAIN_POINTS_PER_LIST rows
+        per list, which is plenty for centroids and keeps build time flat.
+        """
+        n_rows = len(X_scaled)
+        n_lists = max(1, min(n_lists, n_rows))
+
+        n_train = min(n_rows, n_lists * IVF_TRAIN_POINTS_PER_LIST)
+        rng = np.random.default_rng(RANDOM_STATE)
+        if n_train < n_rows:
+            train_rows = rng.choice(n_rows, size=n_train, replace=False)
+        else:
+            train_rows = slice(None)
+
+        quantizer = KMeans(n_clusters=n_lists, random_state=RANDOM_STATE, n_init=1)
+        quantizer.fit(X_scaled[train_rows])
+        assignments = quantizer.predict(X_scaled)
+
+        list_rows = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        return cls(
+            centroids=quantizer.cluster_centers_,
+            list_offsets=list_offsets,
+            list_rows=list_rows,
+            X_lists=np.ascontiguousarray(X_scaled[list_rows]),
+            n_probe=n_probe,
+        )
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def kneighbors(
+        self,
+        query_vectors: np.ndarray,
+        n_neighbors: int,
+        n_probe: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate ``NearestNeighbors.kneighbors`` over the probed lists.
+
+        If the ``n_probe`` closest lists hold fewer than ``n_neighbors`` rows,
+        further lists are probed until there are enough candidates, so every
+        query always gets ``n_neighbors`` results.
+        """
+        query_vectors = np.atleast_2d(query_vectors)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        k = min(n_neighbors, len(self.list_rows))
+
+        list_sizes = np.diff(self.list_offsets)
+        list_order = np.argsort(_squared_distances(query_vectors, self.centroids), axis=1)
+
+        distances = np.empty((len(query_vectors), k))
+        indices = np.empty((len(query_vectors), k), dtype=np.intp)
+
+        for qi, query in enumerate(query_vectors):
+            order = list_order[qi]
+            covered = np.cumsum(list_sizes[order])
+            n_scan = max(n_probe, int(np.searchsorted(covered, k)) + 1)
+            probed = order[:n_scan]
+
+            starts = self.list_offsets[probed]
+            ends = self.list_offsets[probed + 1]
+            cand = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+
+            diff = self.X_lists[cand] - query
+            d2 = np.einsum("ij,ij->i", diff, diff)
+            if len(cand) > k:
+                top = np.argpartition(d2, k - 1)[:k]
+            else:
+                top = np.arange(len(cand))
+            top = top[np.argsort(d2[top], kind="stable")]
+
+            distances[qi] = np.sqrt(d2[top])
+            indices[qi] = self.list_rows[cand[top]]
+
+        return distances, indices
+
+
+# Per-process view of the shared catalog, set by _attach_shared_catalog in
+# ShardedIndex workers.
+_shard_state: Dict[str, Any] = {}
+
+
+def _attach_shared_catalog(name: str, n_rows: int, n_features: int) -> None:
+    """Worker initializer: map the shared catalog and pin BLAS to one thread."""
+    # Spawned workers share the parent's resource tracker, which unlinks the
+    # segment if the parent dies without calling _release_shards.
+    shm = shared_memory.SharedMemory(name=name)
+    X = np.ndarray((n_rows, n_features), dtype=np.float32, buffer=shm.buf)
+    sq_norms = np.ndarray((n_rows,), dtype=np.float32, buffer=shm.buf, offset=X.nbytes)
+    _shard_state.update(shm=shm, X=X, sq_norms=sq_norms)
+    threadpool_limits(limits=1)
+
+
+def _search_shard(
+    start: int,
+    end: int,
+    query_vectors: np.ndarray,
+    n_neighbors: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-k over catalog rows ``start:end``, with global row ids."""
+    shard = BruteForceIndex(
+        X=_shard_state["X"][start:end],
+        sq_norms=_shard_state["sq_norms"][start:end],
+    )
+    distances, indices = shard.kneighbors(query_vectors, n_neighbors=n_neighbors)
+    return distances, indices + start
+
+
+def _release_shards(pool: ProcessPoolExecutor, shm: shared_memory.SharedMemory) -> None:
+    pool.shutdown(wait=True, cancel_futures=True)
+    shm.close()
+    shm.unlink()
+
+
+@dataclass
+class ShardedIndex:
+    """
+    Exact search split across worker processes over one shared-memory catalog.
+
+    The float32 catalog and its squared norms are copied once into a
+    ``multiprocessing.shared_memory`` segment that every worker maps. Once
+    the segment exists the parent drops its own copy (``X`` becomes None),
+    so the catalog is held once in total. Each query batch is sent to all
+    ``n_shards`` contiguous row ranges in parallel; every worker returns
+    its shard's top-k (BruteForceIndex, single-threaded BLAS) and the
+    parent merges them. Workers start on the first query (once, even when
+    several threads query at the same time); ``close`` copies the catalog
+    back out so it can restart, and pickling keeps only the catalog.
+    """
+    X: Optional[np.ndarray]  # (n_rows, n_features) float32; None while shared
+    n_shards: int
+    shape: Tuple[int, int] = field(init=False)
+    _pool: Optional[ProcessPoolExecutor] = field(default=None, init=False, repr=False)
+    _bounds: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _shm: Optional[shared_memory.SharedMemory] = field(default=None, init=False, repr=False)
+    _finalizer: Optional[weakref.finalize] = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.shape = tuple(self.X.shape)
+
+    @classmethod
+    def build(
+        cls,
+        X_scaled: np.ndarray,
+        n_shards: Optional[int] = DEFAULT_N_SHARDS,
+    ) -> "ShardedIndex":
+        """Wrap X_scaled; ``n_shards=None`` means one shard per CPU core."""
+        n_shards = n_shards or os.cpu_count() or 1
+        n_shards = max(1, min(n_shards, len(X_scaled)))
+        return cls(X=np.asarray(X_scaled, dtype=np.float32), n_shards=n_shards)
+
+    @property
+    def n_rows(self) -> int:
+        return self.shape[0]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"X": self._catalog(), "n_shards": self.n_shards}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(X=state["X"], n_shards=state["n_shards"])
+
+    def _catalog(self) -> np.ndarray:
+        """The catalog as a private array (a copy of the segment while shared)."""
+        if self.X is not None:
+            return self.X
+        # The temporary view is dropped before returning, so nothing keeps
+        # the segment's buffer exported when it is closed.
+        return np.array(np.ndarray(self.shape, dtype=np.float32, buffer=self._shm.buf))
+
+    def _start(self) -> None:
+        n_rows, n_features = self.shape
+        shm = shared_memory.SharedMemory(create=True, size=max(1, 4 * n_rows * (n_features + 1)))
+        X = np.ndarray((n_rows, n_features), dtype=np.float32, buffer=shm.buf)
+        X[:] = self.X
+        sq_norms = np.ndarray((n_rows,), dtype=np.float32, buffer=shm.buf, offset=X.nbytes)
+        sq_norms[:] = np.einsum("ij,ij->i", X, X)
+        del X, sq_norms  # views into shm.buf must not outlive shm.close()
+
+        # "spawn": the serving process may be multi-threaded (Streamlit), and
+        # forking a threaded process is unsafe.
+        pool = ProcessPoolExecutor(
+            max_workers=self.n_shards,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_shared_catalog,
+            initargs=(shm.name, n_rows, n_features),
+        )
+        self._shm = shm
+        self.X = None
+        self._bounds = np.linspace(0, n_rows, self.n_shards + 1).astype(int)
+        self._finalizer = weakref.finalize(self, _release_shards, pool, shm)
+        # Published last: kneighbors reads _pool without the lock.
+        self._pool = pool
+
+    def close(self) -> None:
+        """Stop the workers and free the shared segment (restarted on demand)."""
+        with self._lock:
+            if self._finalizer is not None:
+                self.X = self._catalog()
+                self._finalizer()
+            self._pool = None
+            self._shm = None
+            self._finalizer = None
+
+    def kneighbors(
+        self,
+        query_vectors: np.ndarray,
+        n_neighbors: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact ``NearestNeighbors.kneighbors`` equivalent, merged across shards."""
+        pool = self._pool
+        if pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._start()
+                pool = self._pool
+        Q = np.ascontiguousarray(np.atleast_2d(query_vectors), dtype=np.float32)
+        k = min(n_neighbors, self.n_rows)
+
+        futures = [
+            pool.submit(_search_shard, int(start), int(end), Q, k)
+            for start, end in zip(self._bounds[:-1], self._bounds[1:])
+            if end > start
+        ]
+        parts = [f.result() for f in futures]
+        distances = np.concatenate([d for d, _ in parts], axis=1)
+        indices = np.concatenate([i for _, i in parts], axis=1)
+
+        # Shards are in row order, so a stable sort keeps ties by row id.
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return (
+            np.take_along_axis(distances, order, axis=1),
+            np.take_along_axis(indices, order, axis=1),
+        )
+
+
+def fit_clusterer(
+    X_scaled: np.ndarray,
+    n_clusters: int,
+    backend: str = DEFAULT_CLUSTER_BACKEND,
+) -> Clusterer:
+    """
+    Fit the mood clustering model.
+
+    ``backend`` is "kmeans" (full-batch KMeans, n_init=10) or "minibatch"
+    (MiniBatchKMeans, which touches only MINIBATCH_KMEANS_BATCH_SIZE rows per
+    step and scales to large catalogs at a small cost in inertia).
+    """
+    if backend == "kmeans":
+        model: Clusterer = KMeans(
+            n_clusters=n_clusters,
+            random_state=RANDOM_STATE,
+            n_init=10,
+        )
+    elif backend == "minibatch":
+        model = MiniBatchKMeans(
+            n_clusters=n_clusters,
+            random_state=RANDOM_STATE,
+            batch_size=MINIBATCH_KMEANS_BATCH_SIZE,
+            n_init=3,
+        )
+    else:
+        raise ValueError(f"Unknown clustering backend: {backend!r}")
+    return model.fit(X_scaled)
 
 
 @dataclass
 class VibeModels:
-    """Wrapper for fitted KMeans and NearestNeighbors models."""
-    kmeans: KMeans
-    knn: NearestNeighbors
+    """Wrapper for fitted KMeans and nearest-neighbor search models."""
+    kmeans: Clusterer  # KMeans or MiniBatchKMeans (see fit_clusterer)
+    knn: Optional[NearestNeighbors]  # None when fitted with backend="brute"
+    ivf: Optional[IVFIndex] = None  # optional approximate index for queries
+    brute: Optional[BruteForceIndex] = None  # exact GEMM search (backend="brute")
+    sharded: Optional[ShardedIndex] = None  # multi-process search (backend="sharded")
+    delta: Optional[BruteForceIndex] = None  # rows added since the last (re)index
+    removed: Optional[np.ndarray] = None  # tombstone flag per row (main + delta)
+    n_removed: int = 0
 
     @classmethod
     def fit(
@@ -22,25 +432,122 @@ class VibeModels:
         X_scaled: np.ndarray,
         n_clusters: int = DEFAULT_N_CLUSTERS,
         n_neighbors: int = DEFAULT_N_NEIGHBORS,
+        ivf_lists: Optional[int] = None,
+        ivf_n_probe: int = DEFAULT_IVF_N_PROBE,
+        backend: str = DEFAULT_KNN_BACKEND,
+        cluster_backend: str = DEFAULT_CLUSTER_BACKEND,
+        n_shards: Optional[int] = DEFAULT_N_SHARDS,
     ) -> "VibeModels":
-        """Fit KMeans and NearestNeighbors on the scaled feature matrix."""
+        """
+        Fit KMeans and the nearest-neighbor search on the scaled feature matrix.
+
+        ``backend`` selects the exact search: "sklearn" (NearestNeighbors with
+        algorithm="auto"), "brute" (BruteForceIndex) or "sharded"
+        (ShardedIndex over ``n_shards`` worker processes). If ``ivf_lists`` is
+        given, also build an IVFIndex with that many lists; queries then go
+        through it instead of the exact index. ``cluster_backend`` selects
+        the clustering model (see fit_clusterer).
+        """
+        if backend not in ("sklearn", "brute", "sharded"):
+            raise ValueError(f"Unknown nearest-neighbor backend: {backend!r}")
+
         # K-means for mood clusters
-        kmeans = KMeans(
-            n_clusters=n_clusters,
-            random_state=RANDOM_STATE,
-            n_init=10,
-        )
-        kmeans.fit(X_scaled)
+        with stage("models.fit_clusters"):
+            kmeans = fit_clusterer(X_scaled, n_clusters, cluster_backend)
 
-        # NearestNeighbors for similarity search
-        knn = NearestNeighbors(
-            n_neighbors=min(n_neighbors, len(X_scaled)),
-            metric="euclidean",
-            algorithm="auto",
+        # Exact similarity search
+        knn = None
+        brute = None
+        sharded = None
+        with stage("models.fit_index"):
+            if backend == "sklearn":
+                knn = NearestNeighbors(
+                    n_neighbors=min(n_neighbors, len(X_scaled)),
+                    metric="euclidean",
+                    algorithm="auto",
+                )
+                knn.fit(X_scaled)
+            elif backend == "brute":
+                brute = BruteForceIndex.build(X_scaled)
+            else:
+                sharded = ShardedIndex.build(X_scaled, n_shards=n_shards)
+
+        ivf = None
+        if ivf_lists is not None:
+            with stage("models.fit_ivf"):
+                ivf = IVFIndex.build(X_scaled, n_lists=ivf_lists, n_probe=ivf_n_probe)
+
+        return cls(
+            kmeans=kmeans,
+            knn=knn,
+            ivf=ivf,
+            brute=brute,
+            sharded=sharded,
         )
-        knn.fit(X_scaled)
 
-        return cls(kmeans=kmeans, knn=knn)
+    @property
+    def n_indexed(self) -> int:
+        """Number of catalog rows in the main (exact) search index."""
+        if self.brute is not None:
+            return len(self.brute.X)
+        if self.sharded is not None:
+            return self.sharded.n_rows
+        return int(self.knn.n_samples_fit_)
+
+    @property
+    def n_delta(self) -> int:
+        """Number of rows appended to the delta index since the last reindex."""
+        return 0 if self.delta is None else len(self.delta.X)
+
+    @property
+    def n_rows(self) -> int:
+        """Number of live (searchable) catalog rows."""
+        return self.n_indexed + self.n_delta - self.n_removed
+
+    def add_rows(self, X_new: np.ndarray) -> None:
+        """
+        Append rows to the delta index; they get ids after all existing rows.
+
+        The delta is a small BruteForceIndex searched alongside the main
+        index, so adding rows never refits the main index.
+        """
+        X_delta = X_new if self.delta is None else np.concatenate([self.delta.X, X_new])
+        self.delta = BruteForceIndex.build(X_delta)
+        if self.removed is not None:
+            self.removed = np.concatenate([self.removed, np.zeros(len(X_new), dtype=bool)])
+
+    def remove_rows(self, rows: np.ndarray) -> None:
+        """Tombstone rows so searches skip them until the next reindex."""
+        if self.removed is None:
+            self.removed = np.zeros(self.n_indexed + self.n_delta, dtype=bool)
+        elif not self.removed.flags.writeable:
+            self.removed = self.removed.copy()
+        self.removed[rows] = True
+        self.n_removed = int(np.count_nonzero(self.removed))
+
+    def reindex(self, X_scaled: np.ndarray) -> None:
+        """
+        Rebuild the search indexes over ``X_scaled`` (the compacted catalog).
+
+        Folds the delta into the main index and forgets tombstones. The
+        clustering model is kept; IVF keeps its list count and n_probe.
+        """
+        if self.brute is not None:
+            self.brute = BruteForceIndex.build(X_scaled)
+        elif self.sharded is not None:
+            self.sharded.close()
+            self.sharded = ShardedIndex.build(X_scaled, n_shards=self.sharded.n_shards)
+        else:
+            self.knn = NearestNeighbors(
+                n_neighbors=min(self.knn.n_neighbors, len(X_scaled)),
+                metric="euclidean",
+                algorithm="auto",
+            ).fit(X_scaled)
+        if self.ivf is not None:
+            self.ivf = IVFIndex.build(X_scaled, n_lists=self.ivf.n_lists, n_probe=self.ivf.n_probe)
+        self.delta = None
+        self.removed = None
+        self.n_removed = 0
 
     def assign_clusters(self, X_scaled: np.ndarray) -> np.ndarray:
         """Assign cluster labels for each row in X_scaled."""
@@ -62,7 +569,7 @@ class VibeModels:
         query_vector : np.ndarray
             Shape (n_features,) or (1, n_features).
         n_neighbors : int
-            Number of neighbors to request (capped by fitted knn.n_neighbors).
+            Number of neighbors to request (capped only by the catalog size).
 
         Returns
         -------
@@ -71,9 +578,210 @@ class VibeModels:
         indices : np.ndarray
             1D array of neighbor indices.
         """
-        if query_vector.ndim == 1:
-            query_vector = query_vector.reshape(1, -1)
-
-        k = min(n_neighbors, self.knn.n_neighbors)
-        distances, indices = self.knn.kneighbors(query_vector, n_neighbors=k)
+        distances, indices = self.query_neighbors_batch(query_vector, n_neighbors)
         return distances[0], indices[0]
+
+    @timed("models.query")
+    def query_neighbors_batch(
+        self,
+        query_vectors: np.ndarray,
+        n_neighbors: int,
+        exact: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Query nearest neighbors for many query vectors in one call.
+
+        Parameters
+        ----------
+        query_vectors : np.ndarray
+            Shape (n_queries, n_features); a single 1D vector is also accepted.
+        n_neighbors : int
+            Number of neighbors per query (capped only by the catalog size).
+        exact : bool
+            Bypass the IVF index (if any) and use the exact search.
+
+        Returns
+        -------
+        distances, indices : np.ndarray
+            Arrays of shape (n_queries, k), each row sorted by distance.
+        """
+        query_vectors = np.atleast_2d(query_vectors)
+        k = min(n_neighbors, self.n_rows)
+        if self.delta is None and self.removed is None:
+            return self._query_main(query_vectors, k, exact)
+
+        # Over-fetch by the tombstone count so k live rows survive filtering,
+        # then merge with the delta index.
+        n_main = self.n_indexed
+        removed = (
+            np.zeros(n_main + self.n_delta, dtype=bool) if self.removed is None else self.removed
+        )
+        k_main = min(k + int(np.count_nonzero(removed[:n_main])), n_main)
+        distances, indices = self._query_main(query_vectors, k_main, exact)
+        if self.delta is not None:
+            k_delta = min(k + int(np.count_nonzero(removed[n_main:])), self.n_delta)
+            delta_dist, delta_idx = self.delta.kneighbors(query_vectors, n_neighbors=k_delta)
+            distances = np.concatenate([distances, delta_dist], axis=1)
+            indices = np.concatenate([indices, delta_idx + n_main], axis=1)
+
+        distances = np.where(removed[indices], np.inf, distances)
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return (
+            np.take_along_axis(distances, order, axis=1),
+            np.take_along_axis(indices, order, axis=1),
+        )
+
+    def _query_main(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        exact: bool,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """kneighbors against the main index (IVF unless ``exact``)."""
+        if self.ivf is not None and not exact:
+            return self.ivf.kneighbors(query_vectors, n_neighbors=k)
+        if self.brute is not None:
+            return self.brute.kneighbors(query_vectors, n_neighbors=k)
+        if self.sharded is not None:
+            return self.sharded.kneighbors(query_vectors, n_neighbors=k)
+        return self.knn.kneighbors(query_vectors, n_neighbors=k)
+
+
+def ivf_recall_report(
+    models: VibeModels,
+    query_vectors: np.ndarray,
+    n_neighbors: int = DEFAULT_N_NEIGHBORS,
+    n_probes: Sequence[int] = (1, 2, 4, 8, 16, 32),
+) -> List[Dict[str, object]]:
+    """
+    Measure recall@k and latency of the IVF index against the exact index.
+
+    Returns one record per setting: the exact baseline first (recall 1.0),
+    then one per ``n_probe``, ending with a full probe of every list,
+    whose recall must be 1.0. ``ms_per_query`` is wall time of a single
+    batched call divided by the number of queries.
+    """
+    if models.ivf is None:
+        raise ValueError("models has no IVF index; fit with ivf_lists=...")
+
+    query_vectors = np.atleast_2d(query_vectors)
+    n_queries = len(query_vectors)
+
+    start = time.perf_counter()
+    exact_dist, _ = models.query_neighbors_batch(query_vectors, n_neighbors, exact=True)
+    exact_s = time.perf_counter() - start
+    k = exact_dist.shape[1]
+
+    report: List[Dict[str, object]] = [
+        {
+            "index": "exact",
+            "n_probe": None,
+            "recall": 1.0,
+            "ms_per_query": 1000.0 * exact_s / n_queries,
+        }
+    ]
+
+    n_lists = models.ivf.n_lists
+    probes = [p for p in n_probes if p < n_lists] + [n_lists]
+    for n_probe in probes:
+        start = time.perf_counter()
+        approx_dist, _ = models.ivf.kneighbors(query_vectors, k, n_probe=n_probe)
+        approx_s = time.perf_counter() - start
+
+        # Count by distance rather than row id: duplicate tracks share feature
+        # vectors, and swapping one tied copy for another is not a miss. The
+        # relative tolerance absorbs float32 rounding between the two paths.
+        kth = exact_dist[:, -1:]
+        within = (approx_dist <= kth) | np.isclose(approx_dist, kth, rtol=1e-5, atol=0.0)
+        hits = int(np.sum(within))
+        report.append(
+            {
+                "index": "ivf",
+                "n_probe": n_probe,
+                "recall": hits / (n_queries * k),
+                "ms_per_query": 1000.0 * approx_s / n_queries,
+            }
+        )
+
+    return report
+
+
+def _evaluate_k(
+    X_scaled: np.ndarray,
+    k: int,
+    backend: str,
+    sample_size: int,
+) -> Dict[str, object]:
+    """Fit one clustering and score it (run in a worker by cluster_tuning_report)."""
+    start = time.perf_counter()
+    model = fit_clusterer(X_scaled, k, backend)
+    fit_s = time.perf_counter() - start
+
+    silhouette = silhouette_score(
+        X_scaled,
+        model.labels_,
+        sample_size=min(sample_size, len(X_scaled)),
+        random_state=RANDOM_STATE,
+    )
+    return {
+        "k": k,
+        "inertia": float(model.inertia_),
+        "silhouette": float(silhouette),
+        "fit_seconds": fit_s,
+    }
+
+
+def cluster_tuning_report(
+    X_scaled: np.ndarray,
+    k_values: Sequence[int],
+    backend: str = DEFAULT_CLUSTER_BACKEND,
+    sample_size: int = CLUSTER_TUNING_SAMPLE,
+    n_jobs: int = -1,
+) -> Dict[str, object]:
+    """
+    Evaluate clusterings for each k in ``k_values`` in parallel.
+
+    Each k is fitted in its own joblib worker (X_scaled is shared via
+    memory mapping) and scored by inertia and a silhouette score over
+    ``sample_size`` sampled rows. Workers are limited to one BLAS/OpenMP
+    thread each, since the fits already use every core between them.
+    ``recommended_k`` is the k with the best silhouette, the smaller k on
+    ties.
+    """
+    with parallel_config(backend="loky", inner_max_num_threads=1):
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluate_k)(X_scaled, int(k), backend, sample_size)
+            for k in sorted(set(k_values))
+        )
+    best = max(results, key=lambda r: (r["silhouette"], -r["k"]))
+    return {
+        "backend": backend,
+        "n_rows": int(len(X_scaled)),
+        "sample_size": int(min(sample_size, len(X_scaled))),
+        "results": results,
+        "recommended_k": best["k"],
+    }
+
+
+def read_recommended_k(
+    report_path: str,
+    source_checksum: Optional[str] = None,
+    dedupe: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Recommended k from a report written by tune_clusters.py.
+
+    Returns None if there is no report, it was computed from a different
+    source than ``source_checksum`` (when given), or the catalog was deduped
+    differently (``dedupe``, None for no dedupe), since collapsing duplicate
+    rows changes the points being clustered.
+    """
+    if not os.path.exists(report_path):
+        return None
+    with open(report_path, "r", encoding="utf-8") as fh:
+        report = json.load(fh)
+    if source_checksum is not None and report.get("source_checksum") != source_checksum:
+        return None
+    if report.get("dedupe") != dedupe:
+        return None
+    return int(report["recommended_k"])
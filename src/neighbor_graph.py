@@ -0,0 +1,281 @@
+"""Precomputed top-k neighbor graph over the whole catalog.
+
+For every row, the graph stores the k closest *distinct* tracks (by
+duplicate-group id, excluding the row's own track) as memory-mapped arrays,
+so a seed-track recommendation is a single row read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from config import BRUTE_FORCE_BLOCK_BYTES
+from indexes import first_unique_positions
+from models import BruteForceIndex
+from snapshot import save_array
+
+GRAPH_ROWS_FILE: str = "neighbor_graph_rows.npy"
+GRAPH_DISTANCES_FILE: str = "neighbor_graph_distances.npy"
+GRAPH_PROGRESS_FILE: str = "neighbor_graph_blocks_done.npy"
+GRAPH_META_FILE: str = "neighbor_graph.json"
+
+# Candidates examined per row before deduping, as a multiple of k. Rows that
+# still come up short fall back to a full sort of their distance row.
+_CANDIDATE_FACTOR: int = 4
+
+# Rows of X_scaled hashed at a time by data_fingerprint
+_FINGERPRINT_BLOCK_ROWS: int = 1 << 16
+
+
+def data_fingerprint(X_scaled: np.ndarray, group_ids: np.ndarray) -> str:
+    """
+    SHA-256 of the feature matrix and duplicate-group ids a graph is built over.
+
+    A graph is only valid for the exact rows it was computed from, so this,
+    rather than the source CSV's checksum (which in-memory builds may not
+    have), identifies it on reuse and on open.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{X_scaled.dtype.str}{X_scaled.shape}".encode())
+    for start in range(0, len(X_scaled), _FINGERPRINT_BLOCK_ROWS):
+        block = X_scaled[start:start + _FINGERPRINT_BLOCK_ROWS]
+        digest.update(np.ascontiguousarray(block).tobytes())
+    digest.update(np.ascontiguousarray(group_ids, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+@dataclass
+class NeighborGraph:
+    """Top-k deduplicated neighbors per catalog row."""
+    rows: np.ndarray  # (n_rows, k) int32 neighbor row ids, -1 pads short lists
+    distances: np.ndarray  # (n_rows, k) float32
+    fingerprint: Optional[str] = None  # data_fingerprint of the rows it covers
+
+    @property
+    def k(self) -> int:
+        return int(self.rows.shape[1])
+
+    def lookup(
+        self,
+        row: int,
+        n: int,
+        offset: int = 0,
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(rows, distances) for neighbors ``offset .. offset + n``; None past k."""
+        if offset + n > self.k:
+            return None
+        rows = self.rows[row, offset:offset + n]
+        found = rows >= 0
+        return rows[found], self.distances[row, offset:offset + n][found]
+
+    @classmethod
+    def open(
+        cls,
+        path: str,
+        fingerprint: Optional[str] = None,
+        n_rows: Optional[int] = None,
+    ) -> Optional["NeighborGraph"]:
+        """
+        Memory-map a completed graph in ``path``.
+
+        Returns None if there is none, it is unfinished, or (when given) it
+        was built over data other than ``fingerprint`` (see data_fingerprint)
+        or for a catalog with other than ``n_rows`` rows.
+        """
+        meta = _read_meta(path)
+        if meta is None or not meta.get("complete"):
+            return None
+        if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+            return None
+        if n_rows is not None and meta.get("n_rows") != n_rows:
+            return None
+        graph = cls(
+            rows=np.load(os.path.join(path, GRAPH_ROWS_FILE), mmap_mode="r"),
+            distances=np.load(os.path.join(path, GRAPH_DISTANCES_FILE), mmap_mode="r"),
+            fingerprint=meta.get("fingerprint"),
+        )
+        if n_rows is not None and len(graph.rows) != n_rows:
+            return None
+        return graph
+
+    def save(self, path: str) -> None:
+        """Write the graph into ``path`` unless it is already stored there."""
+        target = os.path.join(path, GRAPH_ROWS_FILE)
+        if (
+            isinstance(self.rows, np.memmap)
+            and os.path.exists(target)
+            and os.path.samefile(self.rows.filename, target)
+        ):
+            return
+        save_array(target, self.rows)
+        save_array(os.path.join(path, GRAPH_DISTANCES_FILE), self.distances)
+        _write_meta(
+            path,
+            {
+                "k": self.k,
+                "n_rows": int(len(self.rows)),
+                "fingerprint": self.fingerprint,
+                "complete": True,
+            },
+        )
+
+
+def _read_meta(path: str) -> Optional[dict]:
+    meta_path = os.path.join(path, GRAPH_META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _write_meta(path: str, meta: dict) -> None:
+    with open(os.path.join(path, GRAPH_META_FILE), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, indent=2)
+
+
+def _dedupe_block(
+    d2: np.ndarray,
+    cand: np.ndarray,
+    groups: np.ndarray,
+    own_groups: np.ndarray,
+    k: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Keep the first k distinct groups per row of a distance-sorted candidate block.
+
+    Returns (rows, d2, short) where ``short`` flags rows with fewer than k.
+    """
+    n_block, n_cand = cand.shape
+    cand_groups = groups[cand]
+    valid = cand_groups != own_groups[:, None]
+
+    local = np.repeat(np.arange(n_block), n_cand)
+    keys = local * (int(groups.max()) + 1) + cand_groups.ravel()
+    flat = np.flatnonzero(valid.ravel())
+    picked = flat[first_unique_positions(keys[flat])]
+
+    owner = local[picked]
+    rank = np.arange(len(picked)) - np.searchsorted(owner, owner)
+    take = rank < k
+
+    out_rows = np.full((n_block, k), -1, dtype=np.int32)
+    out_d2 = np.full((n_block, k), np.inf, dtype=np.float32)
+    out_rows[owner[take], rank[take]] = cand.ravel()[picked[take]]
+    out_d2[owner[take], rank[take]] = d2.ravel()[picked[take]]
+
+    short = np.bincount(owner, minlength=n_block) < k
+    return out_rows, out_d2, short
+
+
+def build_neighbor_graph(
+    X_scaled: np.ndarray,
+    group_ids: np.ndarray,
+    path: str,
+    k: int,
+    block_bytes: int = BRUTE_FORCE_BLOCK_BYTES,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> NeighborGraph:
+    """
+    Compute the graph into ``path`` with blocked exact search and bounded memory.
+
+    Rows are processed in blocks whose (block, n_rows) distance matrix fits
+    ``block_bytes``. Results go straight into memory-mapped .npy files and a
+    per-block done flag is flushed after each block, so an interrupted build
+    resumes where it stopped when called again with the same arguments.
+    A finished or partial graph in ``path`` is only reused if it was built
+    over the same data (see data_fingerprint).
+    ``progress(blocks_done, n_blocks)`` is called after every block.
+    """
+    os.makedirs(path, exist_ok=True)
+    index = BruteForceIndex.build(X_scaled)
+    n_rows = len(index.X)
+    block = index.block_rows(block_bytes)
+    n_blocks = -(-n_rows // block)
+
+    meta = {
+        "k": k,
+        "n_rows": n_rows,
+        "block_rows": block,
+        "fingerprint": data_fingerprint(X_scaled, group_ids),
+        "complete": False,
+    }
+    previous = _read_meta(path)
+    same_build = previous is not None and all(
+        previous.get(key) == value for key, value in meta.items() if key != "complete"
+    )
+    if same_build and previous.get("complete"):
+        return NeighborGraph.open(path)
+
+    resume = same_build and all(
+        os.path.exists(os.path.join(path, name))
+        for name in (GRAPH_ROWS_FILE, GRAPH_DISTANCES_FILE, GRAPH_PROGRESS_FILE)
+    )
+    mode = "r+" if resume else "w+"
+    if not resume:
+        # Unlink rather than truncate: a serving process may have the old
+        # graph memory-mapped and keeps reading its (now orphaned) inode.
+        for name in (GRAPH_ROWS_FILE, GRAPH_DISTANCES_FILE, GRAPH_PROGRESS_FILE):
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+        _write_meta(path, meta)
+
+    rows_out = np.lib.format.open_memmap(
+        os.path.join(path, GRAPH_ROWS_FILE), mode=mode, dtype=np.int32, shape=(n_rows, k)
+    )
+    dist_out = np.lib.format.open_memmap(
+        os.path.join(path, GRAPH_DISTANCES_FILE), mode=mode, dtype=np.float32, shape=(n_rows, k)
+    )
+    done = np.lib.format.open_memmap(
+        os.path.join(path, GRAPH_PROGRESS_FILE), mode=mode, dtype=bool, shape=(n_blocks,)
+    )
+
+    n_cand = min(n_rows, _CANDIDATE_FACTOR * k + 1)
+    for b in range(n_blocks):
+        if done[b]:
+            continue
+        start, end = b * block, min((b + 1) * block, n_rows)
+        d2 = np.maximum(index.squared_distances(index.X[start:end]), 0.0)
+
+        if n_cand < n_rows:
+            cand = np.argpartition(d2, n_cand - 1, axis=1)[:, :n_cand]
+        else:
+            cand = np.broadcast_to(np.arange(n_rows), d2.shape)
+        cand_d2 = np.take_along_axis(d2, cand, axis=1)
+        order = np.argsort(cand_d2, axis=1, kind="stable")
+        cand = np.take_along_axis(cand, order, axis=1)
+        cand_d2 = np.take_along_axis(cand_d2, order, axis=1)
+
+        own = group_ids[start:end]
+        block_rows, block_d2, short = _dedupe_block(cand_d2, cand, group_ids, own, k)
+
+        # Rows whose candidates were mostly copies of a few tracks: use the
+        # whole distance row (already in memory) instead.
+        if n_cand == n_rows:
+            short[:] = False
+        for i in np.flatnonzero(short):
+            full = np.argsort(d2[i], kind="stable")[None, :]
+            r, d, _ = _dedupe_block(d2[i][full], full, group_ids, own[i:i + 1], k)
+            block_rows[i], block_d2[i] = r[0], d[0]
+
+        rows_out[start:end] = block_rows
+        dist_out[start:end] = np.sqrt(block_d2)
+        rows_out.flush()
+        dist_out.flush()
+        done[b] = True
+        done.flush()
+
+        if progress is not None:
+            progress(int(done.sum()), n_blocks)
+
+    meta["complete"] = True
+    _write_meta(path, meta)
+    del rows_out, dist_out, done
+    os.remove(os.path.join(path, GRAPH_PROGRESS_FILE))
+
+    return NeighborGraph.open(path)
@@ -0,0 +1,544 @@
+"""Out-of-core serving for catalogs larger than RAM.
+
+An out-of-core catalog is a directory containing:
+
+- ``ooc.json``            row count, feature columns, scaler, shard offsets
+- ``X_scaled.npy``        float32 scaled features, memory-mapped and scanned
+                          block by block
+- ``group_keys.npy``      uint64 hash of (track_name, artists) per row, for
+                          deduping results without loading metadata
+- ``name_keys.npy``       sorted uint64 hashes of the lowercased track names,
+  ``name_rows.npy``       with the row id of each, for seed lookups by
+                          binary search
+- ``catalog_#####.pkl``   metadata shards, loaded by row id on demand
+
+Nothing proportional to the catalog size is held in memory: searches read
+``X_scaled`` in blocks sized by a fixed byte budget and only the metadata
+shards touched by a result are unpickled (and kept in a small LRU cache).
+The build sorts the name index externally: one sorted run per chunk is
+written to disk, and the runs are merged block by block.
+
+Usage (from the project root):
+
+    python src/out_of_core.py build data/spotify_tracks.csv data/ooc
+    python src/out_of_core.py bench data/ooc --batches 1 16 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from cache import LRUCache
+from config import (
+    FEATURE_COLUMNS,
+    ID_COL_ARTISTS,
+    ID_COL_TRACK_NAME,
+    INGEST_CHUNK_ROWS,
+    OUT_OF_CORE_BLOCK_BYTES,
+    OUT_OF_CORE_SHARD_CACHE,
+    RANDOM_STATE,
+)
+from indexes import first_unique_positions, normalize_key
+from preprocess import ID_COLUMNS, iter_clean_chunks
+from snapshot import (
+    atomic_output,
+    file_checksum,
+    save_array,
+    scaler_from_dict,
+    scaler_to_dict,
+)
+
+OOC_META_FILE: str = "ooc.json"
+OOC_X_FILE: str = "X_scaled.npy"
+OOC_GROUPS_FILE: str = "group_keys.npy"
+OOC_NAME_KEYS_FILE: str = "name_keys.npy"
+OOC_NAME_ROWS_FILE: str = "name_rows.npy"
+OOC_SHARD_FILE: str = "catalog_{:05d}.pkl"
+OOC_RUNS_DIR: str = "name_runs"  # sorted per-chunk runs, only during build
+OOC_RUN_KEYS_FILE: str = "keys_{:05d}.npy"
+OOC_RUN_ROWS_FILE: str = "rows_{:05d}.npy"
+
+# Initial candidate pool per query as a multiple of n; a query that is still
+# short of distinct tracks after deduping rescans with twice the pool.
+_CANDIDATE_FACTOR: int = 4
+
+
+def _group_keys(chunk: pd.DataFrame) -> np.ndarray:
+    """Hash of (track_name, artists) per row; equal pairs share a key."""
+    return pd.util.hash_pandas_object(
+        chunk[[ID_COL_TRACK_NAME, ID_COL_ARTISTS]], index=False
+    ).to_numpy(dtype=np.uint64)
+
+
+def _name_keys(names: pd.Series) -> np.ndarray:
+    """Hash of each lowercased track name; equal names (any case) share a key."""
+    lowered = names.astype(object).str.lower().to_numpy(dtype=object)
+    return pd.util.hash_array(lowered)
+
+
+def _merge_sorted_runs(
+    runs: List[Tuple[np.ndarray, np.ndarray]],
+    keys_out: np.ndarray,
+    rows_out: np.ndarray,
+    block_bytes: int,
+) -> None:
+    """
+    Merge (keys, rows) runs, each sorted by key, into ``keys_out``/``rows_out``.
+
+    Every round loads the next window of each run (sized so all windows fit
+    ``block_bytes``), emits every loaded entry with a key up to the smallest
+    window end, and advances past them. Entries left in any run are no
+    smaller, so the output is sorted by key; the run that set the bound
+    empties its window, so every round makes progress. Rows with equal keys
+    are not ordered.
+    """
+    window = max(1, block_bytes // (16 * max(len(runs), 1)))
+    pos = [0] * len(runs)
+    out = 0
+    while True:
+        windows = [
+            (i, keys[pos[i]:pos[i] + window], rows[pos[i]:pos[i] + window])
+            for i, (keys, rows) in enumerate(runs)
+            if pos[i] < len(keys)
+        ]
+        if not windows:
+            return
+        bound = min(keys[-1] for _, keys, _ in windows)
+        take_keys, take_rows = [], []
+        for i, keys, rows in windows:
+            m = int(np.searchsorted(keys, bound, side="right"))
+            take_keys.append(keys[:m])
+            take_rows.append(rows[:m])
+            pos[i] += m
+        keys = np.concatenate(take_keys)
+        order = np.argsort(keys, kind="stable")
+        end = out + len(keys)
+        keys_out[out:end] = keys[order]
+        rows_out[out:end] = np.concatenate(take_rows)[order]
+        out = end
+
+
+@dataclass
+class BlockScanIndex:
+    """
+    Exact Euclidean search by streaming a (memory-mapped) matrix in blocks.
+
+    Each block is copied to float32, scored against all queries with one
+    GEMM and merged into a running (n_queries, k) top-k. Peak memory is set
+    by ``block_bytes``, not by the number of rows.
+    """
+    X: np.ndarray  # (n_rows, n_features), typically np.memmap
+    block_bytes: int = OUT_OF_CORE_BLOCK_BYTES
+
+    def block_rows(self, n_queries: int) -> int:
+        """Rows per block so the block and its distance matrix fit the budget."""
+        # float32 block row + float32 distance and intp index per query.
+        per_row = 4 * self.X.shape[1] + 12 * n_queries
+        return max(1, self.block_bytes // per_row)
+
+    def _iter_blocks(self, step: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yield (first row id, float32 block) over X.
+
+        A float32 ``np.memmap`` is read with plain file reads into one reused
+        buffer rather than through the mapping, so scanned pages are not
+        charged to this process's resident set.
+        """
+        X = self.X
+        if not (isinstance(X, np.memmap) and X.dtype == np.float32 and X.flags.c_contiguous):
+            for start in range(0, len(X), step):
+                yield start, np.asarray(X[start:start + step], dtype=np.float32)
+            return
+
+        buf = np.empty((step, X.shape[1]), dtype=np.float32)
+        with open(X.filename, "rb", buffering=0) as fh:
+            fh.seek(X.offset)
+            for start in range(0, len(X), step):
+                rows = min(step, len(X) - start)
+                view = memoryview(buf[:rows]).cast("B")
+                # Raw reads may return short; an empty read means the file
+                # ends early, and the buffer would still hold the last block.
+                got = 0
+                while got < len(view):
+                    n_read = fh.readinto(view[got:])
+                    if not n_read:
+                        raise ValueError(
+                            f"{X.filename} is truncated: expected {len(view)} bytes "
+                            f"for rows {start}..{start + rows - 1}, read {got}"
+                        )
+                    got += n_read
+                yield start, buf[:rows]
+
+    def kneighbors(
+        self,
+        queries: np.ndarray,
+        k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(distances, indices), each (n_queries, k) and sorted by distance."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n_rows = len(self.X)
+        k = min(k, n_rows)
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+
+        best_d2 = np.full((len(queries), 0), np.inf, dtype=np.float32)
+        best_idx = np.empty((len(queries), 0), dtype=np.int64)
+        for start, block in self._iter_blocks(self.block_rows(len(queries))):
+            d2 = (
+                q_norms[:, None]
+                - 2.0 * (queries @ block.T)
+                + np.einsum("ij,ij->i", block, block)[None, :]
+            )
+            cand_d2 = np.concatenate([best_d2, d2], axis=1)
+            cand_idx = np.concatenate(
+                [best_idx, np.broadcast_to(np.arange(start, start + len(block)), d2.shape)],
+                axis=1,
+            )
+            if cand_d2.shape[1] > k:
+                keep = np.argpartition(cand_d2, k - 1, axis=1)[:, :k]
+                cand_d2 = np.take_along_axis(cand_d2, keep, axis=1)
+                cand_idx = np.take_along_axis(cand_idx, keep, axis=1)
+            best_d2, best_idx = cand_d2, cand_idx
+
+        order = np.argsort(best_d2, axis=1, kind="stable")
+        best_d2 = np.take_along_axis(best_d2, order, axis=1)
+        best_idx = np.take_along_axis(best_idx, order, axis=1)
+        return np.sqrt(np.maximum(best_d2, 0.0)), best_idx
+
+
+@dataclass
+class OutOfCoreRecommender:
+    """
+    Mood and seed-row recommendations served from an out-of-core catalog.
+
+    Use ``build`` to stream a CSV into the directory layout described in the
+    module docstring and ``open`` to serve from it.
+    """
+    path: str
+    n_rows: int
+    feature_columns: List[str]
+    scaler: StandardScaler
+    shard_offsets: np.ndarray  # first row id of each shard, plus n_rows
+    index: BlockScanIndex
+    group_keys: np.ndarray  # (n_rows,) uint64, memory-mapped
+    name_keys: Optional[np.ndarray] = None  # (n_rows,) sorted uint64, memory-mapped
+    name_rows: Optional[np.ndarray] = None  # (n_rows,) row id per name key
+    source_checksum: Optional[str] = None
+    shard_cache: LRUCache = field(
+        default_factory=lambda: LRUCache(OUT_OF_CORE_SHARD_CACHE)
+    )
+
+    @property
+    def feature_means(self) -> np.ndarray:
+        return np.asarray(self.scaler.mean_, dtype=float)
+
+    # ---------- build / open ----------
+
+    @classmethod
+    def build(
+        cls,
+        csv_path: str,
+        path: str,
+        feature_columns: Optional[List[str]] = None,
+        chunk_rows: int = INGEST_CHUNK_ROWS,
+        block_bytes: int = OUT_OF_CORE_BLOCK_BYTES,
+    ) -> "OutOfCoreRecommender":
+        """
+        Stream ``csv_path`` into an out-of-core catalog at ``path``.
+
+        Two passes over the CSV: the first fits the scaler with
+        ``partial_fit`` and counts rows, the second scales each chunk into a
+        preallocated memory-mapped matrix, writes one metadata shard per
+        chunk and one sorted run of the chunk's name keys. The runs are then
+        merged into the name index (see _merge_sorted_runs). Memory use is
+        bounded by ``chunk_rows`` and, for the merge, ``block_bytes``.
+        """
+        if feature_columns is None:
+            feature_columns = FEATURE_COLUMNS
+        os.makedirs(path, exist_ok=True)
+
+        scaler = StandardScaler()
+        n_rows = 0
+        for _, chunk in iter_clean_chunks(csv_path, feature_columns, chunk_rows, ID_COLUMNS):
+            if len(chunk):
+                scaler.partial_fit(chunk[feature_columns].to_numpy())
+                n_rows += len(chunk)
+
+        X_out = np.lib.format.open_memmap(
+            os.path.join(path, OOC_X_FILE),
+            mode="w+",
+            dtype=np.float32,
+            shape=(n_rows, len(feature_columns)),
+        )
+        groups_out = np.lib.format.open_memmap(
+            os.path.join(path, OOC_GROUPS_FILE), mode="w+", dtype=np.uint64, shape=(n_rows,)
+        )
+        runs_dir = os.path.join(path, OOC_RUNS_DIR)
+        os.makedirs(runs_dir, exist_ok=True)
+
+        offsets = [0]
+        for _, chunk in iter_clean_chunks(csv_path, feature_columns, chunk_rows, ID_COLUMNS):
+            if not len(chunk):
+                continue
+            start, end = offsets[-1], offsets[-1] + len(chunk)
+            X_out[start:end] = scaler.transform(chunk[feature_columns].to_numpy())
+            groups_out[start:end] = _group_keys(chunk)
+            keys = _name_keys(chunk[ID_COL_TRACK_NAME])
+            order = np.argsort(keys, kind="stable")
+            run = len(offsets) - 1
+            save_array(os.path.join(runs_dir, OOC_RUN_KEYS_FILE.format(run)), keys[order])
+            save_array(os.path.join(runs_dir, OOC_RUN_ROWS_FILE.format(run)), start + order)
+            shard_path = os.path.join(path, OOC_SHARD_FILE.format(len(offsets) - 1))
+            with atomic_output(shard_path) as tmp_path:
+                chunk.reset_index(drop=True).to_pickle(tmp_path)
+            offsets.append(end)
+
+        X_out.flush()
+        groups_out.flush()
+        del X_out, groups_out
+
+        runs = [
+            (
+                np.load(os.path.join(runs_dir, OOC_RUN_KEYS_FILE.format(run)), mmap_mode="r"),
+                np.load(os.path.join(runs_dir, OOC_RUN_ROWS_FILE.format(run)), mmap_mode="r"),
+            )
+            for run in range(len(offsets) - 1)
+        ]
+        keys_file = os.path.join(path, OOC_NAME_KEYS_FILE)
+        rows_file = os.path.join(path, OOC_NAME_ROWS_FILE)
+        with atomic_output(keys_file) as keys_path, atomic_output(rows_file) as rows_path:
+            keys_out = np.lib.format.open_memmap(
+                keys_path, mode="w+", dtype=np.uint64, shape=(n_rows,)
+            )
+            rows_out = np.lib.format.open_memmap(
+                rows_path, mode="w+", dtype=np.int64, shape=(n_rows,)
+            )
+            _merge_sorted_runs(runs, keys_out, rows_out, block_bytes)
+            keys_out.flush()
+            rows_out.flush()
+            del keys_out, rows_out
+        del runs
+        shutil.rmtree(runs_dir)
+
+        meta = {
+            "n_rows": n_rows,
+            "feature_columns": list(feature_columns),
+            "scaler": scaler_to_dict(scaler),
+            "shard_offsets": offsets,
+            "source_checksum": file_checksum(csv_path),
+            "name_index": True,
+        }
+        with atomic_output(os.path.join(path, OOC_META_FILE)) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(meta, fh, indent=2)
+
+        return cls.open(path)
+
+    @classmethod
+    def open(
+        cls,
+        path: str,
+        block_bytes: int = OUT_OF_CORE_BLOCK_BYTES,
+    ) -> "OutOfCoreRecommender":
+        """Memory-map an out-of-core catalog written by ``build``."""
+        with open(os.path.join(path, OOC_META_FILE), "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+
+        X = np.load(os.path.join(path, OOC_X_FILE), mmap_mode="r")
+        name_keys = name_rows = None
+        if meta.get("name_index"):
+            name_keys = np.load(os.path.join(path, OOC_NAME_KEYS_FILE), mmap_mode="r")
+            name_rows = np.load(os.path.join(path, OOC_NAME_ROWS_FILE), mmap_mode="r")
+        return cls(
+            path=path,
+            n_rows=int(meta["n_rows"]),
+            feature_columns=list(meta["feature_columns"]),
+            scaler=scaler_from_dict(meta["scaler"]),
+            shard_offsets=np.asarray(meta["shard_offsets"], dtype=np.int64),
+            index=BlockScanIndex(X=X, block_bytes=block_bytes),
+            group_keys=np.load(os.path.join(path, OOC_GROUPS_FILE), mmap_mode="r"),
+            name_keys=name_keys,
+            name_rows=name_rows,
+            source_checksum=meta.get("source_checksum"),
+        )
+
+    # ---------- metadata ----------
+
+    def _shard(self, shard: int) -> pd.DataFrame:
+        df = self.shard_cache.get(shard)
+        if df is None:
+            df = pd.read_pickle(os.path.join(self.path, OOC_SHARD_FILE.format(shard)))
+            self.shard_cache.put(shard, df)
+        return df
+
+    def _iter_shards(self) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """(first row id, shard dataframe) for every shard, bypassing the cache."""
+        for shard, start in enumerate(self.shard_offsets[:-1]):
+            path = os.path.join(self.path, OOC_SHARD_FILE.format(shard))
+            yield int(start), pd.read_pickle(path)
+
+    def rows(self, row_ids: np.ndarray) -> pd.DataFrame:
+        """Metadata for ``row_ids`` in the given order, indexed by row id."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        shards = np.searchsorted(self.shard_offsets, row_ids, side="right") - 1
+
+        parts = []
+        for shard in np.unique(shards):
+            mask = shards == shard
+            local = row_ids[mask] - self.shard_offsets[shard]
+            part = self._shard(int(shard)).iloc[local]
+            part.index = row_ids[mask]
+            parts.append(part)
+
+        if not parts:
+            return self._shard(0).iloc[:0]
+        return pd.concat(parts).loc[row_ids]
+
+    def find_track(self, track_name: str) -> np.ndarray:
+        """
+        Ascending row ids whose track name matches (case-insensitive).
+
+        Binary-searches the name index, then checks the candidates' names
+        through the shard cache (hash collisions). Catalogs built before
+        the name index existed fall back to scanning every shard.
+        """
+        key = normalize_key(track_name)
+        if self.name_keys is not None:
+            h = _name_keys(pd.Series([key]))[0]
+            lo = np.searchsorted(self.name_keys, h, side="left")
+            hi = np.searchsorted(self.name_keys, h, side="right")
+            candidates = np.sort(np.asarray(self.name_rows[lo:hi], dtype=np.int64))
+            if len(candidates) == 0:
+                return candidates
+            names = self.rows(candidates)[ID_COL_TRACK_NAME].astype(object).str.lower()
+            return candidates[(names == key).to_numpy()]
+
+        found = []
+        for start, df in self._iter_shards():
+            names = df[ID_COL_TRACK_NAME].astype(object).str.lower()
+            found.append(start + np.flatnonzero((names == key).to_numpy()))
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    # ---------- search ----------
+
+    def _search(
+        self,
+        query_vec: np.ndarray,
+        n: int,
+        exclude_row: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Top-n distinct tracks for one scaled query vector, with distances."""
+        skip = None
+        if exclude_row is not None:
+            skip = np.asarray([self.group_keys[exclude_row]])
+
+        pool = _CANDIDATE_FACTOR * n + 1
+        while True:
+            distances, indices = self.index.kneighbors(query_vec, pool)
+            distances, indices = distances[0], indices[0]
+            keep = first_unique_positions(self.group_keys[indices], skip=skip)[:n]
+            if len(keep) == n or pool >= self.n_rows:
+                break
+            pool = min(2 * pool, self.n_rows)
+
+        out = self.rows(indices[keep])
+        out["distance"] = distances[keep]
+        return out
+
+    def recommend_by_mood(
+        self,
+        energy: float,
+        valence: float,
+        danceability: float,
+        n: int = 10,
+    ) -> pd.DataFrame:
+        """Recommend tracks near a mood point (other features at dataset means)."""
+        raw = self.feature_means.copy()
+        for col, value in (("energy", energy), ("valence", valence), ("danceability", danceability)):
+            if col in self.feature_columns:
+                raw[self.feature_columns.index(col)] = value
+        query_vec = self.scaler.transform(raw.reshape(1, -1))
+        return self._search(query_vec, n)
+
+    def recommend_by_row(self, row: int, n: int = 10) -> pd.DataFrame:
+        """Recommend tracks similar to catalog row ``row`` (its own copies excluded)."""
+        query_vec = np.asarray(self.index.X[row], dtype=np.float32)
+        return self._search(query_vec, n, exclude_row=row)
+
+
+# ---------- command line ----------
+
+def _peak_rss_mib() -> float:
+    """Peak resident set size of this process in MiB (Linux reports KiB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_throughput(
+    rec: OutOfCoreRecommender,
+    batches: List[int],
+    k: int,
+    min_seconds: float = 1.0,
+) -> List[Dict[str, float]]:
+    """Queries/second and scan bandwidth for each batch size."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    matrix_mib = rec.index.X.nbytes / (1 << 20)
+    results = []
+    for batch in batches:
+        queries = rng.standard_normal((batch, len(rec.feature_columns))).astype(np.float32)
+        n_calls = 0
+        start = time.perf_counter()
+        while True:
+            rec.index.kneighbors(queries, k)
+            n_calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+        results.append(
+            {
+                "batch_size": batch,
+                "queries_per_s": round(n_calls * batch / elapsed, 2),
+                "scan_mib_per_s": round(n_calls * matrix_mib / elapsed, 1),
+                "peak_rss_mib": round(_peak_rss_mib(), 1),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="stream a CSV into an out-of-core catalog")
+    build.add_argument("csv_path")
+    build.add_argument("path")
+    build.add_argument("--chunk-rows", type=int, default=INGEST_CHUNK_ROWS)
+
+    bench = sub.add_parser("bench", help="measure block-scan throughput")
+    bench.add_argument("path")
+    bench.add_argument("--batches", type=int, nargs="+", default=[1, 16, 256])
+    bench.add_argument("--k", type=int, default=50)
+    bench.add_argument("--block-mib", type=int, default=OUT_OF_CORE_BLOCK_BYTES >> 20)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        rec = OutOfCoreRecommender.build(args.csv_path, args.path, chunk_rows=args.chunk_rows)
+        print(f"Wrote {rec.n_rows} rows to {args.path} (peak RSS {_peak_rss_mib():.0f} MiB)")
+        return
+
+    rec = OutOfCoreRecommender.open(args.path, block_bytes=args.block_mib << 20)
+    print(f"{rec.n_rows} rows, {rec.index.X.nbytes / (1 << 20):.0f} MiB feature matrix")
+    print(json.dumps(run_throughput(rec, args.batches, args.k), indent=2))
+
+
+if __name__ == "__main__":
+    main()
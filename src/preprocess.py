@@ -1,12 +1,73 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 from sklearn.preprocessing import StandardScaler
 
+from config import (
+    ID_COL_ARTISTS,
+    ID_COL_GENRE,
+    ID_COL_GENRES,
+    ID_COL_TRACK_ID,
+    ID_COL_TRACK_NAME,
+    INGEST_CHUNK_ROWS,
+)
+from profiling import stage
+from snapshot import atomic_output, file_checksum, save_array
+
+# Metadata columns the recommender relies on, and the low-cardinality ones
+# stored as pandas categoricals (artists repeat across tracks, genres are a
+# short list)
+ID_COLUMNS: List[str] = [ID_COL_TRACK_ID, ID_COL_TRACK_NAME, ID_COL_ARTISTS, ID_COL_GENRE]
+CATEGORICAL_COLUMNS: List[str] = [ID_COL_ARTISTS, ID_COL_GENRE]
+
+# Columnar ingest cache files; bump the version when the cached frame changes
+INGEST_CACHE_VERSION: int = 2
+CACHE_FEATURES_FILE: str = "features.npy"
+CACHE_METADATA_FILE: str = "metadata.pkl"
+CACHE_META_FILE: str = "ingest.json"
+
+# Ingest dedupe modes -> key columns identifying "the same track"
+DEDUPE_KEYS: Dict[str, List[str]] = {
+    "track_id": [ID_COL_TRACK_ID],
+    "name_artist": [ID_COL_TRACK_NAME, ID_COL_ARTISTS],
+}
+
+
+@dataclass
+class IngestReport:
+    """What the ingest step kept and dropped."""
+    rows_read: int
+    rows_missing_features: int  # dropped for missing feature values
+    rows_collapsed: int  # duplicate rows merged into another row
+    rows_kept: int
+    n_features: int
+    dedupe: Optional[str] = None
+
+    @property
+    def feature_bytes_saved(self) -> int:
+        """Bytes of float32 feature matrix avoided by collapsing duplicates."""
+        return self.rows_collapsed * self.n_features * 4
+
+    def summary(self) -> str:
+        """One-line human-readable summary."""
+        pct = 100.0 * self.rows_collapsed / max(self.rows_read, 1)
+        return (
+            f"read {self.rows_read} rows, dropped {self.rows_missing_features} with "
+            f"missing features, collapsed {self.rows_collapsed} duplicates ({pct:.1f}%), "
+            f"kept {self.rows_kept}; saved {self.feature_bytes_saved / 2**20:.1f} MiB "
+            "of feature matrix"
+        )
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
 
 @dataclass
 class PreprocessResult:
@@ -15,6 +76,7 @@ class PreprocessResult:
     X_scaled: np.ndarray  # scaled feature matrix
     scaler: StandardScaler  # fitted scaler
     feature_columns: List[str]  # columns used as features
+    report: Optional[IngestReport] = None  # row counts from the ingest step
 
 
 def load_dataset(csv_path: str) -> pd.DataFrame:
@@ -22,6 +84,153 @@ def load_dataset(csv_path: str) -> pd.DataFrame:
     return pd.read_csv(csv_path)
 
 
+def concat_catalog(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate catalog frames, keeping categorical columns categorical.
+
+    Each chunk infers its own categories (or holds plain strings, like
+    tracks passed to ``add_tracks``), and a plain ``pd.concat`` of differing
+    categoricals falls back to object dtype. A ``CATEGORICAL_COLUMNS``
+    column that is categorical in any chunk is categorical in the result.
+    """
+    if not chunks:
+        raise ValueError("Dataset contains no rows")
+
+    df = pd.concat(chunks, ignore_index=True)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and any(
+            isinstance(c[col].dtype, pd.CategoricalDtype) for c in chunks
+        ):
+            df[col] = union_categoricals([c[col].astype("category") for c in chunks])
+    return df
+
+
+def iter_clean_chunks(
+    csv_path: str,
+    feature_columns: List[str],
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+    columns: Optional[List[str]] = None,
+) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    Stream the CSV in chunks.
+
+    Every column is kept unless ``columns`` is given, in which case only
+    those (where present) and the feature columns are parsed. Features are
+    parsed as float32 and ``CATEGORICAL_COLUMNS`` as categoricals. Yields
+    (rows_read, cleaned_chunk) per chunk, where rows with missing features
+    have been dropped from cleaned_chunk.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing = set(feature_columns) - set(header)
+    if missing:
+        raise ValueError(f"Missing expected feature columns in dataset: {missing}")
+
+    usecols = None
+    if columns is not None:
+        usecols = [c for c in columns if c in header and c not in feature_columns]
+        usecols += feature_columns
+    dtypes: Dict[str, object] = {c: np.float32 for c in feature_columns}
+    dtypes.update({c: "category" for c in CATEGORICAL_COLUMNS if c in header})
+
+    reader = pd.read_csv(csv_path, usecols=usecols, dtype=dtypes, chunksize=chunk_rows)
+    for chunk in reader:
+        clean = clean_and_select_features(chunk, feature_columns)
+        yield len(chunk), clean if usecols is None else clean[usecols]
+
+
+def load_dataset_chunked(
+    csv_path: str,
+    feature_columns: List[str],
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+    scaler: Optional[StandardScaler] = None,
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Load the cleaned catalog chunk by chunk (see iter_clean_chunks).
+
+    The full raw frame is never held in memory. If ``scaler`` is given it is
+    updated with ``partial_fit`` on each cleaned chunk.
+
+    Returns the cleaned dataframe and the number of rows read.
+    """
+    rows_read = 0
+    chunks: List[pd.DataFrame] = []
+    for n_read, chunk in iter_clean_chunks(csv_path, feature_columns, chunk_rows):
+        rows_read += n_read
+        if scaler is not None and len(chunk):
+            scaler.partial_fit(chunk[feature_columns].to_numpy())
+        chunks.append(chunk)
+
+    return concat_catalog(chunks), rows_read
+
+
+def write_ingest_cache(
+    cache_dir: str,
+    df: pd.DataFrame,
+    feature_columns: List[str],
+    rows_read: int,
+    source_checksum: str,
+) -> None:
+    """
+    Write the cleaned catalog as a columnar cache.
+
+    Features go to a float32 .npy matrix and the remaining (categorical)
+    metadata to a pickle; ``ingest.json`` records the source checksum.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    save_array(
+        os.path.join(cache_dir, CACHE_FEATURES_FILE),
+        df[feature_columns].to_numpy(dtype=np.float32),
+    )
+    with atomic_output(os.path.join(cache_dir, CACHE_METADATA_FILE)) as tmp_path:
+        df.drop(columns=feature_columns).to_pickle(tmp_path)
+    with atomic_output(os.path.join(cache_dir, CACHE_META_FILE)) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "format_version": INGEST_CACHE_VERSION,
+                    "source_checksum": source_checksum,
+                    "feature_columns": list(feature_columns),
+                    "columns": list(df.columns),
+                    "rows_read": rows_read,
+                },
+                fh,
+                indent=2,
+            )
+
+
+def read_ingest_cache(
+    cache_dir: str,
+    feature_columns: List[str],
+    source_checksum: str,
+) -> Optional[Tuple[pd.DataFrame, int]]:
+    """
+    Load a cache written by ``write_ingest_cache``.
+
+    Returns (df, rows_read), or None if the cache is missing, was written
+    by another cache version, or was built from a different CSV or feature
+    list.
+    """
+    meta_path = os.path.join(cache_dir, CACHE_META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as fh:
+        meta = json.load(fh)
+    if (
+        meta.get("format_version") != INGEST_CACHE_VERSION
+        or meta.get("source_checksum") != source_checksum
+        or meta.get("feature_columns") != list(feature_columns)
+    ):
+        return None
+
+    metadata = pd.read_pickle(os.path.join(cache_dir, CACHE_METADATA_FILE))
+    features = np.load(os.path.join(cache_dir, CACHE_FEATURES_FILE))
+    df = pd.concat(
+        [metadata, pd.DataFrame(features, columns=feature_columns, index=metadata.index)],
+        axis=1,
+    )
+    return df[meta["columns"]], int(meta["rows_read"])
+
+
 def clean_and_select_features(
     df: pd.DataFrame,
     feature_columns: List[str],
@@ -39,6 +248,38 @@ def clean_and_select_features(
     return df_clean
 
 
+def collapse_duplicates(df: pd.DataFrame, mode: str) -> pd.DataFrame:
+    """
+    Collapse rows that describe the same track into one row.
+
+    The Spotify dataset repeats a track once per genre with identical audio
+    features. ``mode`` picks the identity: "track_id" or "name_artist"
+    (track_name + artists). The first row of each track is kept; its genres
+    are gathered into a tuple column ``ID_COL_GENRES`` and ``ID_COL_GENRE``
+    becomes their comma-joined display string.
+    """
+    if mode not in DEDUPE_KEYS:
+        raise ValueError(f"Unknown dedupe mode {mode!r}; expected one of {list(DEDUPE_KEYS)}")
+    keys = DEDUPE_KEYS[mode]
+
+    group = df.groupby(keys, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    first_rows = np.sort(np.unique(group, return_index=True)[1])
+    collapsed = df.iloc[first_rows].copy()
+
+    if ID_COL_GENRE in df.columns:
+        # Unique genres per track, in order of first appearance.
+        pairs = pd.DataFrame({"group": group, "genre": df[ID_COL_GENRE].to_numpy()})
+        pairs = pairs.dropna().drop_duplicates()
+        genres = pairs.groupby("group", sort=True)["genre"].agg(tuple)
+        track_genres = genres.reindex(group[first_rows]).to_numpy()
+        track_genres = [g if isinstance(g, tuple) else () for g in track_genres]
+
+        collapsed[ID_COL_GENRES] = track_genres
+        collapsed[ID_COL_GENRE] = [", ".join(map(str, g)) for g in track_genres]
+
+    return collapsed
+
+
 def scale_features(
     df: pd.DataFrame,
     feature_columns: List[str],
@@ -48,8 +289,9 @@ def scale_features(
     Scale numeric feature columns using StandardScaler.
 
     If a scaler is provided, reuse it; otherwise fit a new one.
+    Features are scaled as float32.
     """
-    X = df[feature_columns].values.astype(float)
+    X = df[feature_columns].to_numpy(dtype=np.float32)
 
     if scaler is None:
         scaler = StandardScaler()
@@ -63,20 +305,70 @@ def scale_features(
 def preprocess_pipeline(
     csv_path: str,
     feature_columns: List[str],
+    dedupe: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    chunk_rows: int = INGEST_CHUNK_ROWS,
+    source_checksum: Optional[str] = None,
 ) -> PreprocessResult:
     """
     Full preprocessing pipeline:
-    - load data
+    - load data (from the columnar cache in ``cache_dir`` if it is current,
+      otherwise by streaming the CSV in chunks; see load_dataset_chunked)
     - clean rows
+    - optionally collapse duplicate tracks (``dedupe``, see collapse_duplicates)
     - scale features
+
+    Without dedupe, the scaler is fitted incrementally while streaming.
+    ``source_checksum`` avoids re-hashing the CSV when the caller has it.
     """
-    raw_df = load_dataset(csv_path)
-    df_clean = clean_and_select_features(raw_df, feature_columns)
-    X_scaled, scaler = scale_features(df_clean, feature_columns)
+    if cache_dir is not None and source_checksum is None:
+        source_checksum = file_checksum(csv_path)
+
+    cached = None
+    if cache_dir is not None:
+        with stage("preprocess.read_cache"):
+            cached = read_ingest_cache(cache_dir, feature_columns, source_checksum)
+
+    scaler: Optional[StandardScaler] = None
+    if cached is not None:
+        df_clean, rows_read = cached
+    else:
+        # Collapsing duplicates changes the rows, so the scaler is then fitted
+        # afterwards instead of while streaming.
+        scaler = StandardScaler() if dedupe is None else None
+        with stage("preprocess.load_csv"):
+            df_clean, rows_read = load_dataset_chunked(
+                csv_path,
+                feature_columns,
+                chunk_rows=chunk_rows,
+                scaler=scaler,
+            )
+        if cache_dir is not None:
+            with stage("preprocess.write_cache"):
+                write_ingest_cache(
+                    cache_dir, df_clean, feature_columns, rows_read, source_checksum
+                )
+
+    n_clean = len(df_clean)
+    if dedupe is not None:
+        with stage("preprocess.dedupe"):
+            df_clean = collapse_duplicates(df_clean, dedupe)
+    with stage("preprocess.scale"):
+        X_scaled, scaler = scale_features(df_clean, feature_columns, scaler)
+
+    report = IngestReport(
+        rows_read=rows_read,
+        rows_missing_features=rows_read - n_clean,
+        rows_collapsed=n_clean - len(df_clean),
+        rows_kept=len(df_clean),
+        n_features=len(feature_columns),
+        dedupe=dedupe,
+    )
 
     return PreprocessResult(
         df=df_clean.reset_index(drop=True),
         X_scaled=X_scaled,
         scaler=scaler,
         feature_columns=feature_columns,
+        report=report,
     )
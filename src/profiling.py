@@ -0,0 +1,222 @@
+"""Per-stage wall-time and memory recording with a pluggable sink.
+
+Pipeline code marks stages with ``with stage("models.query"):`` or the
+``@timed("...")`` decorator. Nothing is recorded until a sink is installed
+with ``set_sink``. Until then ``stage`` returns a shared no-op context
+manager, and ``timed`` wrappers make one extra global lookup per call.
+
+Each recorded sample has the stage name, the wall time and, while
+``tracemalloc`` is tracing, the net change in traced memory in bytes over the
+stage (None otherwise). numpy reports its array buffers to ``tracemalloc``, so
+this includes the matrices the stages build. Tracing is opt-in
+(``set_sink(sink, trace_memory=True)``, ``PROFILE_TRACE_MEMORY`` or
+``python -X tracemalloc``) because it slows every allocation. Traced memory
+is process-wide, so samples from concurrent threads include each other's
+allocations. Stages may nest; each level is recorded separately.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, TypeVar
+
+import numpy as np
+
+from config import PROFILE_HISTOGRAM_WINDOW, PROFILE_TRACE_MEMORY
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Sink(ABC):
+    """Receives one call per finished stage."""
+
+    @abstractmethod
+    def record(self, stage: str, seconds: float, alloc_bytes: Optional[int]) -> None:
+        """Handle one sample; called on the thread that ran the stage."""
+
+
+class HistogramSink(Sink):
+    """
+    In-memory sink keeping the last ``window`` samples per stage.
+
+    ``summary`` reports count and p50/p95/p99 latencies over that window,
+    plus the mean net traced bytes when memory tracing was on.
+    Safe to share between threads (e.g. Streamlit sessions).
+    """
+
+    def __init__(self, window: int = PROFILE_HISTOGRAM_WINDOW) -> None:
+        self.window = window
+        self._seconds: Dict[str, Deque[float]] = {}
+        self._bytes: Dict[str, Deque[int]] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, alloc_bytes: Optional[int]) -> None:
+        with self._lock:
+            if stage not in self._seconds:
+                self._seconds[stage] = deque(maxlen=self.window)
+                self._bytes[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+            self._seconds[stage].append(seconds)
+            if alloc_bytes is not None:
+                self._bytes[stage].append(alloc_bytes)
+            self._counts[stage] += 1
+
+    def percentiles(
+        self,
+        stage: str,
+        qs: Sequence[float] = (50, 95, 99),
+    ) -> Optional[np.ndarray]:
+        """Latency percentiles in milliseconds, or None if the stage never ran."""
+        with self._lock:
+            samples = self._seconds.get(stage)
+            if not samples:
+                return None
+            values = np.fromiter(samples, dtype=float, count=len(samples))
+        return 1000.0 * np.percentile(values, qs)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per stage: total count, p50/p95/p99 ms and mean net traced bytes (NaN if untraced)."""
+        with self._lock:
+            stages = sorted(self._seconds)
+            counts = dict(self._counts)
+            traced = {
+                s: float(np.mean(self._bytes[s])) if self._bytes[s] else float("nan")
+                for s in stages
+            }
+        out: Dict[str, Dict[str, float]] = {}
+        for s in stages:
+            p50, p95, p99 = self.percentiles(s)
+            out[s] = {
+                "count": counts[s],
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "mean_alloc_bytes": traced[s],
+            }
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seconds.clear()
+            self._bytes.clear()
+            self._counts.clear()
+
+
+class JsonLinesSink(Sink):
+    """Append one JSON object per stage to a file, for offline analysis."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, alloc_bytes: Optional[int]) -> None:
+        line = json.dumps(
+            {
+                "time": time.time(),
+                "stage": stage,
+                "ms": 1000.0 * seconds,
+                "alloc_bytes": alloc_bytes,
+            }
+        )
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+_sink: Optional[Sink] = None
+# True while tracemalloc runs because set_sink started it (and should stop it)
+_started_tracing = False
+
+
+def set_sink(
+    sink: Optional[Sink],
+    trace_memory: bool = PROFILE_TRACE_MEMORY,
+) -> Optional[Sink]:
+    """
+    Install ``sink`` for all stages (None disables recording); returns the previous one.
+
+    With ``trace_memory``, ``tracemalloc`` is started so samples carry
+    allocated bytes; it is stopped again when a later call turns tracing off,
+    unless it was already running before.
+    """
+    global _sink, _started_tracing
+    want_tracing = sink is not None and trace_memory
+    if want_tracing and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+    elif not want_tracing and _started_tracing:
+        tracemalloc.stop()
+        _started_tracing = False
+    previous, _sink = _sink, sink
+    return previous
+
+
+def get_sink() -> Optional[Sink]:
+    return _sink
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "sink", "start", "traced")
+
+    def __init__(self, name: str, sink: Sink) -> None:
+        self.name = name
+        self.sink = sink
+
+    def __enter__(self) -> "_Stage":
+        self.traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        seconds = time.perf_counter() - self.start
+        alloc_bytes = None
+        if self.traced is not None and tracemalloc.is_tracing():
+            alloc_bytes = tracemalloc.get_traced_memory()[0] - self.traced
+        self.sink.record(self.name, seconds, alloc_bytes)
+
+
+def stage(name: str) -> Any:
+    """Context manager recording one sample for ``name`` (no-op without a sink)."""
+    sink = _sink
+    if sink is None:
+        return _NULL_STAGE
+    return _Stage(name, sink)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator recording every call of the function as stage ``name``."""
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            sink = _sink
+            if sink is None:
+                return fn(*args, **kwargs)
+            with _Stage(name, sink):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorate
@@ -1,23 +1,102 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+import os
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+import joblib
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 
+from cache import LRUCache
 from config import (
+    BATCH_QUERY_BLOCK_SIZE,
+    DEFAULT_CLUSTER_BACKEND,
+    DEFAULT_CLUSTER_REPORT,
+    DEFAULT_IVF_N_PROBE,
+    DEFAULT_KNN_BACKEND,
     DEFAULT_N_CLUSTERS,
     DEFAULT_N_NEIGHBORS,
+    DEFAULT_N_SHARDS,
+    DELTA_COMPACTION_FRACTION,
     FEATURE_COLUMNS,
+    FILTER_CACHE_SIZE,
+    FILTER_SUBINDEX_FRACTION,
     ID_COL_ARTISTS,
     ID_COL_GENRE,
     ID_COL_TRACK_ID,
     ID_COL_TRACK_NAME,
+    MOOD_CACHE_KEY_DECIMALS,
+    MOOD_CACHE_QUANTUM,
+    MOOD_CACHE_SIZE,
+    MOOD_LATTICE_TOP_K,
+    NEIGHBOR_GRAPH_K,
+    SEARCH_MAX_RESULTS,
 )
-from models import VibeModels
-from preprocess import PreprocessResult, preprocess_pipeline
+from indexes import (
+    ClusterStats,
+    FilterIndex,
+    MoodLattice,
+    TrackNameIndex,
+    TrackFilter,
+    TrackSearchIndex,
+    appended_group_ids,
+    duplicate_group_ids,
+    first_unique_positions,
+)
+from models import BruteForceIndex, VibeModels, read_recommended_k
+from neighbor_graph import NeighborGraph, build_neighbor_graph, data_fingerprint
+from preprocess import (
+    IngestReport,
+    PreprocessResult,
+    clean_and_select_features,
+    collapse_duplicates,
+    concat_catalog,
+    preprocess_pipeline,
+    scale_features,
+)
+from profiling import stage, timed
+from results import Recommendations
+from snapshot import (
+    CATALOG_FILE,
+    CLUSTER_STATS_FILE,
+    FILTER_INDEX_FILE,
+    LABELS_FILE,
+    LATTICE_DISTANCES_FILE,
+    LATTICE_ROWS_FILE,
+    MODELS_FILE,
+    X_SCALED_FILE,
+    StaleSnapshotError,
+    atomic_output,
+    file_checksum,
+    generation_file,
+    manifest_serves,
+    new_generation,
+    read_manifest,
+    remove_other_generations,
+    save_array,
+    scaler_from_dict,
+    scaler_to_dict,
+    snapshot_file,
+    write_manifest,
+)
+
+
+# from_csv options that only say where intermediate data is cached; they do
+# not change the fitted recommender, so they are not part of build_params
+_CACHE_OPTIONS = frozenset({"ingest_cache_dir"})
+
+
+def _mood_cache_key(overrides: Dict[str, float]) -> Tuple[Tuple[str, float], ...]:
+    """Mood-cache key for ``overrides``, insensitive to float noise in the values."""
+    return tuple(
+        sorted(
+            (col, round(float(value), MOOD_CACHE_KEY_DECIMALS))
+            for col, value in overrides.items()
+        )
+    )
 
 
 @dataclass
@@ -28,29 +107,130 @@ class VibeRecommender:
     feature_columns: List[str]
     models: VibeModels
     scaler: StandardScaler
+    source_checksum: Optional[str] = None  # SHA-256 of the CSV this was built from
+    # (path, size, mtime_ns) of that CSV when from_csv started, so save can
+    # hash it on demand if the build did not need the checksum
+    source_file: Optional[Tuple[str, int, int]] = field(default=None, repr=False)
+    build_params: Dict[str, object] = field(default_factory=dict)  # from_csv options
+    ingest_report: Optional[IngestReport] = None
+    name_index: Optional[TrackNameIndex] = field(default=None, repr=False)
+    search_index: Optional[TrackSearchIndex] = field(default=None, repr=False)
+    group_ids: Optional[np.ndarray] = field(default=None, repr=False)  # per-row track id
+    feature_means: Optional[np.ndarray] = field(default=None, repr=False)
+    mood_lattice: Optional[MoodLattice] = field(default=None, repr=False)
+    neighbor_graph: Optional[NeighborGraph] = field(default=None, repr=False)
+    filter_index: Optional[FilterIndex] = field(default=None, repr=False)
+    cluster_stats: Optional[ClusterStats] = field(default=None, repr=False)
+    mood_cache: LRUCache = field(
+        default_factory=lambda: LRUCache(MOOD_CACHE_SIZE),
+        repr=False,
+    )
+    filter_cache: LRUCache = field(  # TrackFilter -> resolved rows / sub-index
+        default_factory=lambda: LRUCache(FILTER_CACHE_SIZE),
+        repr=False,
+    )
+    # Preallocated storage behind X_scaled / group_ids while tracks are added
+    _row_buffers: Dict[str, np.ndarray] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Lookup structures are derived from df, so build them once here
+        # rather than per request. load() passes in the filter index and
+        # cluster stats stored in the snapshot, so only from_csv builds those.
+        if self.name_index is None:
+            self.name_index = TrackNameIndex.build(self.df, live=self._live_mask())
+        if self.group_ids is None:
+            self.group_ids = duplicate_group_ids(self.df)
+        if self.filter_index is None:
+            self.filter_index = FilterIndex.build(self.df, self.feature_columns)
+        if self.cluster_stats is None:
+            self.cluster_stats = self._build_cluster_stats()
+        if self.feature_means is None:
+            # The scaler was fitted on this catalog, so mean_ is the dataset mean.
+            self.feature_means = np.asarray(self.scaler.mean_, dtype=float)
 
     @classmethod
+    @timed("recommender.from_csv")
     def from_csv(
         cls,
         csv_path: str,
         feature_columns: Optional[List[str]] = None,
-        n_clusters: int = DEFAULT_N_CLUSTERS,
+        n_clusters: Optional[int] = DEFAULT_N_CLUSTERS,
         n_neighbors: int = DEFAULT_N_NEIGHBORS,
+        ivf_lists: Optional[int] = None,
+        ivf_n_probe: int = DEFAULT_IVF_N_PROBE,
+        backend: str = DEFAULT_KNN_BACKEND,
+        dedupe: Optional[str] = None,
+        ingest_cache_dir: Optional[str] = None,
+        cluster_backend: str = DEFAULT_CLUSTER_BACKEND,
+        cluster_report: str = DEFAULT_CLUSTER_REPORT,
+        n_shards: Optional[int] = DEFAULT_N_SHARDS,
+        source_checksum: Optional[str] = None,
     ) -> "VibeRecommender":
         """
         Build a VibeRecommender from a CSV file.
 
         This runs the full preprocessing pipeline and fits clustering
-        and nearest-neighbor models.
+        and nearest-neighbor models. Pass ``ivf_lists`` to serve queries
+        from an approximate IVF index (see models.IVFIndex); ``backend``
+        picks the exact search ("sklearn", "brute" or "sharded", which splits
+        the catalog over ``n_shards`` worker processes). ``dedupe`` ("track_id"
+        or "name_artist") collapses per-genre duplicate rows at ingest so
+        only one vector per track is indexed. With ``ingest_cache_dir`` the
+        cleaned catalog is cached in columnar form and reused while the CSV
+        is unchanged (see preprocess.write_ingest_cache).
+
+        ``cluster_backend`` is "kmeans" or "minibatch" (see
+        models.fit_clusterer). ``n_clusters=None`` uses the recommended k from
+        the tune_clusters.py report at ``cluster_report`` if it was computed
+        for this CSV, and DEFAULT_N_CLUSTERS otherwise. ``source_checksum``
+        avoids re-hashing the CSV when the caller has it; otherwise the CSV
+        is only hashed when the ingest cache or cluster report needs it, or
+        later by ``save``.
         """
+        build_params: Dict[str, object] = {
+            "feature_columns": feature_columns,
+            "n_clusters": n_clusters,
+            "n_neighbors": n_neighbors,
+            "ivf_lists": ivf_lists,
+            "ivf_n_probe": ivf_n_probe,
+            "backend": backend,
+            "dedupe": dedupe,
+            "cluster_backend": cluster_backend,
+            "n_shards": n_shards,
+        }
         if feature_columns is None:
             feature_columns = FEATURE_COLUMNS
 
-        prep: PreprocessResult = preprocess_pipeline(csv_path, feature_columns)
+        stat = os.stat(csv_path)
+        # Hashing reads the whole CSV, so only do it when the ingest cache or
+        # a cluster report will compare against the result.
+        if source_checksum is None and (
+            ingest_cache_dir is not None
+            or (n_clusters is None and os.path.exists(cluster_report))
+        ):
+            source_checksum = file_checksum(csv_path)
+        if n_clusters is None:
+            n_clusters = (
+                read_recommended_k(cluster_report, source_checksum, dedupe=dedupe)
+                or DEFAULT_N_CLUSTERS
+            )
+
+        prep: PreprocessResult = preprocess_pipeline(
+            csv_path,
+            feature_columns,
+            dedupe=dedupe,
+            cache_dir=ingest_cache_dir,
+            source_checksum=source_checksum,
+        )
         models = VibeModels.fit(
             prep.X_scaled,
             n_clusters=n_clusters,
             n_neighbors=n_neighbors,
+            ivf_lists=ivf_lists,
+            ivf_n_probe=ivf_n_probe,
+            backend=backend,
+            cluster_backend=cluster_backend,
+            n_shards=n_shards,
         )
 
         # Assign mood clusters
@@ -64,14 +244,412 @@ class VibeRecommender:
             feature_columns=prep.feature_columns,
             models=models,
             scaler=prep.scaler,
+            source_checksum=source_checksum,
+            source_file=(csv_path, stat.st_size, stat.st_mtime_ns),
+            build_params=build_params,
+            ingest_report=prep.report,
+        )
+
+    # ---------- persistence ----------
+
+    def save(self, path: str, pinned_checksum: Optional[str] = None) -> None:
+        """
+        Write a snapshot of this recommender to the directory ``path``.
+
+        X_scaled is stored as a plain .npy so ``load`` can memory-map it.
+        Data files are written as a new generation and the manifest is
+        replaced last, so an interrupted save leaves the previous snapshot
+        readable (see snapshot.py). ``pinned_checksum`` names a newer CSV
+        version this snapshot should also be loaded for (set when a reload
+        to that version was rolled back).
+
+        A recommender built without hashing its CSV hashes it here; this
+        raises StaleSnapshotError if the CSV changed since the build, and
+        ValueError if the source is unknown.
+        """
+        source_checksum = self._source_checksum()
+        os.makedirs(path, exist_ok=True)
+        generation = new_generation()
+
+        def out(name: str) -> str:
+            return os.path.join(path, generation_file(name, generation))
+
+        save_array(out(X_SCALED_FILE), self.X_scaled)
+        save_array(out(LABELS_FILE), self.df["mood_cluster"].to_numpy())
+        with atomic_output(out(CATALOG_FILE)) as tmp_path:
+            self.df.drop(columns=["mood_cluster"]).to_pickle(tmp_path)
+        with atomic_output(out(MODELS_FILE)) as tmp_path:
+            joblib.dump(self.models, tmp_path)
+        with atomic_output(out(CLUSTER_STATS_FILE)) as tmp_path:
+            self.cluster_stats.save(tmp_path)
+        with atomic_output(out(FILTER_INDEX_FILE)) as tmp_path:
+            self.filter_index.save(tmp_path)
+
+        lattice_meta = None
+        if self.mood_lattice is not None:
+            save_array(out(LATTICE_ROWS_FILE), self.mood_lattice.rows)
+            save_array(out(LATTICE_DISTANCES_FILE), self.mood_lattice.distances)
+            lattice_meta = {"quantum": self.mood_lattice.quantum}
+
+        # Only keep a graph computed over exactly these rows.
+        graph_fingerprint = None
+        if self.neighbor_graph is not None:
+            fingerprint = data_fingerprint(self.X_scaled, self.group_ids)
+            if self.neighbor_graph.fingerprint == fingerprint:
+                self.neighbor_graph.save(path)
+                graph_fingerprint = fingerprint
+
+        # Manifest last: it commits the new generation.
+        write_manifest(
+            path,
+            {
+                "generation": generation,
+                "source_checksum": source_checksum,
+                "pinned_checksum": pinned_checksum,
+                "feature_columns": list(self.feature_columns),
+                "n_rows": int(len(self.df)),
+                "scaler": scaler_to_dict(self.scaler),
+                "build_params": self.build_params,
+                "ingest_report": (
+                    None if self.ingest_report is None else self.ingest_report.to_dict()
+                ),
+                "mood_lattice": lattice_meta,
+                "neighbor_graph": graph_fingerprint,
+            },
+        )
+        remove_other_generations(path, generation)
+
+    def _source_checksum(self) -> str:
+        """The source CSV's checksum, hashing it now if from_csv skipped that."""
+        if self.source_checksum is not None:
+            return self.source_checksum
+        if self.source_file is None:
+            raise ValueError("Cannot snapshot a recommender with no source checksum")
+        csv_path, size, mtime_ns = self.source_file
+        stat = os.stat(csv_path)
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            raise StaleSnapshotError(f"{csv_path} changed after this recommender was built")
+        self.source_checksum = file_checksum(csv_path)
+        return self.source_checksum
+
+    @classmethod
+    @timed("recommender.load")
+    def load(
+        cls,
+        path: str,
+        csv_path: Optional[str] = None,
+        mmap: bool = True,
+        source_checksum: Optional[str] = None,
+    ) -> "VibeRecommender":
+        """
+        Load a snapshot written by ``save``.
+
+        If ``csv_path`` is given, its checksum must match the one recorded in
+        the snapshot (or the one it was pinned to, see ``save``), otherwise
+        StaleSnapshotError is raised; ``source_checksum`` avoids re-hashing
+        it when the caller has it. With
+        ``mmap``, X_scaled and the neighbor index arrays are memory-mapped
+        read-only.
+        """
+        manifest = read_manifest(path)
+
+        if csv_path is not None:
+            if not manifest_serves(manifest, source_checksum or file_checksum(csv_path)):
+                raise StaleSnapshotError(
+                    f"Snapshot at {path} was built from a different version of {csv_path}"
+                )
+        checksum = manifest["source_checksum"]
+
+        def stored(name: str) -> str:
+            return snapshot_file(path, manifest, name)
+
+        mmap_mode = "r" if mmap else None
+        X_scaled = np.load(stored(X_SCALED_FILE), mmap_mode=mmap_mode)
+        labels = np.load(stored(LABELS_FILE))
+        models: VibeModels = joblib.load(stored(MODELS_FILE), mmap_mode=mmap_mode)
+
+        df = pd.read_pickle(stored(CATALOG_FILE))
+        df["mood_cluster"] = labels
+
+        mood_lattice = None
+        if manifest.get("mood_lattice") is not None:
+            mood_lattice = MoodLattice(
+                rows=np.load(stored(LATTICE_ROWS_FILE), mmap_mode=mmap_mode),
+                distances=np.load(stored(LATTICE_DISTANCES_FILE), mmap_mode=mmap_mode),
+                quantum=manifest["mood_lattice"]["quantum"],
+            )
+
+        return cls(
+            df=df,
+            X_scaled=X_scaled,
+            feature_columns=manifest["feature_columns"],
+            models=models,
+            scaler=scaler_from_dict(manifest["scaler"]),
+            source_checksum=checksum,
+            build_params=manifest.get("build_params", {}),
+            ingest_report=(
+                None
+                if manifest.get("ingest_report") is None
+                else IngestReport(**manifest["ingest_report"])
+            ),
+            mood_lattice=mood_lattice,
+            cluster_stats=ClusterStats.load(stored(CLUSTER_STATS_FILE)),
+            filter_index=FilterIndex.load(stored(FILTER_INDEX_FILE)),
+            neighbor_graph=(
+                NeighborGraph.open(path, fingerprint=manifest["neighbor_graph"], n_rows=len(df))
+                if manifest.get("neighbor_graph")
+                else None
+            ),
+        )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        csv_path: str,
+        snapshot_path: str,
+        source_checksum: Optional[str] = None,
+        **from_csv_kwargs,
+    ) -> "VibeRecommender":
+        """
+        Load the snapshot at ``snapshot_path`` if it is current for ``csv_path``.
+
+        A missing or stale snapshot, or one built with different
+        ``from_csv_kwargs``, is rebuilt from the CSV and saved. Cache
+        locations such as ``ingest_cache_dir`` are not compared, so a
+        snapshot (with its lattice or graph) written by build_artifacts.py
+        serves the app as well. The CSV is hashed once (or not at all if
+        ``source_checksum`` is given) for both the check and a rebuild.
+        """
+        if source_checksum is None:
+            source_checksum = file_checksum(csv_path)
+        try:
+            rec = cls.load(snapshot_path, csv_path=csv_path, source_checksum=source_checksum)
+            if all(
+                rec.build_params.get(k) == v
+                for k, v in from_csv_kwargs.items()
+                if k not in _CACHE_OPTIONS
+            ):
+                return rec
+        except (FileNotFoundError, StaleSnapshotError):
+            pass
+
+        rec = cls.from_csv(csv_path, source_checksum=source_checksum, **from_csv_kwargs)
+        rec.save(snapshot_path)
+        return rec
+
+    def build_mood_lattice(self, top_k: int = MOOD_LATTICE_TOP_K) -> MoodLattice:
+        """
+        Precompute ``recommend_by_mood`` answers for every basic-slider point.
+
+        Runs all lattice points through ``recommend_by_moods`` and stores the
+        top_k row ids and distances per point (see indexes.MoodLattice).
+        The lattice is attached to this recommender and written by ``save``.
+        """
+        grid = MoodLattice.grid(MOOD_CACHE_QUANTUM)
+        recs = self.recommend_by_moods(grid, n=top_k)
+
+        rows = np.full((len(grid), top_k), -1, dtype=np.int32)
+        distances = np.full((len(grid), top_k), np.inf, dtype=np.float32)
+        query_ids = recs["query_id"].to_numpy()
+        ranks = recs["rank"].to_numpy()
+        rows[query_ids, ranks] = self.df.index.get_indexer(recs.index)
+        distances[query_ids, ranks] = recs["distance"].to_numpy()
+
+        steps = round(len(grid) ** (1 / 3))
+        self.mood_lattice = MoodLattice(
+            rows=rows.reshape(steps, steps, steps, top_k),
+            distances=distances.reshape(steps, steps, steps, top_k),
+            quantum=MOOD_CACHE_QUANTUM,
         )
+        return self.mood_lattice
+
+    def build_neighbor_graph(
+        self,
+        path: str,
+        k: int = NEIGHBOR_GRAPH_K,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> NeighborGraph:
+        """
+        Precompute the top-k deduplicated neighbors of every row into ``path``.
+
+        See neighbor_graph.build_neighbor_graph; the build is blocked,
+        memory-bounded and resumable. Once attached, ``recommend_by_track``
+        reads seeds' neighbors from the graph instead of searching.
+        """
+        self.neighbor_graph = build_neighbor_graph(
+            self.X_scaled,
+            self.group_ids,
+            path,
+            k=k,
+            progress=progress,
+        )
+        return self.neighbor_graph
+
+    # ---------- incremental updates ----------
+
+    def add_tracks(
+        self,
+        tracks: pd.DataFrame,
+        compaction_threshold: float = DELTA_COMPACTION_FRACTION,
+    ) -> int:
+        """
+        Add new tracks without refitting the scaler, clusters or main index.
+
+        Rows with missing features are dropped, and duplicates within
+        ``tracks`` are collapsed if this recommender was built with
+        ``dedupe``. New rows are scaled with the existing scaler, assigned to
+        the existing mood clusters and appended to the delta index (see
+        VibeModels.add_rows). The lookups are extended from the new rows
+        only. Compacts once the delta and removed rows exceed
+        ``compaction_threshold`` of the indexed catalog.
+
+        Returns the number of rows added.
+        """
+        new = clean_and_select_features(tracks, self.feature_columns)
+        dedupe = self.build_params.get("dedupe")
+        if dedupe is not None and len(new):
+            new = collapse_duplicates(new, dedupe)
+        if len(new) == 0:
+            return 0
+
+        X_new, _ = scale_features(new, self.feature_columns, self.scaler)
+        new = new.reindex(columns=[c for c in self.df.columns if c != "mood_cluster"])
+        new["mood_cluster"] = self.models.assign_clusters(X_new)
+
+        start = len(self.df)
+        self.df = concat_catalog([self.df, new])
+        self.X_scaled = self._append_rows("X_scaled", X_new)
+        self.group_ids = self._append_rows(
+            "group_ids", appended_group_ids(self.group_ids, self.df, start, self.name_index)
+        )
+        self.models.add_rows(X_new)
+
+        self.name_index.add(new, start)
+        self.filter_index.add(new)
+        self.cluster_stats.add(
+            np.arange(start, len(self.df)),
+            new["mood_cluster"].to_numpy(),
+            new[self.feature_columns].to_numpy(dtype=float),
+            self.X_scaled,
+            self.models.kmeans.cluster_centers_,
+        )
+        self._drop_precomputed()
+        self._maybe_compact(compaction_threshold)
+        return len(new)
+
+    def remove_tracks(
+        self,
+        track_ids: Sequence[str],
+        compaction_threshold: float = DELTA_COMPACTION_FRACTION,
+    ) -> int:
+        """
+        Remove every row whose ``track_id`` is in ``track_ids``.
+
+        Rows are tombstoned (searches skip them) and physically dropped at
+        the next compaction. Returns the number of rows removed.
+        """
+        hits = self.df[ID_COL_TRACK_ID].isin(track_ids).to_numpy()
+        live = self._live_mask()
+        if live is not None:
+            hits = hits & live  # to_numpy() may hand back a read-only view
+        rows = np.flatnonzero(hits)
+        if len(rows) == 0:
+            return 0
+
+        self.models.remove_rows(rows)
+        # The filter index keeps removed rows; searches skip tombstones.
+        self.name_index.remove(self.df, rows)
+        removed = self.df.iloc[rows]
+        self.cluster_stats.remove(
+            rows,
+            removed["mood_cluster"].to_numpy(),
+            removed[self.feature_columns].to_numpy(dtype=float),
+            self.X_scaled,
+            self.models.kmeans.cluster_centers_,
+        )
+        self._drop_precomputed()
+        self._maybe_compact(compaction_threshold)
+        return len(rows)
+
+    def compact(self) -> None:
+        """
+        Drop removed rows and fold the delta into the main index.
+
+        Row ids change, so lookups are rebuilt and precomputed artifacts
+        (lattice, neighbor graph) are dropped; rebuild them if needed.
+        """
+        live = self._live_mask()
+        if live is not None:
+            self.df = self.df[live].reset_index(drop=True)
+            self.X_scaled = np.ascontiguousarray(self.X_scaled[live])
+        self.models.reindex(self.X_scaled)
+        self._catalog_changed()
+
+    def _maybe_compact(self, threshold: float) -> None:
+        pending = self.models.n_delta + self.models.n_removed
+        if pending > threshold * max(self.models.n_indexed, 1):
+            self.compact()
+
+    def _catalog_changed(self) -> None:
+        """Rebuild row-derived lookups and drop every precomputed answer."""
+        self._row_buffers.clear()
+        self.name_index = TrackNameIndex.build(self.df, live=self._live_mask())
+        self.group_ids = duplicate_group_ids(self.df)
+        self.filter_index = FilterIndex.build(self.df, self.feature_columns)
+        self.cluster_stats = self._build_cluster_stats()
+        self._drop_precomputed()
+
+    def _drop_precomputed(self) -> None:
+        """Forget cached and precomputed answers after the catalog changed."""
+        self.search_index = None
+        self.mood_cache.clear()
+        self.filter_cache.clear()
+        self.mood_lattice = None
+        self.neighbor_graph = None
+
+    def _append_rows(self, name: str, new: np.ndarray) -> np.ndarray:
+        """
+        The array attribute ``name`` with ``new`` appended.
+
+        The result is a view of a buffer with DELTA_COMPACTION_FRACTION of
+        headroom, so repeated appends copy only the new rows until the
+        buffer fills; compaction resets it. Existing views stay valid.
+        """
+        current = getattr(self, name)
+        n, k = len(current), len(new)
+        buffer = self._row_buffers.get(name)
+        if buffer is None or current.base is not buffer or len(buffer) < n + k:
+            headroom = max(k, int(DELTA_COMPACTION_FRACTION * n))
+            buffer = np.empty((n + k + headroom,) + current.shape[1:], dtype=current.dtype)
+            buffer[:n] = current
+            self._row_buffers[name] = buffer
+        buffer[n:n + k] = new
+        return buffer[:n + k]
+
+    def _build_cluster_stats(self) -> ClusterStats:
+        with stage("recommender.cluster_stats"):
+            return ClusterStats.build(
+                self.df,
+                self.feature_columns,
+                self.X_scaled,
+                centroids=self.models.kmeans.cluster_centers_,
+                live=self._live_mask(),
+            )
+
+    def _live_mask(self) -> Optional[np.ndarray]:
+        """Rows not removed by ``remove_tracks``; None if nothing was removed."""
+        return None if self.models.removed is None else ~self.models.removed
+
+    def _live_df(self) -> pd.DataFrame:
+        """The catalog without removed rows."""
+        live = self._live_mask()
+        return self.df if live is None else self.df[live]
 
     # ---------- internal helpers ----------
 
     def _get_track_indices_by_name(self, track_name: str) -> List[int]:
         """Return indices of rows whose track name matches (case-insensitive)."""
-        mask = self.df[ID_COL_TRACK_NAME].str.lower() == track_name.lower()
-        return list(self.df[mask].index)
+        return self.name_index.lookup(track_name).tolist()
 
     def _build_mood_vector(
         self,
@@ -82,135 +660,358 @@ class VibeRecommender:
 
         For unspecified features, dataset means are used.
         """
-        base = self.df[self.feature_columns].mean().to_dict()
+        base = dict(zip(self.feature_columns, self.feature_means))
         base.update(overrides)
 
         raw_vec = np.array([base[col] for col in self.feature_columns], dtype=float)
         scaled_vec = self.scaler.transform(raw_vec.reshape(1, -1))[0]
         return scaled_vec
 
-    def _recommend_from_vector(
+    def _build_mood_matrix(
         self,
-        query_vec: np.ndarray,
+        values: np.ndarray,
+        columns: Sequence[str],
+    ) -> np.ndarray:
+        """
+        Vectorized ``_build_mood_vector``: one scaled query row per input row.
+
+        ``values[:, j]`` overrides feature ``columns[j]``; the remaining
+        features are set to dataset means.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        if values.shape[1] != len(columns):
+            raise ValueError(
+                f"Expected {len(columns)} mood columns {list(columns)}, got {values.shape[1]}"
+            )
+
+        raw = np.tile(self.feature_means, (len(values), 1))
+        for j, col in enumerate(columns):
+            raw[:, self.feature_columns.index(col)] = values[:, j]
+
+        return self.scaler.transform(raw)
+
+    def _recommend_batch(
+        self,
+        query_vecs: np.ndarray,
         n: int,
-        exclude_index: Optional[int] = None,
+        seed_indices: Optional[np.ndarray] = None,
     ) -> pd.DataFrame:
         """
-        Get up to n nearest rows (by index), optionally excluding a specific row.
+        Batched counterpart of ``_page`` for the first ``n`` results.
 
-        This returns a pool; de-duplication happens separately.
+        Runs one neighbor search for all rows of ``query_vecs`` and dedupes
+        the combined pool on duplicate-group ids. Queries left with fewer
+        than ``n`` unique tracks are searched again with a doubled pool.
+        Returns a long-format frame with ``query_id`` (row of query_vecs),
+        ``rank`` (0-based), the catalog columns and ``distance``, indexed by
+        catalog row.
         """
-        distances, indices = self.models.query_neighbors(
-            self.X_scaled,
-            query_vec,
-            n_neighbors=n,
-        )
+        n_rows = self.models.n_rows
+        n_groups = int(self.group_ids.max()) + 1 if len(self.group_ids) else 1
+        seed_groups = None if seed_indices is None else self.group_ids[seed_indices]
+
+        pending = np.arange(len(query_vecs))
+        k = min(max(DEFAULT_N_NEIGHBORS, n + 5), n_rows)
+        found: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+        while len(pending):
+            distances, indices = self.models.query_neighbors_batch(query_vecs[pending], k)
+            n_pending, k_got = indices.shape
+            groups = self.group_ids[indices]
+
+            # Drop every copy of the seed track (including the seed row).
+            valid = np.ones(groups.shape, dtype=bool)
+            if seed_groups is not None:
+                valid &= groups != seed_groups[pending][:, None]
+
+            # One key per (query, track); rows are query-major and sorted by
+            # distance, so first occurrence = closest copy.
+            local_qid = np.repeat(np.arange(n_pending), k_got)
+            keys = local_qid * n_groups + groups.ravel()
+            flat = np.flatnonzero(valid.ravel())
+            picked = flat[first_unique_positions(keys[flat])]
+
+            qid = local_qid[picked]
+            counts = np.bincount(qid, minlength=n_pending)
+            done = (counts >= n) | (k_got >= n_rows)
+
+            rank = np.arange(len(picked)) - np.searchsorted(qid, qid)
+            take = done[qid] & (rank < n)
+            found.append(
+                (
+                    pending[qid[take]],
+                    indices.ravel()[picked[take]],
+                    distances.ravel()[picked[take]],
+                )
+            )
+
+            pending = pending[~done]
+            k = min(2 * k, n_rows)
 
-        idx_list: List[int] = []
-        dist_list: List[float] = []
+        query_ids = np.concatenate([f[0] for f in found])
+        rows = np.concatenate([f[1] for f in found])
+        dists = np.concatenate([f[2] for f in found])
 
-        for d, idx in zip(distances, indices):
-            if exclude_index is not None and idx == exclude_index:
-                continue
-            idx_list.append(idx)
-            dist_list.append(d)
-            if len(idx_list) >= n:
-                break
+        order = np.argsort(query_ids, kind="stable")
+        query_ids, rows, dists = query_ids[order], rows[order], dists[order]
 
-        recs = self.df.iloc[idx_list].copy()
-        recs["distance"] = dist_list
+        recs = self.df.iloc[rows].copy()
+        recs.insert(0, "query_id", query_ids)
+        recs.insert(1, "rank", np.arange(len(rows)) - np.searchsorted(query_ids, query_ids))
+        recs["distance"] = dists
         return recs
 
-    def _dedupe_recommendations(
+    def _empty_batch_result(self) -> pd.DataFrame:
+        """Zero-row frame with the columns of a batched result."""
+        recs = self.df.head(0).copy()
+        recs.insert(0, "query_id", pd.Series(dtype=np.intp))
+        recs.insert(1, "rank", pd.Series(dtype=np.intp))
+        recs["distance"] = pd.Series(dtype=float)
+        return recs
+
+    def _neighbor_search(
         self,
-        recs: pd.DataFrame,
-        n: int,
-        seed_key: Optional[Tuple[str, str]] = None,
-    ) -> pd.DataFrame:
+        filters: Optional[TrackFilter],
+    ) -> Tuple[Callable[[np.ndarray, int], Tuple[np.ndarray, np.ndarray]], int]:
         """
-        Remove duplicates based on (track_name, artist) and optionally drop the seed.
+        ``(search, n_candidates)`` for the rows allowed by ``filters``.
 
-        Then keep the closest n by distance.
+        ``search(query_vec, k)`` returns (distances, rows) of up to k allowed
+        rows, closest first. A filter matching at most FILTER_SUBINDEX_FRACTION
+        of the catalog is searched exactly over a BruteForceIndex of just its
+        rows, so selective filters return full lists without touching the
+        rest of the catalog. Broader filters drop disallowed rows from the
+        main index's results. The resolved mask and sub-index are cached
+        per filter.
         """
-        work = recs.copy()
+        if not filters:
+            def search(query_vec: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+                return self.models.query_neighbors(self.X_scaled, query_vec, n_neighbors=k)
+            return search, self.models.n_rows
 
-        # Drop exact seed matches (same track name + artist)
-        if seed_key is not None:
-            seed_name, seed_artist = seed_key
-            work = work[
-                ~(
-                    (work[ID_COL_TRACK_NAME] == seed_name)
-                    & (work[ID_COL_ARTISTS] == seed_artist)
-                )
-            ]
-
-        # Deduplicate by (track_name, artist), keeping the closest (smallest distance)
-        if ID_COL_TRACK_NAME in work.columns and ID_COL_ARTISTS in work.columns:
-            work = (
-                work.sort_values("distance", ascending=True)
-                .drop_duplicates(
-                    subset=[ID_COL_TRACK_NAME, ID_COL_ARTISTS],
-                    keep="first",
-                )
+        resolved = self.filter_cache.get(filters)
+        if resolved is None:
+            allowed = self.filter_index.mask(filters)
+            live = self._live_mask()
+            if live is not None:
+                allowed &= live
+            rows = np.flatnonzero(allowed)
+            sub_index = None
+            if len(rows) <= FILTER_SUBINDEX_FRACTION * self.models.n_rows:
+                sub_index = BruteForceIndex.build(self.X_scaled[rows])
+            resolved = (allowed, rows, sub_index)
+            self.filter_cache.put(filters, resolved)
+        allowed, rows, sub_index = resolved
+
+        if sub_index is not None:
+            def search(query_vec: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+                distances, local = sub_index.kneighbors(np.atleast_2d(query_vec), n_neighbors=k)
+                return distances[0], rows[local[0]]
+            return search, len(rows)
+
+        def search(query_vec: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+            distances, indices = self.models.query_neighbors(
+                self.X_scaled,
+                query_vec,
+                n_neighbors=k,
             )
+            keep = allowed[indices]
+            return distances[keep], indices[keep]
+        return search, self.models.n_rows
+
+    def _iter_neighbor_rows(
+        self,
+        query_vec: np.ndarray,
+        exclude_index: Optional[int] = None,
+        initial_k: int = DEFAULT_N_NEIGHBORS,
+        filters: Optional[TrackFilter] = None,
+    ) -> Iterator[Tuple[int, float]]:
+        """
+        Yield (row, distance) for unique (track_name, artist) pairs, closest first.
+
+        Neighbors are fetched lazily in chunks that double in size, starting at
+        ``initial_k``, only when the consumer asks for more than the current
+        chunk holds. If ``exclude_index`` is given, that row and every other
+        copy of the same track are skipped. Only rows passing ``filters``
+        are yielded (see _neighbor_search).
+        """
+        search, n_rows = self._neighbor_search(filters)
+        if n_rows == 0:
+            return
+
+        # Groups already yielded (or excluded), as one growing array.
+        seen_groups = np.empty(0, dtype=np.int64)
+        if exclude_index is not None:
+            seen_groups = self.group_ids[[exclude_index]]
+
+        k = min(max(initial_k, 1), n_rows)
+        while True:
+            distances, indices = search(query_vec, k)
+            # A larger k returns the previous chunk again (possibly with ties
+            # reordered), so skip already-seen groups rather than positions.
+            with stage("recommender.dedupe"):
+                fresh = first_unique_positions(self.group_ids[indices], skip=seen_groups)
+                seen_groups = np.concatenate([seen_groups, self.group_ids[indices[fresh]]])
+
+            for pos in fresh:
+                yield int(indices[pos]), float(distances[pos])
+
+            if k >= n_rows:
+                return
+            k = min(2 * k, n_rows)
+
+    def _rows_to_result(self, rows_and_distances: List[Tuple[int, float]]) -> Recommendations:
+        """Recommendations for (row, distance) pairs, closest first."""
+        rows = [row for row, _ in rows_and_distances]
+        return Recommendations(self.df, rows, [d for _, d in rows_and_distances])
+
+    def _page(
+        self,
+        query_vec: np.ndarray,
+        offset: int,
+        n: int,
+        exclude_index: Optional[int] = None,
+        filters: Optional[TrackFilter] = None,
+    ) -> Recommendations:
+        """Recommendations ``offset .. offset + n`` for a query vector."""
+        # Start with a slightly larger pool than needed so there is room to dedupe.
+        neighbors = self._iter_neighbor_rows(
+            query_vec,
+            exclude_index=exclude_index,
+            initial_k=max(DEFAULT_N_NEIGHBORS, offset + n + 5),
+            filters=filters,
+        )
+        return self._rows_to_result(list(islice(neighbors, offset, offset + n)))
+
+    def _iter_pages(
+        self,
+        query_vec: np.ndarray,
+        page_size: int,
+        exclude_index: Optional[int] = None,
+        filters: Optional[TrackFilter] = None,
+    ) -> Iterator[Recommendations]:
+        """Yield successive pages of ``page_size`` recommendations."""
+        neighbors = self._iter_neighbor_rows(
+            query_vec,
+            exclude_index=exclude_index,
+            initial_k=max(DEFAULT_N_NEIGHBORS, page_size + 5),
+            filters=filters,
+        )
+        while True:
+            page = list(islice(neighbors, page_size))
+            if not page:
+                return
+            yield self._rows_to_result(page)
+
+    def _mood_overrides(
+        self,
+        energy: float,
+        valence: float,
+        danceability: float,
+        extra_overrides: Optional[Dict[str, float]],
+    ) -> Dict[str, float]:
+        """Combine the basic slider values with optional advanced overrides."""
+        # Always set these three
+        overrides: Dict[str, float] = {
+            "energy": energy,
+            "valence": valence,
+            "danceability": danceability,
+        }
 
-        return work.head(n)
+        # Only merge extras if explicitly passed
+        if extra_overrides is not None:
+            overrides.update(extra_overrides)
+        return overrides
 
     # ---------- public API ----------
 
+    @timed("recommender.search_tracks")
+    def search_tracks(
+        self,
+        name_query: str = "",
+        artist_query: str = "",
+        limit: int = SEARCH_MAX_RESULTS,
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Find unique (track_name, artists) pairs matching the search box input.
+
+        Returns the top ``limit`` matches and the total number of matches.
+        The search index is built on first use.
+        """
+        if self.search_index is None:
+            self.search_index = TrackSearchIndex.build(self._live_df())
+        return self.search_index.search(name_query, artist_query, limit=limit)
+
+    @timed("recommender.recommend_by_track")
     def recommend_by_track(
         self,
         track_name: str,
         n: int = 10,
         artist_hint: Optional[str] = None,
-    ) -> Tuple[Optional[pd.Series], pd.DataFrame]:
+        offset: int = 0,
+        filters: Optional[TrackFilter] = None,
+    ) -> Tuple[Optional[pd.Series], Recommendations]:
         """
         Recommend songs similar to a seed track.
 
+        ``offset`` skips that many recommendations, for paging through
+        results beyond the first ``n``. Pages within the precomputed
+        neighbor graph (if built) are read from it directly. ``filters``
+        restricts results by genre, mood cluster and numeric ranges (see
+        indexes.TrackFilter).
+
         Returns
         -------
-        (seed_row, recommendations_df)
-            If track not found, returns (None, empty_df).
-        """
-        indices = self._get_track_indices_by_name(track_name)
-        if not indices:
-            return None, self.df.head(0).copy()
-
-        # If multiple matches and artist_hint provided, try to pick that
-        if artist_hint:
-            candidates = self.df.loc[indices]
-            mask = candidates[ID_COL_ARTISTS].str.contains(
-                artist_hint,
-                case=False,
-                na=False,
-            )
-            filtered = candidates[mask]
-            if not filtered.empty:
-                seed_idx = int(filtered.index[0])
-            else:
-                seed_idx = indices[0]
-        else:
-            seed_idx = indices[0]
+        (seed_row, recommendations)
+            ``recommendations`` is a results.Recommendations (call
+            ``to_frame()`` for a DataFrame). If the track is not found,
+            returns (None, empty recommendations).
+        """
+        seed_idx = self.name_index.resolve_seed(track_name, artist_hint)
+        if seed_idx is None:
+            return None, Recommendations.empty_like(self.df)
 
         seed_row = self.df.loc[seed_idx]
-        seed_vec = self.X_scaled[seed_idx]
 
-        # Get a slightly larger neighbor pool so we have room to dedupe.
-        pool_size = max(DEFAULT_N_NEIGHBORS, n + 5)
-        pool_recs = self._recommend_from_vector(
-            seed_vec,
-            n=pool_size,
+        if self.neighbor_graph is not None and not filters:
+            hit = self.neighbor_graph.lookup(seed_idx, n=n, offset=offset)
+            if hit is not None:
+                rows, distances = hit
+                return seed_row, Recommendations(self.df, rows, distances)
+
+        recs = self._page(
+            self.X_scaled[seed_idx],
+            offset=offset,
+            n=n,
             exclude_index=seed_idx,
+            filters=filters,
         )
+        return seed_row, recs
 
-        seed_key = (
-            str(seed_row[ID_COL_TRACK_NAME]),
-            str(seed_row[ID_COL_ARTISTS]),
-        )
-        recs = self._dedupe_recommendations(pool_recs, n=n, seed_key=seed_key)
+    def iter_recommendations_by_track(
+        self,
+        track_name: str,
+        page_size: int = 10,
+        artist_hint: Optional[str] = None,
+        filters: Optional[TrackFilter] = None,
+    ) -> Iterator[Recommendations]:
+        """
+        Lazily yield pages of ``recommend_by_track`` results, closest first.
 
-        return seed_row, recs
+        Neighbors are only searched as far as the pages consumed so far need.
+        Yields nothing if the track is not found.
+        """
+        seed_idx = self.name_index.resolve_seed(track_name, artist_hint)
+        if seed_idx is None:
+            return iter(())
+        return self._iter_pages(
+            self.X_scaled[seed_idx],
+            page_size=page_size,
+            exclude_index=seed_idx,
+            filters=filters,
+        )
 
+    @timed("recommender.recommend_by_mood")
     def recommend_by_mood(
         self,
         energy: float,
@@ -218,7 +1019,9 @@ class VibeRecommender:
         danceability: float,
         n: int = 10,
         extra_overrides: Optional[Dict[str, float]] = None,
-    ) -> pd.DataFrame:
+        offset: int = 0,
+        filters: Optional[TrackFilter] = None,
+    ) -> Recommendations:
         """
         Recommend songs close to a mood point.
 
@@ -231,49 +1034,216 @@ class VibeRecommender:
         extra_overrides : dict[str, float] or None
             Optional extra feature values (e.g. acousticness, tempo).
             If None, only the three basic sliders are used.
+        offset : int
+            Number of leading recommendations to skip (for paging).
+        filters : TrackFilter or None
+            Restrict results by genre, mood cluster and numeric ranges.
+
+        Returns
+        -------
+        results.Recommendations
+            Row ids and distances, closest first; ``to_frame()`` gives a
+            DataFrame.
+
+        Basic-slider queries on a lattice point (multiples of
+        MOOD_CACHE_QUANTUM, the slider step) are answered from
+        ``self.mood_lattice`` when one has been built; other results are kept
+        in a bounded LRU cache (``self.mood_cache``, with hit/miss counters).
+        Both return exactly what a search at the given values would; inputs
+        are never rounded. Results are read-only, so cache hits are returned
+        without copying.
         """
-        # Always set these three
-        overrides: Dict[str, float] = {
-            "energy": energy,
-            "valence": valence,
-            "danceability": danceability,
-        }
+        overrides = self._mood_overrides(energy, valence, danceability, extra_overrides)
 
-        # Only merge extras if explicitly passed
-        if extra_overrides is not None:
-            overrides.update(extra_overrides)
+        # Basic sliders only: answer from the precomputed lattice if built.
+        if extra_overrides is None and not filters and self.mood_lattice is not None:
+            hit = self.mood_lattice.lookup(
+                overrides["energy"],
+                overrides["valence"],
+                overrides["danceability"],
+                n=n,
+                offset=offset,
+            )
+            if hit is not None:
+                rows, distances = hit
+                return Recommendations(self.df, rows, distances)
+
+        # Slider input repeats a small set of points; serve those from the cache.
+        key = (_mood_cache_key(overrides), n, offset, filters or None)
+        cached = self.mood_cache.get(key)
+        if cached is not None:
+            return cached
 
         mood_vec = self._build_mood_vector(overrides)
+        recs = self._page(mood_vec, offset=offset, n=n, filters=filters)
+        self.mood_cache.put(key, recs)
+        return recs
 
-        pool_size = max(DEFAULT_N_NEIGHBORS, n + 5)
-        pool_recs = self._recommend_from_vector(
-            mood_vec,
-            n=pool_size,
-            exclude_index=None,
+    def iter_recommendations_by_mood(
+        self,
+        energy: float,
+        valence: float,
+        danceability: float,
+        page_size: int = 10,
+        extra_overrides: Optional[Dict[str, float]] = None,
+        filters: Optional[TrackFilter] = None,
+    ) -> Iterator[Recommendations]:
+        """Lazily yield pages of ``recommend_by_mood`` results, closest first."""
+        overrides = self._mood_overrides(energy, valence, danceability, extra_overrides)
+        return self._iter_pages(
+            self._build_mood_vector(overrides),
+            page_size=page_size,
+            filters=filters,
         )
 
-        recs = self._dedupe_recommendations(pool_recs, n=n, seed_key=None)
-        return recs
+    @timed("recommender.recommend_by_tracks")
+    def recommend_by_tracks(
+        self,
+        track_names: Sequence[str],
+        n: int = 10,
+        artist_hints: Optional[Sequence[Optional[str]]] = None,
+        block_size: int = BATCH_QUERY_BLOCK_SIZE,
+    ) -> pd.DataFrame:
+        """
+        Batched ``recommend_by_track`` for many seeds.
 
-    def describe_clusters(self) -> pd.DataFrame:
-        """Return average feature values per cluster (for interpretability)."""
-        group = self.df.groupby("mood_cluster")[self.feature_columns]
-        summary = group.mean().reset_index()
-        return summary[["mood_cluster"] + self.feature_columns]
+        Parameters
+        ----------
+        track_names : sequence of str
+            Seed track names.
+        n : int
+            Number of recommendations per seed.
+        artist_hints : sequence of (str or None), optional
+            Per-seed artist hint, aligned with ``track_names``.
+        block_size : int
+            Seeds per neighbor search; bounds the size of the candidate pool.
+
+        Returns
+        -------
+        pd.DataFrame
+            Long format: ``query_id`` (position in ``track_names``), ``rank``,
+            catalog columns and ``distance``. Seeds that are not found have no
+            rows.
+        """
+        if artist_hints is None:
+            artist_hints = [None] * len(track_names)
+        if len(artist_hints) != len(track_names):
+            raise ValueError("artist_hints must be aligned with track_names")
+
+        query_id_list: List[int] = []
+        seed_list: List[int] = []
+        for query_id, (name, hint) in enumerate(zip(track_names, artist_hints)):
+            seed_idx = self.name_index.resolve_seed(name, hint)
+            if seed_idx is not None:
+                query_id_list.append(query_id)
+                seed_list.append(seed_idx)
+
+        if not seed_list:
+            return self._empty_batch_result()
+
+        query_ids = np.asarray(query_id_list, dtype=np.intp)
+        seed_indices = np.asarray(seed_list, dtype=np.intp)
+
+        blocks = []
+        for start in range(0, len(seed_indices), block_size):
+            block_seeds = seed_indices[start:start + block_size]
+            recs = self._recommend_batch(
+                self.X_scaled[block_seeds],
+                n=n,
+                seed_indices=block_seeds,
+            )
+            recs["query_id"] = query_ids[start + recs["query_id"].to_numpy()]
+            blocks.append(recs)
+
+        return pd.concat(blocks)
+
+    @timed("recommender.recommend_by_moods")
+    def recommend_by_moods(
+        self,
+        moods: np.ndarray,
+        n: int = 10,
+        columns: Sequence[str] = ("energy", "valence", "danceability"),
+        block_size: int = BATCH_QUERY_BLOCK_SIZE,
+    ) -> pd.DataFrame:
+        """
+        Batched ``recommend_by_mood`` for many mood points.
+
+        Parameters
+        ----------
+        moods : np.ndarray
+            Shape (n_queries, len(columns)); each row is one mood point.
+        n : int
+            Number of recommendations per mood point.
+        columns : sequence of str
+            Feature names for the columns of ``moods``. Defaults to the three
+            basic sliders; add e.g. "acousticness" or "tempo" for the
+            advanced controls. Other features use dataset means.
+        block_size : int
+            Mood points per neighbor search.
+
+        Returns
+        -------
+        pd.DataFrame
+            Long format: ``query_id`` (row of ``moods``), ``rank``, catalog
+            columns and ``distance``.
+        """
+        query_vecs = self._build_mood_matrix(moods, columns)
+        if len(query_vecs) == 0:
+            return self._empty_batch_result()
+
+        blocks = []
+        for start in range(0, len(query_vecs), block_size):
+            recs = self._recommend_batch(query_vecs[start:start + block_size], n=n)
+            recs["query_id"] += start
+            blocks.append(recs)
+
+        return pd.concat(blocks)
+
+    @timed("recommender.describe_clusters")
+    def describe_clusters(self, stat: str = "mean") -> pd.DataFrame:
+        """
+        Return per-cluster feature values (for interpretability).
+
+        ``stat`` is "mean" (average values) or "std" (spread). Both come
+        from the cluster statistics computed when the catalog was built.
+        """
+        stats = self.cluster_stats
+        if stat not in ("mean", "std"):
+            raise ValueError(f"stat must be 'mean' or 'std', got {stat!r}")
+        values = stats.means if stat == "mean" else stats.stds
+        summary = pd.DataFrame(values, columns=self.feature_columns)
+        summary.insert(0, "mood_cluster", stats.labels)
+        return summary
+
+    @timed("recommender.cluster_overview")
+    def cluster_overview(self) -> pd.DataFrame:
+        """Track count and representative track (closest to the centroid) per cluster."""
+        stats = self.cluster_stats
+        medoids = self.df.iloc[stats.medoid_rows]
+        return pd.DataFrame(
+            {
+                "mood_cluster": stats.labels,
+                "n_tracks": stats.counts,
+                "representative_track": medoids[ID_COL_TRACK_NAME].to_numpy(),
+                "representative_artists": medoids[ID_COL_ARTISTS].to_numpy(),
+            }
+        )
 
+    @timed("recommender.sample_cluster_tracks")
     def sample_cluster_tracks(self, cluster_label: int, n: int = 10) -> pd.DataFrame:
         """
         Sample example tracks from a mood cluster.
 
         Returns a dataframe with ID columns, cluster label, and feature values.
+        Draws from the cluster's precomputed row list, so the cost depends on
+        ``n`` rather than the catalog size.
         """
-        subset = self.df[self.df["mood_cluster"] == cluster_label]
-        return subset.sample(n=min(n, len(subset)), random_state=0)[
-            [
-                ID_COL_TRACK_NAME,
-                ID_COL_ARTISTS,
-                ID_COL_GENRE,
-                "mood_cluster",
-            ]
-            + self.feature_columns
-        ]
+        rows = self.cluster_stats.rows_for(cluster_label)
+        pick = np.random.default_rng(0).choice(len(rows), size=min(n, len(rows)), replace=False)
+        columns = [
+            ID_COL_TRACK_NAME,
+            ID_COL_ARTISTS,
+            ID_COL_GENRE,
+            "mood_cluster",
+        ] + self.feature_columns
+        return self.df.iloc[rows[pick]][columns]
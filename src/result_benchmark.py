@@ -0,0 +1,112 @@
+"""Benchmark allocation and time of building recommendation results.
+
+Compares, for the same neighbor rows, the DataFrame path the recommender used
+to take (``df.iloc[rows].copy()``, a ``distance`` column, a cache copy and a
+display copy) with ``results.Recommendations`` alone and with its
+``to_frame`` conversion for the displayed columns. Peak traced memory is
+measured with ``tracemalloc``; times are measured separately, untraced.
+
+Usage (from the project root):
+
+    python src/result_benchmark.py data/spotify_tracks.csv --queries 200 --n 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config import ID_COL_ARTISTS, ID_COL_GENRE, ID_COL_TRACK_ID, ID_COL_TRACK_NAME, RANDOM_STATE
+from preprocess import DEDUPE_KEYS
+from recommender import VibeRecommender
+from results import Recommendations
+
+DISPLAY_COLUMNS: List[str] = [
+    ID_COL_TRACK_NAME,
+    ID_COL_ARTISTS,
+    ID_COL_GENRE,
+    "mood_cluster",
+    "distance",
+    ID_COL_TRACK_ID,
+]
+
+
+def _legacy_frame(df: pd.DataFrame, rows: np.ndarray, distances: np.ndarray) -> pd.DataFrame:
+    recs = df.iloc[rows].copy()
+    recs["distance"] = distances
+    recs = recs.copy()  # copy handed out by the mood cache
+    recs = recs.copy()  # copy taken by render_recs_table
+    return recs[[c for c in DISPLAY_COLUMNS if c in recs.columns]]
+
+
+def _measure(build: Callable[[np.ndarray, np.ndarray], object], cases) -> Dict[str, float]:
+    """Mean peak traced bytes and microseconds per result over ``cases``."""
+    peaks = []
+    tracemalloc.start()
+    for rows, distances in cases:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = build(rows, distances)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        del result
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for rows, distances in cases:
+        build(rows, distances)
+    elapsed = time.perf_counter() - start
+    return {
+        "peak_bytes": float(np.mean(peaks)),
+        "us_per_result": 1e6 * elapsed / len(cases),
+    }
+
+
+def run_benchmark(rec: VibeRecommender, n_queries: int, n: int) -> Dict[str, Dict[str, float]]:
+    """Measure the three result paths on ``n_queries`` random seed tracks."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    seeds = rng.choice(rec.models.n_rows, size=min(n_queries, rec.models.n_rows), replace=False)
+    cases = []
+    for seed in seeds:
+        distances, rows = rec.models.query_neighbors(rec.X_scaled, rec.X_scaled[seed], n + 1)
+        cases.append((rows[1:], distances[1:]))
+
+    df = rec.df
+    columns = [c for c in DISPLAY_COLUMNS if c in df.columns or c == "distance"]
+    return {
+        "dataframe_copies": _measure(lambda r, d: _legacy_frame(df, r, d), cases),
+        "recommendations": _measure(lambda r, d: Recommendations(df, r, d), cases),
+        "recommendations_to_frame": _measure(
+            lambda r, d: Recommendations(df, r, d).to_frame(columns), cases
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_path")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n", type=int, default=10, help="recommendations per query")
+    parser.add_argument("--dedupe", choices=sorted(DEDUPE_KEYS), default="track_id")
+    parser.add_argument("--json", help="Also write the results to this path")
+    args = parser.parse_args()
+
+    rec = VibeRecommender.from_csv(args.csv_path, dedupe=args.dedupe)
+    results = run_benchmark(rec, args.queries, args.n)
+
+    print(f"{'path':>26} {'peak KiB':>10} {'us/result':>10}")
+    for name, r in results.items():
+        print(f"{name:>26} {r['peak_bytes'] / 1024:>10.1f} {r['us_per_result']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
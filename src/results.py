@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Any, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _read_only(values: np.ndarray, dtype: type) -> np.ndarray:
+    arr = np.array(values, dtype=dtype)  # own the data, so freezing it is safe
+    arr.flags.writeable = False
+    return arr
+
+
+class Recommendation:
+    """One recommended track: a catalog row id plus its query distance."""
+
+    __slots__ = ("_catalog", "row", "distance")
+
+    def __init__(self, catalog: pd.DataFrame, row: int, distance: float) -> None:
+        self._catalog = catalog
+        self.row = row
+        self.distance = distance
+
+    def __getitem__(self, column: str) -> Any:
+        if column == "distance":
+            return self.distance
+        return self._catalog[column].iat[self.row]
+
+    def get(self, column: str, default: Any = None) -> Any:
+        """Column value for this track, or ``default`` if there is no such column."""
+        if column != "distance" and column not in self._catalog.columns:
+            return default
+        return self[column]
+
+    def __repr__(self) -> str:
+        return f"Recommendation(row={self.row}, distance={self.distance:.4f})"
+
+
+class Recommendations:
+    """
+    Ranked recommendations as parallel arrays of catalog rows and distances.
+
+    Only the two arrays are allocated per query; track metadata is read from
+    the shared catalog frame on demand (``column``, iteration, indexing), so
+    categorical columns such as ``artists`` are taken as codes rather than
+    copied as strings. ``to_frame`` builds a DataFrame for display code. The
+    arrays are read-only, so one instance can be cached and returned to
+    several callers without copying.
+    """
+
+    __slots__ = ("catalog", "rows", "distances")
+
+    def __init__(
+        self,
+        catalog: pd.DataFrame,
+        rows: Sequence[int],
+        distances: Sequence[float],
+    ) -> None:
+        self.catalog = catalog
+        self.rows = _read_only(rows, np.intp)
+        self.distances = _read_only(distances, np.float64)
+        if self.rows.shape != self.distances.shape:
+            raise ValueError("rows and distances must have the same length")
+
+    @classmethod
+    def empty_like(cls, catalog: pd.DataFrame) -> "Recommendations":
+        """A result with no tracks."""
+        return cls(catalog, [], [])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.rows) == 0
+
+    def __iter__(self) -> Iterator[Recommendation]:
+        for row, distance in zip(self.rows.tolist(), self.distances.tolist()):
+            yield Recommendation(self.catalog, row, distance)
+
+    def __getitem__(self, i: int) -> Recommendation:
+        return Recommendation(self.catalog, int(self.rows[i]), float(self.distances[i]))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Recommendations):
+            return NotImplemented
+        return (
+            self.catalog is other.catalog
+            and np.array_equal(self.rows, other.rows)
+            and np.array_equal(self.distances, other.distances)
+        )
+
+    __hash__ = None  # mutable catalog reference; compare by value only
+
+    def __repr__(self) -> str:
+        return f"Recommendations(n={len(self)}, rows={self.rows.tolist()})"
+
+    def head(self, n: int) -> "Recommendations":
+        """The first ``n`` recommendations (array views, no copy)."""
+        out = object.__new__(Recommendations)
+        out.catalog = self.catalog
+        out.rows = self.rows[:n]
+        out.distances = self.distances[:n]
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of one catalog column (or ``"distance"``) for these tracks."""
+        if name == "distance":
+            return self.distances
+        return np.asarray(self.catalog[name].array.take(self.rows))
+
+    def to_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        DataFrame of the recommended rows, indexed by catalog row label.
+
+        ``columns`` selects catalog columns (default: all); a ``distance``
+        column is always appended.
+        """
+        if columns is None:
+            columns = list(self.catalog.columns)
+        data = {
+            col: self.catalog[col].array.take(self.rows)
+            for col in columns
+            if col != "distance"
+        }
+        data["distance"] = self.distances
+        return pd.DataFrame(data, index=self.catalog.index[self.rows])
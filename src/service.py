@@ -0,0 +1,542 @@
+"""Local JSON recommendation service with micro-batched neighbor search.
+
+Serves the shared VibeRecommender over HTTP without Streamlit:
+
+    POST /recommend/track   {"track_name": str, "artist": str?, "n": int?}
+    POST /recommend/mood    {"energy": f, "valence": f, "danceability": f, "n": int?,
+                             ...optional extra features such as "tempo"}
+    GET  /clusters                      cluster summaries (describe_clusters)
+    GET  /clusters/<label>/sample?n=30  example tracks (sample_cluster_tracks)
+    GET  /health
+
+With ``--watch``, edits to the CSV are rebuilt in the background and
+swapped in without a restart (see hot_reload.py).
+
+Concurrent track (or mood) requests that arrive within
+SERVICE_BATCH_WINDOW_MS are collected into one ``recommend_by_tracks`` (or
+``recommend_by_moods``) call, so one neighbor search serves the whole
+batch. Requests that a prebuilt mood lattice or neighbor graph can answer
+(see build_artifacts.py) are served from it directly and skip the search,
+as in the single-query API. All recommender work runs on a pool of
+SERVICE_WORKERS threads, and the event loop only parses HTTP and routes
+results. The HTTP/1.1 handling (with keep-alive) is built on
+``asyncio.start_server``, so no extra dependencies are needed.
+
+Usage (from the project root):
+
+    python src/service.py data/spotify_tracks.csv --port 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DEFAULT_INGEST_CACHE_DIR,
+    DEFAULT_SNAPSHOT_DIR,
+    ID_COL_ARTISTS,
+    ID_COL_GENRE,
+    ID_COL_TRACK_ID,
+    ID_COL_TRACK_NAME,
+    SERVICE_BATCH_WINDOW_MS,
+    SERVICE_HOST,
+    SERVICE_MAX_BATCH,
+    SERVICE_MAX_BODY_BYTES,
+    SERVICE_MAX_N,
+    SERVICE_PORT,
+    SERVICE_WORKERS,
+)
+from hot_reload import ReloadingLoader
+from recommender import VibeRecommender
+from results import Recommendations
+
+# Catalog columns returned for each recommended track
+RESULT_COLUMNS: List[str] = [
+    ID_COL_TRACK_ID,
+    ID_COL_TRACK_NAME,
+    ID_COL_ARTISTS,
+    ID_COL_GENRE,
+    "mood_cluster",
+]
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """Error with the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _json_safe(value: Any) -> Any:
+    """Plain JSON types with NaN and infinities as None (null)."""
+    if isinstance(value, dict):
+        return {key: _json_safe(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _json_safe(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _records(df: pd.DataFrame, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    cols = [c for c in columns if c in df.columns]
+    return df[cols].to_dict("records")
+
+
+class MicroBatcher:
+    """
+    Collect items submitted within ``window_s`` into one ``run_batch`` call.
+
+    ``run_batch(items)`` runs on ``executor`` and returns one result per
+    item, in order; a result that is an Exception is raised to that item's
+    caller only. A batch is flushed when the window closes or when it
+    reaches ``max_batch`` items. Up to ``max_in_flight`` batches run at once;
+    past that, new items keep collecting and go out together as soon as one
+    finishes, so batches grow with load instead of queueing up behind each
+    other. Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], List[Any]],
+        executor: ThreadPoolExecutor,
+        window_s: float = SERVICE_BATCH_WINDOW_MS / 1000.0,
+        max_batch: int = SERVICE_MAX_BATCH,
+        max_in_flight: int = SERVICE_WORKERS,
+    ) -> None:
+        self.run_batch = run_batch
+        self.executor = executor
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight
+        self.n_batches = 0
+        self.n_items = 0
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight = 0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if self._in_flight >= self.max_in_flight:
+            pass  # sent when a running batch finishes
+        elif len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending and self._in_flight < self.max_in_flight:
+            batch = self._pending[:self.max_batch]
+            self._pending = self._pending[self.max_batch:]
+            self._start(batch)
+
+    def _start(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        self._in_flight += 1
+        self.n_batches += 1
+        self.n_items += len(batch)
+
+        loop = asyncio.get_running_loop()
+        items = [item for item, _ in batch]
+        done = loop.run_in_executor(self.executor, self.run_batch, items)
+
+        def deliver(task: asyncio.Future) -> None:
+            self._in_flight -= 1
+            if self._pending:
+                self._flush()
+            error = task.exception()
+            results = [error] * len(batch) if error is not None else task.result()
+            for (_, future), result in zip(batch, results):
+                if future.done():  # caller went away
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+        done.add_done_callback(deliver)
+
+
+def _read_int(
+    params: Dict[str, Any],
+    key: str,
+    default: int,
+    maximum: int = SERVICE_MAX_N,
+) -> int:
+    value = params.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise HTTPError(400, f"{key!r} must be a positive integer")
+    # Results are built and serialized on a shared worker thread.
+    if value > maximum:
+        raise HTTPError(400, f"{key!r} must be at most {maximum}")
+    return value
+
+
+def _read_float(params: Dict[str, Any], key: str) -> float:
+    value = params.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise HTTPError(400, f"{key!r} must be a number")
+    return float(value)
+
+
+class RecommendationService:
+    """
+    Routes JSON requests to a VibeRecommender through per-endpoint batchers.
+
+    ``rec`` is either a recommender or a ReloadingLoader. With a loader,
+    each batch uses whichever version is current when it starts.
+    """
+
+    BASIC_MOOD = ("energy", "valence", "danceability")
+
+    def __init__(
+        self,
+        rec: Union[VibeRecommender, ReloadingLoader],
+        workers: int = SERVICE_WORKERS,
+        window_ms: float = SERVICE_BATCH_WINDOW_MS,
+        max_batch: int = SERVICE_MAX_BATCH,
+    ) -> None:
+        self.source = rec
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recommend")
+        self.window_s = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.track_batcher = self._batcher(self._run_track_batch)
+        # Mood requests are batched per set of feature columns they set.
+        self.mood_batchers: Dict[Tuple[str, ...], MicroBatcher] = {}
+        self.started = time.time()
+        self.n_requests = 0
+
+    @property
+    def rec(self) -> VibeRecommender:
+        if isinstance(self.source, ReloadingLoader):
+            return self.source.recommender
+        return self.source
+
+    def _batcher(self, run_batch: Callable[[List[Any]], List[Any]]) -> MicroBatcher:
+        return MicroBatcher(
+            run_batch, self.executor, self.window_s, self.max_batch, self.workers
+        )
+
+    # ---------- batch workers (run on the thread pool) ----------
+
+    def _run_track_batch(self, items: List[Dict[str, Any]]) -> List[Any]:
+        rec = self.rec
+        seeds = [rec.name_index.resolve_seed(it["track_name"], it["artist"]) for it in items]
+        results: List[Any] = [None] * len(items)
+        pending = []
+        for i, (item, seed_idx) in enumerate(zip(items, seeds)):
+            if seed_idx is None:
+                results[i] = HTTPError(404, f"Track not found: {item['track_name']!r}")
+                continue
+            # A prebuilt neighbor graph answers a seed without searching.
+            hit = None
+            if rec.neighbor_graph is not None:
+                hit = rec.neighbor_graph.lookup(seed_idx, n=item["n"])
+            if hit is None:
+                pending.append(i)
+            else:
+                results[i] = self._track_result(rec, seed_idx, Recommendations(rec.df, *hit))
+
+        # The rest share one batched neighbor search.
+        if pending:
+            recs = rec.recommend_by_tracks(
+                [items[i]["track_name"] for i in pending],
+                n=max(items[i]["n"] for i in pending),
+                artist_hints=[items[i]["artist"] for i in pending],
+            )
+            bounds = np.searchsorted(recs["query_id"].to_numpy(), np.arange(len(pending) + 1))
+            for j, i in enumerate(pending):
+                rows = recs.iloc[bounds[j]:bounds[j + 1]].head(items[i]["n"])
+                results[i] = self._track_result(rec, seeds[i], rows)
+        return results
+
+    @staticmethod
+    def _track_result(
+        rec: VibeRecommender,
+        seed_idx: int,
+        recs: Union[pd.DataFrame, Recommendations],
+    ) -> Dict[str, Any]:
+        if isinstance(recs, Recommendations):
+            recs = recs.to_frame()
+        return {
+            "seed": _records(rec.df.iloc[[seed_idx]], RESULT_COLUMNS)[0],
+            "results": _records(recs, RESULT_COLUMNS + ["distance"]),
+        }
+
+    def _run_mood_batch(
+        self,
+        columns: Tuple[str, ...],
+        items: List[Dict[str, Any]],
+    ) -> List[Any]:
+        rec = self.rec
+        results: List[Any] = [None] * len(items)
+        pending = list(range(len(items)))
+        # Basic-slider points on the precomputed lattice are a table lookup.
+        basic = self.BASIC_MOOD
+        if set(columns) == set(basic) and rec.mood_lattice is not None:
+            pending = []
+            for i, it in enumerate(items):
+                hit = rec.mood_lattice.lookup(*(it["values"][c] for c in basic), n=it["n"])
+                if hit is None:
+                    pending.append(i)
+                else:
+                    recs = Recommendations(rec.df, *hit).to_frame()
+                    results[i] = {"results": _records(recs, RESULT_COLUMNS + ["distance"])}
+
+        if pending:
+            moods = np.array(
+                [[items[i]["values"][c] for c in columns] for i in pending], dtype=float
+            )
+            recs = rec.recommend_by_moods(
+                moods,
+                n=max(items[i]["n"] for i in pending),
+                columns=columns,
+            )
+            bounds = np.searchsorted(recs["query_id"].to_numpy(), np.arange(len(pending) + 1))
+            for j, i in enumerate(pending):
+                rows = recs.iloc[bounds[j]:bounds[j + 1]].head(items[i]["n"])
+                results[i] = {"results": _records(rows, RESULT_COLUMNS + ["distance"])}
+        return results
+
+    def _run_sample(self, cluster: int, n: int) -> Dict[str, Any]:
+        rec = self.rec
+        if len(rec.cluster_stats.rows_for(cluster)) == 0:
+            raise HTTPError(404, f"Unknown cluster: {cluster}")
+        samples = rec.sample_cluster_tracks(cluster_label=cluster, n=n)
+        return {"cluster": cluster, "tracks": samples.to_dict("records")}
+
+    # ---------- request handling (event loop) ----------
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def handle(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        """Answer one request with (status, JSON-serializable payload)."""
+        self.n_requests += 1
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        parts = path.strip("/").split("/")
+
+        if path == "/health":
+            return 200, {
+                "status": "ok",
+                "catalog_version": getattr(self.source, "version", 1),
+                "uptime_s": time.time() - self.started,
+                "requests": self.n_requests,
+                "track_batches": self.track_batcher.n_batches,
+                "track_items": self.track_batcher.n_items,
+                "mood_batches": sum(b.n_batches for b in self.mood_batchers.values()),
+                "mood_items": sum(b.n_items for b in self.mood_batchers.values()),
+            }
+
+        if path == "/recommend/track":
+            params = self._json_body(method, body)
+            name = params.get("track_name")
+            if not isinstance(name, str) or not name.strip():
+                raise HTTPError(400, "'track_name' must be a non-empty string")
+            artist = params.get("artist")
+            if artist is not None and not isinstance(artist, str):
+                raise HTTPError(400, "'artist' must be a string")
+            item = {"track_name": name, "artist": artist, "n": _read_int(params, "n", 10)}
+            return 200, await self.track_batcher.submit(item)
+
+        if path == "/recommend/mood":
+            params = self._json_body(method, body)
+            n = _read_int(params, "n", 10)
+            values = {key: _read_float(params, key) for key in self.BASIC_MOOD}
+            for key in params:
+                if key in values or key == "n":
+                    continue
+                if key not in self.rec.feature_columns:
+                    raise HTTPError(400, f"Unknown feature: {key!r}")
+                values[key] = _read_float(params, key)
+            # Same feature set, same batcher, whatever order the keys came in.
+            columns = tuple(sorted(values))
+            batcher = self.mood_batchers.get(columns)
+            if batcher is None:
+                batcher = self._batcher(
+                    lambda items, cols=columns: self._run_mood_batch(cols, items)
+                )
+                self.mood_batchers[columns] = batcher
+            return 200, await batcher.submit({"values": values, "n": n})
+
+        if parts[0] == "clusters" and method == "GET":
+            if len(parts) == 1:
+                summary = await self._run(self.rec.describe_clusters)
+                return 200, {"clusters": summary.to_dict("records")}
+            if len(parts) == 3 and parts[2] == "sample":
+                try:
+                    cluster = int(parts[1])
+                    n = int(parse_qs(url.query).get("n", ["10"])[0])
+                except ValueError:
+                    raise HTTPError(400, "cluster label and n must be integers") from None
+                n = _read_int({"n": n}, "n", 10)
+                return 200, await self._run(self._run_sample, cluster, n)
+
+        raise HTTPError(404, f"No route for {method} {url.path}")
+
+    @staticmethod
+    def _json_body(method: str, body: bytes) -> Dict[str, Any]:
+        if method != "POST":
+            raise HTTPError(405, "Use POST with a JSON body")
+        try:
+            params = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON") from None
+        if not isinstance(params, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return params
+
+    async def serve_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """HTTP/1.1 loop for one connection (keep-alive until the client closes)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "Invalid Content-Length"}, False)
+                    break
+                if length > SERVICE_MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self.handle(method.upper(), target, body)
+                except HTTPError as exc:
+                    status, payload = exc.status, {"error": str(exc)}
+                except Exception as exc:  # keep serving other requests
+                    status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Any,
+        keep_alive: bool,
+    ) -> None:
+        body = json.dumps(_json_safe(payload), allow_nan=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    def warm_up(self) -> None:
+        """Run one query so lazily started index state exists before serving."""
+        self._run_mood_batch(self.BASIC_MOOD, [{"values": dict.fromkeys(self.BASIC_MOOD, 0.5),
+                                                "n": 1}])
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+async def serve(
+    service: RecommendationService,
+    host: str = SERVICE_HOST,
+    port: int = SERVICE_PORT,
+) -> None:
+    """Serve until cancelled."""
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving recommendations on {addresses}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_path", nargs="?", default="data/spotify_tracks.csv")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR)
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    parser.add_argument("--window-ms", type=float, default=SERVICE_BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=SERVICE_MAX_BATCH)
+    parser.add_argument("--watch", action="store_true",
+                        help="hot-reload the catalog when the CSV changes")
+    args = parser.parse_args()
+
+    # Same snapshot and ingest settings as the Streamlit app.
+    build_kwargs = {"dedupe": "track_id", "ingest_cache_dir": DEFAULT_INGEST_CACHE_DIR}
+    if args.watch:
+        source = ReloadingLoader(args.csv_path, args.snapshot_dir, **build_kwargs).start()
+        source.wait()
+    else:
+        source = VibeRecommender.load_or_build(args.csv_path, args.snapshot_dir, **build_kwargs)
+    service = RecommendationService(
+        source,
+        workers=args.workers,
+        window_ms=args.window_ms,
+        max_batch=args.max_batch,
+    )
+    service.warm_up()
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark how sharded neighbor search scales with the number of worker processes.
+
+Times ``ShardedIndex.kneighbors`` on a random catalog for each (n_shards,
+batch size) pair, next to the single-process ``BruteForceIndex``, and reports
+queries per second and the speedup over one shard.
+
+Usage (from the project root):
+
+    python src/shard_benchmark.py --rows 1000000 --shards 1 2 4 8 --batches 1 64 1024
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Dict, List
+
+import numpy as np
+
+from config import DEFAULT_N_NEIGHBORS, FEATURE_COLUMNS, RANDOM_STATE
+from knn_benchmark import _time_queries
+from models import BruteForceIndex, ShardedIndex
+
+
+def run_benchmark(
+    n_rows: int,
+    shards: List[int],
+    batches: List[int],
+    k: int = DEFAULT_N_NEIGHBORS,
+    n_features: int = len(FEATURE_COLUMNS),
+    min_seconds: float = 0.5,
+) -> List[Dict[str, object]]:
+    """Return one record per (n_shards, batch_size) with queries/s."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    X = rng.standard_normal((n_rows, n_features)).astype(np.float32)
+    query_sets = {b: rng.standard_normal((b, n_features)).astype(np.float32) for b in batches}
+
+    brute = BruteForceIndex.build(X)
+    brute_qps = {
+        b: 1000.0 / _time_queries(brute.kneighbors, q, k, min_seconds)
+        for b, q in query_sets.items()
+    }
+
+    results: List[Dict[str, object]] = []
+    base_qps: Dict[int, float] = {}
+    for n_shards in shards:
+        index = ShardedIndex.build(X, n_shards)
+        try:
+            for batch, queries in query_sets.items():
+                qps = 1000.0 / _time_queries(index.kneighbors, queries, k, min_seconds)
+                base_qps.setdefault(batch, qps)
+                results.append(
+                    {
+                        "n_rows": n_rows,
+                        "n_shards": index.n_shards,
+                        "batch_size": batch,
+                        "queries_per_s": qps,
+                        "brute_queries_per_s": brute_qps[batch],
+                        "speedup_vs_first": qps / base_qps[batch],
+                    }
+                )
+        finally:
+            index.close()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 64, 1024])
+    parser.add_argument("--k", type=int, default=DEFAULT_N_NEIGHBORS)
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    parser.add_argument("--json", help="Also write the results to this path")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        args.rows, args.shards, args.batches, k=args.k, min_seconds=args.min_seconds
+    )
+
+    print(f"{'shards':>6} {'batch':>6} {'queries/s':>11} {'brute q/s':>11} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['n_shards']:>6} {r['batch_size']:>6} {r['queries_per_s']:>11.1f} "
+            f"{r['brute_queries_per_s']:>11.1f} {r['speedup_vs_first']:>8.2f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
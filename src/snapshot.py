@@ -0,0 +1,194 @@
+"""On-disk snapshot format for a fitted VibeRecommender.
+
+A snapshot is a directory containing:
+
+- ``manifest.json``  format version, source CSV checksum, scaler parameters,
+  and the generation of the data files below
+- ``X_scaled.npy``   scaled feature matrix (memory-mappable)
+- ``mood_cluster.npy`` cluster label per row
+- ``catalog.pkl``    metadata dataframe (without the cluster column)
+- ``models.joblib``  fitted KMeans + NearestNeighbors
+- ``cluster_stats.npz`` per-cluster summaries and row lists
+- ``filter_index.npz`` per-genre/per-cluster row lists and sorted columns
+- ``mood_lattice_*.npy`` optional precomputed basic-slider answers
+
+Each save writes its data files under new names tagged with a fresh
+generation (``X_scaled.<generation>.npy``), then replaces the manifest, and
+only then deletes the previous generation's files. The manifest replace is
+the commit point: a save interrupted before it leaves the previous snapshot
+intact and readable, and its stray files are deleted by the next save. A
+process that has the previous snapshot memory-mapped keeps reading the old
+(unlinked) data.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import sklearn
+from sklearn.preprocessing import StandardScaler
+
+SNAPSHOT_FORMAT_VERSION: int = 3
+
+MANIFEST_FILE: str = "manifest.json"
+X_SCALED_FILE: str = "X_scaled.npy"
+LABELS_FILE: str = "mood_cluster.npy"
+CATALOG_FILE: str = "catalog.pkl"
+MODELS_FILE: str = "models.joblib"
+CLUSTER_STATS_FILE: str = "cluster_stats.npz"
+FILTER_INDEX_FILE: str = "filter_index.npz"
+LATTICE_ROWS_FILE: str = "mood_lattice_rows.npy"
+LATTICE_DISTANCES_FILE: str = "mood_lattice_distances.npy"
+
+# Files stored per generation (see generation_file)
+DATA_FILES: List[str] = [
+    X_SCALED_FILE,
+    LABELS_FILE,
+    CATALOG_FILE,
+    MODELS_FILE,
+    CLUSTER_STATS_FILE,
+    FILTER_INDEX_FILE,
+    LATTICE_ROWS_FILE,
+    LATTICE_DISTANCES_FILE,
+]
+
+_CHECKSUM_CHUNK_BYTES: int = 1 << 20
+
+
+class StaleSnapshotError(ValueError):
+    """Raised when a snapshot does not match its source CSV or environment."""
+
+
+def file_checksum(path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_CHECKSUM_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def atomic_output(path: str) -> Iterator[str]:
+    """Yield a temporary path next to ``path``; rename it over ``path`` on success."""
+    tmp_path = f"{path}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def new_generation() -> str:
+    """A fresh tag for the data files of one save."""
+    return uuid.uuid4().hex[:12]
+
+
+def generation_file(name: str, generation: str) -> str:
+    """``name`` tagged with ``generation``: ``X_scaled.npy`` -> ``X_scaled.<generation>.npy``."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{generation}{ext}"
+
+
+def snapshot_file(path: str, manifest: Dict[str, Any], name: str) -> str:
+    """Path of data file ``name`` in the generation ``manifest`` points to."""
+    return os.path.join(path, generation_file(name, manifest["generation"]))
+
+
+def remove_other_generations(path: str, generation: str) -> None:
+    """
+    Delete every data file in ``path`` not of ``generation``.
+
+    That is the previous snapshot's files, those of interrupted saves
+    (including leftover ``.tmp`` files) and untagged files from format 1.
+    """
+    patterns = []
+    for name in DATA_FILES:
+        stem, ext = os.path.splitext(name)
+        patterns.append(re.compile(rf"{re.escape(stem)}(\.[0-9a-f]+)?{re.escape(ext)}(\.tmp)?"))
+    keep = {generation_file(name, generation) for name in DATA_FILES}
+    for entry in os.listdir(path):
+        if entry not in keep and any(p.fullmatch(entry) for p in patterns):
+            os.remove(os.path.join(path, entry))
+
+
+def save_array(path: str, array: np.ndarray) -> None:
+    """Atomically write ``array`` as a .npy file (loadable with mmap_mode)."""
+    with atomic_output(path) as tmp_path, open(tmp_path, "wb") as fh:
+        np.save(fh, np.ascontiguousarray(array))
+
+
+def scaler_to_dict(scaler: StandardScaler) -> Dict[str, Any]:
+    """Serialize the fitted parameters of a StandardScaler to plain lists."""
+    return {
+        "mean": scaler.mean_.tolist(),
+        "scale": scaler.scale_.tolist(),
+        "var": scaler.var_.tolist(),
+        "n_samples_seen": int(np.asarray(scaler.n_samples_seen_).max()),
+    }
+
+
+def scaler_from_dict(params: Dict[str, Any]) -> StandardScaler:
+    """Rebuild a fitted StandardScaler from ``scaler_to_dict`` output."""
+    scaler = StandardScaler()
+    scaler.mean_ = np.asarray(params["mean"], dtype=float)
+    scaler.scale_ = np.asarray(params["scale"], dtype=float)
+    scaler.var_ = np.asarray(params["var"], dtype=float)
+    scaler.n_samples_seen_ = int(params["n_samples_seen"])
+    scaler.n_features_in_ = len(scaler.mean_)
+    return scaler
+
+
+def write_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    """Write the manifest, stamping format and sklearn versions."""
+    manifest = dict(manifest)
+    manifest["format_version"] = SNAPSHOT_FORMAT_VERSION
+    manifest["sklearn_version"] = sklearn.__version__
+    with atomic_output(os.path.join(path, MANIFEST_FILE)) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2)
+
+
+def manifest_serves(manifest: Dict[str, Any], checksum: str) -> bool:
+    """
+    Whether the snapshot should serve the CSV with ``checksum``.
+
+    True for the CSV it was built from, and for the one it was pinned to when
+    a hot reload of that CSV was rolled back (see hot_reload.py).
+    """
+    return checksum in (manifest["source_checksum"], manifest.get("pinned_checksum"))
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """
+    Read and validate a snapshot manifest.
+
+    Raises StaleSnapshotError if the snapshot was written by a different
+    format version or scikit-learn release (pickled models may not load).
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"No snapshot manifest at {manifest_path}")
+
+    with open(manifest_path, "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise StaleSnapshotError(
+            f"Snapshot format {manifest.get('format_version')} != "
+            f"{SNAPSHOT_FORMAT_VERSION}"
+        )
+    if manifest.get("sklearn_version") != sklearn.__version__:
+        raise StaleSnapshotError(
+            f"Snapshot built with scikit-learn {manifest.get('sklearn_version')}, "
+            f"running {sklearn.__version__}"
+        )
+    return manifest
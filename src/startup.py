@@ -0,0 +1,211 @@
+"""Staged, non-blocking construction of the app's VibeRecommender.
+
+``StartupLoader.start()`` returns at once and builds on a background thread
+in two stages:
+
+1. Track metadata is read and the seed-track search index is built, so the
+   search box works within seconds. The metadata comes from the snapshot's
+   catalog if the snapshot is current, otherwise from the CSV's name and
+   artist columns. Status becomes SEARCH_READY.
+2. The full recommender is built with ``VibeRecommender.load_or_build``,
+   which loads the snapshot or fits the models. Status becomes READY (or
+   FAILED, with ``error`` set).
+
+Heavy modules (pandas, scikit-learn, the recommender) are imported on that
+thread, so importing this module stays cheap. ``timings`` records seconds
+from construction to each stage. ``search_ready`` is the time to first
+interaction.
+
+Usage (from the project root), to measure startup without the UI:
+
+    python src/startup.py data/spotify_tracks.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from config import (
+    DEFAULT_INGEST_CACHE_DIR,
+    DEFAULT_SNAPSHOT_DIR,
+    FEATURE_COLUMNS,
+    ID_COL_ARTISTS,
+    ID_COL_TRACK_NAME,
+    SEARCH_MAX_RESULTS,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from indexes import TrackSearchIndex
+    from recommender import VibeRecommender
+
+# Startup states, in order (FAILED can follow any of them)
+STARTING = "starting"
+SEARCH_READY = "search_ready"
+READY = "ready"
+FAILED = "failed"
+
+
+def load_search_index(
+    csv_path: str,
+    snapshot_dir: str,
+    source_checksum: Optional[str] = None,
+    feature_columns: Optional[List[str]] = None,
+) -> "TrackSearchIndex":
+    """
+    Seed-track search index from the cheapest current source of metadata.
+
+    The search only needs unique (track_name, artists) pairs, which do not
+    depend on how the catalog is deduped, so a current snapshot's catalog
+    and the CSV give the same index. From the CSV, rows missing any of
+    ``feature_columns`` (default FEATURE_COLUMNS) are dropped as in
+    preprocessing, so every track found can also be recommended.
+    ``source_checksum`` avoids re-hashing the CSV when the caller has it.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from indexes import TrackSearchIndex
+    from snapshot import (
+        CATALOG_FILE,
+        file_checksum,
+        manifest_serves,
+        read_manifest,
+        snapshot_file,
+    )
+
+    if feature_columns is None:
+        feature_columns = FEATURE_COLUMNS
+    columns = [ID_COL_TRACK_NAME, ID_COL_ARTISTS]
+    df = None
+    try:
+        manifest = read_manifest(snapshot_dir)
+        if source_checksum is None:
+            source_checksum = file_checksum(csv_path)
+        if manifest_serves(manifest, source_checksum):
+            df = pd.read_pickle(snapshot_file(snapshot_dir, manifest, CATALOG_FILE))[columns]
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+    if df is None:
+        dtypes: Dict[str, object] = {c: np.float32 for c in feature_columns}
+        dtypes[ID_COL_ARTISTS] = "category"
+        df = pd.read_csv(csv_path, usecols=columns + list(feature_columns), dtype=dtypes)
+        # Same filter as preprocess.clean_and_select_features
+        df = df.dropna(subset=feature_columns)[columns]
+    return TrackSearchIndex.build(df)
+
+
+class StartupLoader:
+    """Background two-stage build of the recommender with a readiness state."""
+
+    def __init__(
+        self,
+        csv_path: str,
+        snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+        **build_kwargs: Any,
+    ) -> None:
+        self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir
+        self.build_kwargs = build_kwargs
+        self.status = STARTING
+        self.error: Optional[BaseException] = None
+        self.search_index: Optional["TrackSearchIndex"] = None
+        self.recommender: Optional["VibeRecommender"] = None
+        self.timings: Dict[str, float] = {}
+        self._created = time.perf_counter()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vibe-startup", daemon=True)
+
+    def start(self) -> "StartupLoader":
+        self._thread.start()
+        return self
+
+    def _mark(self, stage: str) -> None:
+        self.timings[stage] = time.perf_counter() - self._created
+
+    def _run(self) -> None:
+        try:
+            from snapshot import file_checksum
+
+            # Hashed once here; both stages need it.
+            checksum = file_checksum(self.csv_path)
+            self.search_index = load_search_index(
+                self.csv_path,
+                self.snapshot_dir,
+                source_checksum=checksum,
+                feature_columns=self.build_kwargs.get("feature_columns"),
+            )
+            self._mark(SEARCH_READY)
+            self.status = SEARCH_READY
+
+            from recommender import VibeRecommender
+
+            rec = VibeRecommender.load_or_build(
+                self.csv_path,
+                self.snapshot_dir,
+                source_checksum=checksum,
+                **self.build_kwargs,
+            )
+            if rec.search_index is None and rec.models.removed is None:
+                rec.search_index = self.search_index  # same (name, artist) pairs
+            self.recommender = rec
+            self._mark(READY)
+            self.status = READY
+        except BaseException as exc:  # surfaced to the UI via status/error
+            self.error = exc
+            self._mark(FAILED)
+            self.status = FAILED
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def search_tracks(
+        self,
+        name_query: str = "",
+        artist_query: str = "",
+        limit: int = SEARCH_MAX_RESULTS,
+    ) -> Optional[Tuple["pd.DataFrame", int]]:
+        """Search-box matches (see TrackSearchIndex.search); None before SEARCH_READY."""
+        if self.recommender is not None:
+            return self.recommender.search_tracks(name_query, artist_query, limit=limit)
+        if self.search_index is None:
+            return None
+        return self.search_index.search(name_query, artist_query, limit=limit)
+
+    def wait(self, timeout: Optional[float] = None) -> "VibeRecommender":
+        """Block until the recommender is built; re-raises a build failure."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Recommender not ready after {timeout} s")
+        if self.error is not None:
+            raise self.error
+        return self.recommender
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure staged startup times.")
+    parser.add_argument("csv_path", nargs="?", default="data/spotify_tracks.csv")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    loader = StartupLoader(
+        args.csv_path,
+        args.snapshot_dir,
+        dedupe="track_id",
+        ingest_cache_dir=DEFAULT_INGEST_CACHE_DIR,
+    ).start()
+    print(f"loader started after {time.perf_counter() - start:.3f} s")
+    loader.wait()
+    for stage, seconds in loader.timings.items():
+        print(f"{stage:>13}: {seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Choose the number of mood clusters by evaluating a range of k in parallel.
+
+Fits one clustering per k (one joblib worker each), scores it by inertia and
+a sampled silhouette score, and writes a JSON report whose ``recommended_k``
+``VibeRecommender.from_csv(n_clusters=None)`` picks up when the CSV and the
+dedupe mode match. The default ``--dedupe track_id`` is the app's setting.
+
+Usage (from the project root):
+
+    python src/tune_clusters.py data/spotify_tracks.csv --k 3 4 5 6 8 10 12 --backend minibatch
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+
+from config import (
+    CLUSTER_TUNING_SAMPLE,
+    DEFAULT_CLUSTER_BACKEND,
+    DEFAULT_CLUSTER_REPORT,
+    FEATURE_COLUMNS,
+)
+from models import cluster_tuning_report
+from preprocess import DEDUPE_KEYS, preprocess_pipeline
+from snapshot import atomic_output, file_checksum
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_path")
+    parser.add_argument("--k", type=int, nargs="+", default=list(range(2, 13)))
+    parser.add_argument("--backend", choices=["kmeans", "minibatch"], default=DEFAULT_CLUSTER_BACKEND)
+    parser.add_argument("--sample", type=int, default=CLUSTER_TUNING_SAMPLE,
+                        help="rows sampled for the silhouette score")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel workers (-1: all cores)")
+    parser.add_argument(
+        "--dedupe",
+        choices=sorted(DEDUPE_KEYS) + ["none"],
+        default="track_id",
+        help='ingest dedupe mode, as in the app by default ("none" to disable)',
+    )
+    parser.add_argument("--out", default=DEFAULT_CLUSTER_REPORT)
+    args = parser.parse_args()
+    dedupe = None if args.dedupe == "none" else args.dedupe
+
+    checksum = file_checksum(args.csv_path)
+    prep = preprocess_pipeline(
+        args.csv_path,
+        FEATURE_COLUMNS,
+        dedupe=dedupe,
+        source_checksum=checksum,
+    )
+    report = cluster_tuning_report(
+        prep.X_scaled,
+        args.k,
+        backend=args.backend,
+        sample_size=args.sample,
+        n_jobs=args.jobs,
+    )
+    report["source_checksum"] = checksum
+    report["dedupe"] = dedupe
+
+    print(f"{'k':>3} {'silhouette':>10} {'inertia':>14} {'fit s':>7}")
+    for r in report["results"]:
+        print(f"{r['k']:>3} {r['silhouette']:>10.4f} {r['inertia']:>14.1f} {r['fit_seconds']:>7.2f}")
+    print(f"recommended k = {report['recommended_k']}")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with atomic_output(args.out) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Shared fixtures; also makes the modules under src/ importable as the app imports them."""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from benchmarks.synthetic import generate_catalog, write_catalog_csv  # noqa: E402
+
+# Small enough to fit in a few seconds, large enough for several clusters
+# and per-genre duplicates
+N_CATALOG_ROWS = 3000
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    """The synthetic catalog written by ``catalog_csv``, as a DataFrame."""
+    return generate_catalog(N_CATALOG_ROWS, seed=7)
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    """Path to a fresh copy of the synthetic catalog as CSV (tests may edit it)."""
+    return write_catalog_csv(str(tmp_path / "tracks.csv"), N_CATALOG_ROWS, seed=7)
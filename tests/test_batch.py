@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from recommender import VibeRecommender
+
+N = 15
+
+
+@pytest.fixture(scope="module")
+def rec(tmp_path_factory, catalog):
+    # No ingest dedupe: duplicate rows must be collapsed by the search itself.
+    path = str(tmp_path_factory.mktemp("batch") / "tracks.csv")
+    catalog.to_csv(path, index=False)
+    return VibeRecommender.from_csv(path, backend="brute")
+
+
+def _per_query(rec, batch, n_queries):
+    """Split a long-format batch result into (rows, distances) per query id."""
+    out = []
+    for query_id in range(n_queries):
+        part = batch[batch["query_id"] == query_id]
+        assert part["rank"].tolist() == list(range(len(part)))
+        out.append((rec.df.index.get_indexer(part.index), part["distance"].to_numpy()))
+    return out
+
+
+def test_batched_tracks_match_single_queries(rec):
+    names = rec.df["track_name"].iloc[::211].tolist()
+    # Unknown seeds get no rows; repeated seeds get the same answer each time.
+    names = names[:4] + ["No Such Track"] + names[4:] + [names[0], names[2]]
+    batch = rec.recommend_by_tracks(names, n=N, block_size=4)
+
+    for name, (rows, distances) in zip(names, _per_query(rec, batch, len(names))):
+        seed, want = rec.recommend_by_track(name, n=N)
+        if seed is None:
+            assert len(rows) == 0
+            continue
+        np.testing.assert_array_equal(rows, want.rows)
+        np.testing.assert_allclose(distances, want.distances, rtol=1e-5, atol=1e-6)
+
+
+def test_batched_moods_match_single_queries(rec):
+    moods = np.array([
+        [0.1, 0.2, 0.3],
+        [0.5, 0.5, 0.5],
+        [0.93, 0.07, 0.61],
+        [0.5, 0.5, 0.5],
+    ])
+    batch = rec.recommend_by_moods(moods, n=N, block_size=3)
+    for mood, (rows, distances) in zip(moods, _per_query(rec, batch, len(moods))):
+        want = rec.recommend_by_mood(*mood, n=N)
+        np.testing.assert_array_equal(rows, want.rows)
+        np.testing.assert_allclose(distances, want.distances, rtol=1e-5, atol=1e-6)
+
+    extra = np.column_stack([moods, [0.1, 0.9, 0.4, 0.1]])
+    columns = ("energy", "valence", "danceability", "acousticness")
+    batch = rec.recommend_by_moods(extra, n=N, columns=columns)
+    for mood, (rows, _) in zip(extra, _per_query(rec, batch, len(extra))):
+        want = rec.recommend_by_mood(*mood[:3], n=N, extra_overrides={"acousticness": mood[3]})
+        np.testing.assert_array_equal(rows, want.rows)
+
+
+def test_batch_with_only_unknown_seeds_is_empty(rec):
+    batch = rec.recommend_by_tracks(["No Such Track", "Nor This"], n=N)
+    assert batch.empty and {"query_id", "rank", "distance"} <= set(batch.columns)
@@ -0,0 +1,66 @@
+import math
+
+import pandas as pd
+import pytest
+
+from benchmarks.suite import compare_reports, run_size
+from benchmarks.synthetic import generate_catalog, write_catalog_csv
+from profiling import get_sink
+
+STAGES = {
+    "preprocess_pipeline",
+    "VibeModels.fit",
+    "VibeRecommender.build_indexes",
+    "recommend_by_track",
+    "recommend_by_mood",
+    "describe_clusters",
+    "sample_cluster_tracks",
+}
+
+
+def test_run_size_reports_every_stage(tmp_path):
+    path = write_catalog_csv(str(tmp_path / "tiny.csv"), 400, seed=3)
+    pd.testing.assert_series_equal(
+        pd.read_csv(path)["track_id"], generate_catalog(400, seed=3)["track_id"]
+    )
+
+    result = run_size(path, n_queries=5, n_clusters=4)
+    assert result["n_rows"] == 400
+    assert set(result["stages"]) == STAGES
+    for name in ("recommend_by_track", "recommend_by_mood"):
+        record = result["stages"][name]
+        assert record["n"] == 5
+        assert 0 <= record["p50_ms"] <= record["p99_ms"] <= record["max_ms"]
+    assert result["inner_stages"]
+    assert get_sink() is None
+
+
+def _report(results):
+    return {
+        "results": [
+            {"n_rows": n_rows, "stages": {s: {"p50_ms": ms} for s, ms in stages.items()}}
+            for n_rows, stages in results
+        ]
+    }
+
+
+def test_compare_reports_pairs_stages_by_size_and_name():
+    baseline = _report([
+        (100, {"fit": 10.0, "query": 2.0}),
+        (200, {"fit": 20.0, "query": 0.0}),
+    ])
+    candidate = _report([
+        (100, {"query": 1.0, "fit": 15.0, "new_stage": 3.0}),
+        (200, {"query": 4.0}),
+        (300, {"fit": 30.0}),
+    ])
+    rows = compare_reports(baseline, candidate)
+    assert [(r["n_rows"], r["stage"]) for r in rows] == [
+        (100, "query"), (100, "fit"), (200, "query")
+    ]
+    assert [(r["baseline"], r["candidate"]) for r in rows] == [
+        (2.0, 1.0), (10.0, 15.0), (0.0, 4.0)
+    ]
+    assert rows[0]["ratio"] == pytest.approx(0.5)
+    assert rows[1]["ratio"] == pytest.approx(1.5)
+    assert math.isnan(rows[2]["ratio"])  # zero baseline
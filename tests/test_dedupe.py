@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import DEFAULT_N_NEIGHBORS
+from indexes import first_unique_positions
+from recommender import VibeRecommender
+
+N = 10
+# More copies than the first neighbor pool holds, so it is all one track.
+N_COPIES = 3 * DEFAULT_N_NEIGHBORS
+
+
+@pytest.fixture(scope="module")
+def rec(tmp_path_factory, catalog):
+    """Catalog plus many per-genre copies of one track sitting on "Track 0"."""
+    base = catalog.iloc[:1500]
+    copies = pd.concat([base.iloc[[0]]] * N_COPIES, ignore_index=True)
+    copies["track_id"] = "echo"
+    copies["track_name"] = "Echo"
+    copies["artists"] = "Echo Artist"
+    copies["track_genre"] = [f"genre-{i}" for i in range(N_COPIES)]
+    path = str(tmp_path_factory.mktemp("dedupe") / "tracks.csv")
+    pd.concat([base, copies], ignore_index=True).to_csv(path, index=False)
+    return VibeRecommender.from_csv(path, backend="brute")
+
+
+def _drop_duplicates_reference(rec, seed_row, n):
+    """The pre-group-id dedupe: sort every row by distance, drop_duplicates, head(n)."""
+    X = np.asarray(rec.X_scaled, dtype=float)
+    pool = rec.df[["track_name", "artists"]].copy()
+    pool["distance"] = np.linalg.norm(X - X[seed_row], axis=1)
+    pool = pool.sort_values("distance", kind="stable")
+    seed = rec.df.loc[seed_row]
+    same = (pool["track_name"] == seed["track_name"]) & (pool["artists"] == seed["artists"])
+    pool = pool[~same].drop_duplicates(subset=["track_name", "artists"], keep="first")
+    return pool.head(n)
+
+
+def test_first_unique_positions():
+    keys = np.array([4, 4, 2, 7, 2, 4, 9, 7])
+    np.testing.assert_array_equal(first_unique_positions(keys), [0, 2, 3, 6])
+    np.testing.assert_array_equal(first_unique_positions(keys, skip=np.array([2, 9])), [0, 3])
+    assert len(first_unique_positions(np.empty(0, dtype=np.int64))) == 0
+
+
+def test_pool_of_one_track_grows_to_n_distinct_tracks(rec):
+    seed_row = int(np.flatnonzero(rec.df["track_name"] == "Track 0")[0])
+    want = _drop_duplicates_reference(rec, seed_row, N)
+
+    seed, got = rec.recommend_by_track("Track 0", n=N)
+    assert seed.name == seed_row
+    frame = got.to_frame()
+    assert len(frame) == N
+    assert frame["track_name"].iloc[0] == "Echo"
+    assert list(zip(frame["track_name"], frame["artists"])) == list(
+        zip(want["track_name"], want["artists"])
+    )
+    # float32 GEMM distances: ~1e-3 of cancellation error near zero
+    np.testing.assert_allclose(got.distances, want["distance"], rtol=1e-5, atol=5e-3)
+
+    batch = rec.recommend_by_tracks(["Track 0"], n=N)
+    assert list(batch["track_name"]) == list(want["track_name"])
+    np.testing.assert_array_equal(rec.df.index.get_indexer(batch.index), got.rows)
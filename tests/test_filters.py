@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import recommender as recommender_module
+from indexes import TrackFilter
+from recommender import VibeRecommender
+
+N = 25
+MOODS = [(0.2, 0.3, 0.4), (0.8, 0.6, 0.7)]
+
+
+@pytest.fixture(scope="module")
+def rec(tmp_path_factory, catalog):
+    path = str(tmp_path_factory.mktemp("filters") / "tracks.csv")
+    catalog.to_csv(path, index=False)
+    return VibeRecommender.from_csv(path, dedupe="track_id", backend="brute")
+
+
+def _allowed(rec, genre=None, popularity=None):
+    """The filter evaluated with plain pandas over the catalog."""
+    allowed = np.ones(len(rec.df), dtype=bool)
+    if genre is not None:
+        allowed &= rec.df["track_genres"].map(lambda gs: genre in {g.lower() for g in gs})
+    if popularity is not None:
+        low, high = popularity
+        allowed &= rec.df["popularity"].between(low, high).to_numpy()
+    return allowed
+
+
+def _brute_force_top_n(rec, query_vec, allowed, n):
+    """Exact distances to every allowed row, closest copy of each track first."""
+    X = np.asarray(rec.X_scaled, dtype=float)
+    pool = rec.df.loc[allowed, ["track_name", "artists"]].copy()
+    pool["distance"] = np.linalg.norm(X[allowed] - query_vec, axis=1)
+    pool = pool.sort_values("distance", kind="stable")
+    return pool.drop_duplicates(subset=["track_name", "artists"]).head(n)
+
+
+def _check(rec, flt, allowed):
+    for mood in MOODS:
+        overrides = rec._mood_overrides(*mood, None)
+        want = _brute_force_top_n(rec, rec._build_mood_vector(overrides), allowed, N)
+        got = rec.recommend_by_mood(*mood, n=N, filters=flt)
+        np.testing.assert_array_equal(got.rows, rec.df.index.get_indexer(want.index))
+        np.testing.assert_allclose(got.distances, want["distance"], rtol=1e-4, atol=1e-4)
+
+
+@pytest.fixture
+def narrow(rec):
+    genre = rec.filter_index.genres[3]
+    allowed = _allowed(rec, genre=genre)
+    assert N < allowed.sum() <= recommender_module.FILTER_SUBINDEX_FRACTION * len(rec.df)
+    return TrackFilter(genres=(genre,)), allowed
+
+
+@pytest.fixture
+def broad(rec):
+    allowed = _allowed(rec, popularity=(10, 80))
+    assert allowed.sum() > recommender_module.FILTER_SUBINDEX_FRACTION * len(rec.df)
+    return TrackFilter(ranges={"popularity": (10, 80)}), allowed
+
+
+def test_narrow_filter_uses_a_sub_index_and_matches_brute_force(rec, narrow):
+    flt, allowed = narrow
+    rec.filter_cache.clear()
+    rec.mood_cache.clear()
+    _check(rec, flt, allowed)
+    assert rec.filter_cache.get(flt)[2] is not None  # searched its own sub-index
+
+
+def test_broad_filter_post_filters_and_matches_brute_force(rec, broad):
+    flt, allowed = broad
+    rec.filter_cache.clear()
+    rec.mood_cache.clear()
+    _check(rec, flt, allowed)
+    assert rec.filter_cache.get(flt)[2] is None  # filtered the main index's results
+
+
+@pytest.mark.parametrize("fraction", [0.0, 1.0])
+def test_both_strategies_agree_on_the_same_filter(rec, narrow, broad, monkeypatch, fraction):
+    # 0 forces post-filtering for every filter, 1 forces a sub-index.
+    monkeypatch.setattr(recommender_module, "FILTER_SUBINDEX_FRACTION", fraction)
+    for flt, allowed in (narrow, broad):
+        rec.filter_cache.clear()
+        rec.mood_cache.clear()
+        _check(rec, flt, allowed)
+        assert (rec.filter_cache.get(flt)[2] is not None) == (fraction == 1.0)
+    rec.filter_cache.clear()
+    rec.mood_cache.clear()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from hot_reload import ReloadingLoader
+from recommender import VibeRecommender
+from snapshot import read_manifest
+
+BUILD = {"dedupe": "track_id", "backend": "brute"}
+
+
+def _start(csv_path, snapshot_dir):
+    # Reloads are triggered by hand; the watcher never fires in a test.
+    loader = ReloadingLoader(csv_path, snapshot_dir, poll_seconds=3600, **BUILD).start()
+    loader.wait(timeout=60)
+    return loader
+
+
+def test_rollback_survives_reload_from_disk(catalog_csv, tmp_path):
+    snapshot_dir = str(tmp_path / "snap")
+    loader = _start(catalog_csv, snapshot_dir)
+    try:
+        v1 = loader.recommender
+        pd.read_csv(catalog_csv).iloc[:-300].to_csv(catalog_csv, index=False)
+        assert loader.reload()
+        v2 = loader.recommender
+        assert len(v2.df) < len(v1.df)
+        assert read_manifest(snapshot_dir)["source_checksum"] == v2.source_checksum
+
+        assert loader.rollback()
+        assert loader.recommender is v1
+        assert not loader.rollback()  # only one previous version is kept
+        # The CSV is unchanged since the rolled-back build, so no rebuild.
+        assert not loader.reload()
+        assert loader.recommender is v1
+    finally:
+        loader.stop()
+
+    # The snapshot on disk is v1 again and still counts as current for the CSV.
+    loaded = VibeRecommender.load(snapshot_dir, csv_path=catalog_csv)
+    assert loaded.source_checksum == v1.source_checksum
+    pd.testing.assert_frame_equal(loaded.df, v1.df)
+
+    rec = VibeRecommender.load_or_build(catalog_csv, snapshot_dir, **BUILD)
+    assert isinstance(rec.X_scaled, np.memmap)  # loaded, not rebuilt
+    assert len(rec.df) == len(v1.df)
+
+    restarted = _start(catalog_csv, snapshot_dir)
+    restarted.stop()
+    assert restarted.recommender.source_checksum == v1.source_checksum
+    # The early search index also came from the restored snapshot.
+    _, n_early = restarted.search_index.search("Track", limit=1)
+    assert n_early == v1.search_tracks("Track", limit=1)[1]
+
+
+def test_forced_reload_after_rollback_serves_the_new_csv(catalog_csv, tmp_path):
+    snapshot_dir = str(tmp_path / "snap")
+    loader = _start(catalog_csv, snapshot_dir)
+    try:
+        pd.read_csv(catalog_csv).iloc[:-300].to_csv(catalog_csv, index=False)
+        assert loader.reload()
+        v2_rows = len(loader.recommender.df)
+        assert loader.rollback()
+        assert loader.reload(force=True)
+        assert len(loader.recommender.df) == v2_rows
+    finally:
+        loader.stop()
+    manifest = read_manifest(snapshot_dir)
+    assert manifest["source_checksum"] == loader.recommender.source_checksum
+    assert manifest["pinned_checksum"] is None
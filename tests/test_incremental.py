@@ -0,0 +1,158 @@
+import numpy as np
+
+from indexes import ClusterStats, TrackFilter
+from models import BruteForceIndex, VibeModels
+from recommender import VibeRecommender
+
+BASE_ROWS = 2400
+# Merged moments drift from a two-pass rebuild only by rounding error
+STATS_RTOL = 1e-9
+STATS_ATOL = 1e-9
+MOODS = [(0.2, 0.3, 0.4), (0.5, 0.5, 0.5), (0.9, 0.8, 0.7)]
+
+
+def _build(catalog, tmp_path):
+    path = str(tmp_path / "base.csv")
+    catalog.iloc[:BASE_ROWS].to_csv(path, index=False)
+    return VibeRecommender.from_csv(path, dedupe="track_id", backend="brute")
+
+
+def _updated(catalog, tmp_path):
+    """Base build plus the rest of the catalog, minus a spread of old and new tracks."""
+    rec = _build(catalog, tmp_path)
+    # A threshold this high keeps everything in the delta index and tombstones.
+    rec.add_tracks(catalog.iloc[BASE_ROWS:], compaction_threshold=10.0)
+    ids = rec.df["track_id"].to_numpy()
+    medoids = ids[rec.cluster_stats.medoid_rows]
+    removed = np.concatenate([ids[::7], ids[BASE_ROWS::5], medoids])
+    rec.remove_tracks(removed, compaction_threshold=10.0)
+    assert rec.models.n_delta > 0 and rec.models.n_removed > 0
+    return rec, set(removed)
+
+
+def _fresh(rec):
+    """A recommender built from scratch over rec's rows with its fitted scaler and clusters."""
+    X = np.array(rec.X_scaled)
+    return VibeRecommender(
+        df=rec.df.copy(),
+        X_scaled=X,
+        feature_columns=list(rec.feature_columns),
+        models=VibeModels(kmeans=rec.models.kmeans, knn=None, brute=BruteForceIndex.build(X)),
+        scaler=rec.scaler,
+        build_params=dict(rec.build_params),
+    )
+
+
+def _assert_stats_equal(stats, expected):
+    np.testing.assert_array_equal(stats.labels, expected.labels)
+    np.testing.assert_array_equal(stats.offsets, expected.offsets)
+    np.testing.assert_array_equal(stats.rows, expected.rows)
+    np.testing.assert_array_equal(stats.medoid_rows, expected.medoid_rows)
+    np.testing.assert_allclose(stats.means, expected.means, rtol=STATS_RTOL, atol=STATS_ATOL)
+    np.testing.assert_allclose(stats.stds, expected.stds, rtol=STATS_RTOL, atol=STATS_ATOL)
+
+
+def _rebuilt_stats(rec):
+    return ClusterStats.build(
+        rec.df,
+        rec.feature_columns,
+        rec.X_scaled,
+        centroids=rec.models.kmeans.cluster_centers_,
+        live=rec._live_mask(),
+    )
+
+
+def test_add_then_remove_matches_rebuilt_cluster_stats(catalog, tmp_path):
+    rec, _ = _updated(catalog, tmp_path)
+    _assert_stats_equal(rec.cluster_stats, _rebuilt_stats(rec))
+
+
+def test_removing_a_whole_cluster_drops_its_stats(catalog, tmp_path):
+    rec = _build(catalog, tmp_path)
+    label = int(rec.cluster_stats.labels[0])
+    members = rec.df["track_id"].to_numpy()[rec.cluster_stats.rows_for(label)]
+    rec.remove_tracks(members, compaction_threshold=10.0)
+
+    assert label not in rec.cluster_stats.labels
+    _assert_stats_equal(rec.cluster_stats, _rebuilt_stats(rec))
+
+
+def test_removed_tracks_never_returned(catalog, tmp_path):
+    rec, removed = _updated(catalog, tmp_path)
+    live_ids = set(rec._live_df()["track_id"])
+
+    for moods in MOODS:
+        seen = set()
+        for page in rec.iter_recommendations_by_mood(*moods, page_size=500):
+            seen.update(page.column("track_id"))
+        assert seen.isdisjoint(removed)
+        assert seen == live_ids  # paging to the end reaches every live track
+
+    genre = rec.filter_index.genres[0]
+    flt = TrackFilter(genres=(genre,), ranges={"popularity": (20, 80)})
+    recs = rec.recommend_by_mood(0.5, 0.5, 0.5, n=len(rec.df), filters=flt)
+    assert set(recs.column("track_id")).isdisjoint(removed)
+
+    batch = rec.recommend_by_moods(np.array(MOODS), n=200)
+    assert set(batch["track_id"]).isdisjoint(removed)
+
+    # Names whose every copy was removed can be neither searched nor seeded.
+    gone = set(rec.df.loc[rec.df["track_id"].isin(removed), "track_name"])
+    gone -= set(rec._live_df()["track_name"])
+    matches, _ = rec.search_tracks("Track", limit=len(rec.df))
+    assert set(matches["track_name"]).isdisjoint(gone)
+    for name in sorted(gone)[:20]:
+        seed, _ = rec.recommend_by_track(name)
+        assert seed is None
+
+
+def test_delta_and_tombstones_answer_like_compacted_catalog(catalog, tmp_path):
+    rec, _ = _updated(catalog, tmp_path)
+    before = [rec.recommend_by_mood(*m, n=50) for m in MOODS]
+    before = [(r.column("track_id").tolist(), r.distances.copy()) for r in before]
+
+    rec.compact()
+    for moods, (ids, distances) in zip(MOODS, before):
+        after = rec.recommend_by_mood(*moods, n=50)
+        assert after.column("track_id").tolist() == ids
+        np.testing.assert_allclose(after.distances, distances, rtol=1e-6)
+
+
+def test_compact_matches_build_from_scratch(catalog, tmp_path):
+    rec, removed = _updated(catalog, tmp_path)
+    rec.compact()
+    fresh = _fresh(rec)
+
+    assert rec.models.n_delta == 0 and rec.models.n_removed == 0
+    assert not rec.df["track_id"].isin(removed).any()
+    np.testing.assert_array_equal(rec.group_ids, fresh.group_ids)
+    _assert_stats_equal(rec.cluster_stats, fresh.cluster_stats)
+
+    for moods in MOODS:
+        got = rec.recommend_by_mood(*moods, n=40)
+        want = fresh.recommend_by_mood(*moods, n=40)
+        np.testing.assert_array_equal(got.rows, want.rows)
+        np.testing.assert_allclose(got.distances, want.distances)
+
+    for name in rec.df["track_name"].iloc[::97]:
+        seed, got = rec.recommend_by_track(name, n=20)
+        fresh_seed, want = fresh.recommend_by_track(name, n=20)
+        assert seed.name == fresh_seed.name
+        np.testing.assert_array_equal(got.rows, want.rows)
+
+    genre = rec.filter_index.genres[-1]
+    flt = TrackFilter(genres=(genre,), clusters=(int(rec.cluster_stats.labels[0]),))
+    np.testing.assert_array_equal(rec.filter_index.mask(flt), fresh.filter_index.mask(flt))
+    got = rec.recommend_by_mood(0.5, 0.5, 0.5, n=30, filters=flt)
+    want = fresh.recommend_by_mood(0.5, 0.5, 0.5, n=30, filters=flt)
+    np.testing.assert_array_equal(got.rows, want.rows)
+
+
+def test_removing_every_track_leaves_an_empty_catalog(catalog, tmp_path):
+    rec = _build(catalog, tmp_path)
+    rec.remove_tracks(rec.df["track_id"].to_numpy())
+
+    assert len(rec.df) == 0 and rec.models.n_rows == 0
+    assert rec.recommend_by_mood(0.5, 0.5, 0.5).empty
+    assert rec.recommend_by_moods(np.array(MOODS)).empty
+    assert rec.build_neighbor_graph(str(tmp_path / "graph"), k=5).rows.shape == (0, 5)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from recommender import VibeRecommender
+
+TOP_K = 20
+ON_GRID = [(0.0, 0.0, 0.0), (0.15, 0.5, 0.95), (0.35, 0.8, 0.6), (1.0, 1.0, 1.0)]
+OFF_GRID = [(0.151, 0.5, 0.95), (0.33, 0.8, 0.6)]
+
+
+@pytest.fixture(scope="module")
+def rec(tmp_path_factory, catalog):
+    path = str(tmp_path_factory.mktemp("lattice") / "tracks.csv")
+    catalog.to_csv(path, index=False)
+    rec = VibeRecommender.from_csv(path, dedupe="track_id", backend="brute")
+    rec.build_mood_lattice(top_k=TOP_K)
+    return rec
+
+
+def _searched(rec, mood, n, offset=0):
+    """What a live search returns, with the lattice and cache out of the way."""
+    lattice, rec.mood_lattice = rec.mood_lattice, None
+    try:
+        rec.mood_cache.clear()
+        return rec.recommend_by_mood(*mood, n=n, offset=offset)
+    finally:
+        rec.mood_lattice = lattice
+        rec.mood_cache.clear()
+
+
+@pytest.fixture
+def searches(rec, monkeypatch):
+    """Moods that reached a live search (rather than the lattice)."""
+    calls = []
+    page = rec._page
+
+    def spy(query_vec, **kwargs):
+        calls.append(query_vec)
+        return page(query_vec, **kwargs)
+
+    monkeypatch.setattr(rec, "_page", spy)
+    return calls
+
+
+@pytest.mark.parametrize("n, offset", [(10, 0), (10, 10), (TOP_K, 0)])
+def test_on_grid_moods_answer_from_the_lattice_like_a_search(rec, searches, n, offset):
+    for mood in ON_GRID:
+        want = _searched(rec, mood, n, offset)
+        searches.clear()
+        got = rec.recommend_by_mood(*mood, n=n, offset=offset)
+        assert searches == []
+        np.testing.assert_array_equal(got.rows, want.rows)
+        np.testing.assert_allclose(got.distances, want.distances, rtol=1e-5, atol=1e-5)
+
+
+def test_off_grid_and_deep_pages_fall_through_to_search(rec, searches):
+    for mood in OFF_GRID:
+        want = _searched(rec, mood, 10)
+        searches.clear()
+        got = rec.recommend_by_mood(*mood, n=10)
+        assert len(searches) == 1
+        np.testing.assert_array_equal(got.rows, want.rows)
+
+    searches.clear()
+    rec.recommend_by_mood(*ON_GRID[1], n=10, offset=TOP_K - 5)  # past top_k
+    rec.recommend_by_mood(*ON_GRID[1], n=10, extra_overrides={"tempo": 120.0})
+    assert len(searches) == 2
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+from sklearn.neighbors import NearestNeighbors
+
+from models import BruteForceIndex, IVFIndex, cluster_tuning_report, read_recommended_k
+
+K = 20
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(4000, 9))
+    queries = rng.normal(size=(64, 9))
+    return X, queries
+
+
+@pytest.fixture(scope="module")
+def sklearn_answer(data):
+    X, queries = data
+    return NearestNeighbors(n_neighbors=K, algorithm="brute").fit(X).kneighbors(queries)
+
+
+def test_brute_force_matches_sklearn(data, sklearn_answer):
+    X, queries = data
+    want_d, want_i = sklearn_answer
+    index = BruteForceIndex.build(X)
+    got_d, got_i = index.kneighbors(queries, n_neighbors=K)
+
+    np.testing.assert_array_equal(got_i, want_i)
+    np.testing.assert_allclose(got_d, want_d, rtol=1e-5, atol=1e-5)  # float32 vs float64
+
+
+def test_brute_force_on_an_empty_catalog():
+    index = BruteForceIndex.build(np.empty((0, 9)))
+    assert index.block_rows(1024) == 256
+    distances, indices = index.kneighbors(np.zeros((3, 9)), n_neighbors=5)
+    assert distances.shape == indices.shape == (3, 0)
+
+
+def test_ivf_probing_every_list_is_exact(data, sklearn_answer):
+    X, queries = data
+    want_d, want_i = sklearn_answer
+    index = IVFIndex.build(X, n_lists=32, n_probe=4)
+
+    _, approx = index.kneighbors(queries, n_neighbors=K)
+    recall = np.mean([len(set(a) & set(w)) / K for a, w in zip(approx, want_i)])
+    assert 0.5 < recall < 1.0  # a few probed lists miss some true neighbors
+
+    got_d, got_i = index.kneighbors(queries, n_neighbors=K, n_probe=index.n_lists)
+    recall = np.mean([len(set(g) & set(w)) / K for g, w in zip(got_i, want_i)])
+    assert recall == 1.0
+    np.testing.assert_allclose(got_d, want_d, rtol=1e-9)
+
+
+def test_cluster_report_round_trips_the_recommended_k(tmp_path):
+    rng = np.random.default_rng(5)
+    centers = rng.normal(scale=10.0, size=(4, 3))
+    X = np.concatenate([c + rng.normal(size=(150, 3)) for c in centers])
+    report = cluster_tuning_report(X, [2, 4, 6], sample_size=300, n_jobs=2)
+    assert [r["k"] for r in report["results"]] == [2, 4, 6]
+    assert report["recommended_k"] == 4
+
+    # Written the way tune_clusters.py writes it.
+    report["source_checksum"] = "abc"
+    report["dedupe"] = "track_id"
+    path = str(tmp_path / "cluster_report.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+
+    assert read_recommended_k(path, "abc", dedupe="track_id") == 4
+    assert read_recommended_k(path, dedupe="track_id") == 4
+    assert read_recommended_k(path, "other", dedupe="track_id") is None
+    assert read_recommended_k(path, "abc", dedupe=None) is None
+    assert read_recommended_k(str(tmp_path / "missing.json")) is None
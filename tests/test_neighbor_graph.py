@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import write_catalog_csv
+from neighbor_graph import (
+    GRAPH_PROGRESS_FILE,
+    NeighborGraph,
+    build_neighbor_graph,
+    data_fingerprint,
+)
+from recommender import VibeRecommender
+
+K = 12
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture(scope="module")
+def rec(tmp_path_factory, catalog):
+    path = str(tmp_path_factory.mktemp("graph") / "tracks.csv")
+    catalog.to_csv(path, index=False)
+    return VibeRecommender.from_csv(path, dedupe="track_id", backend="brute")
+
+
+def _build(rec, path, progress=None):
+    # 30 float32 distance rows per block, so the catalog takes many blocks.
+    block_bytes = 30 * len(rec.X_scaled) * 4
+    return build_neighbor_graph(
+        rec.X_scaled,
+        rec.group_ids,
+        path,
+        k=K,
+        block_bytes=block_bytes,
+        progress=progress,
+    )
+
+
+def test_interrupted_build_resumes_to_the_same_graph(rec, tmp_path):
+    full = _build(rec, str(tmp_path / "full"))
+
+    path = str(tmp_path / "resumed")
+    first_calls = []
+
+    def stop_after_three(done, total):
+        first_calls.append((done, total))
+        if done == 3:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        _build(rec, path, progress=stop_after_three)
+    assert os.path.exists(os.path.join(path, GRAPH_PROGRESS_FILE))
+    assert NeighborGraph.open(path) is None  # unfinished graphs are not served
+    n_blocks = first_calls[0][1]
+    assert n_blocks > 3
+
+    resumed_calls = []
+    resumed = _build(rec, path, progress=lambda done, total: resumed_calls.append(done))
+    # Only the blocks left are computed, continuing the count.
+    assert resumed_calls == list(range(4, n_blocks + 1))
+    assert not os.path.exists(os.path.join(path, GRAPH_PROGRESS_FILE))
+
+    np.testing.assert_array_equal(resumed.rows, full.rows)
+    np.testing.assert_array_equal(resumed.distances, full.distances)
+    assert resumed.k == K and len(resumed.rows) == len(rec.df)
+
+
+def _copy(rec, **kwargs):
+    """A recommender over the same fitted catalog (without its graph)."""
+    return VibeRecommender(
+        df=rec.df,
+        X_scaled=rec.X_scaled,
+        feature_columns=rec.feature_columns,
+        models=rec.models,
+        scaler=rec.scaler,
+        source_checksum=rec.source_checksum,
+        source_file=rec.source_file,
+        **kwargs,
+    )
+
+
+def test_graph_answers_match_search(rec, tmp_path):
+    rec = _copy(rec)
+    names = rec.df["track_name"].iloc[::151].tolist()
+    searched = [rec.recommend_by_track(name, n=K)[1] for name in names]
+    rec.build_neighbor_graph(str(tmp_path / "g"), k=K)
+    for name, want in zip(names, searched):
+        got = rec.recommend_by_track(name, n=K)[1]
+        np.testing.assert_array_equal(got.rows, want.rows)
+        np.testing.assert_allclose(got.distances, want.distances, rtol=1e-4, atol=1e-5)
+
+
+def test_graph_for_another_row_count_is_rejected(rec, catalog, tmp_path):
+    path = str(tmp_path / "snap")
+    # Same CSV without dedupe: more rows than ``rec``.
+    csv_path = str(tmp_path / "tracks.csv")
+    catalog.to_csv(csv_path, index=False)
+    undeduped = VibeRecommender.from_csv(csv_path, backend="brute")
+    assert len(undeduped.df) != len(rec.df)
+    undeduped.build_neighbor_graph(path, k=K)
+
+    assert NeighborGraph.open(path, n_rows=len(undeduped.df)) is not None
+    assert NeighborGraph.open(path, n_rows=len(rec.df)) is None
+    fingerprint = data_fingerprint(rec.X_scaled, rec.group_ids)
+    assert NeighborGraph.open(path, fingerprint=fingerprint) is None
+
+    # A snapshot whose manifest claims the graph, but for the other catalog.
+    _copy(rec, neighbor_graph=NeighborGraph.open(path)).save(path)
+    loaded = VibeRecommender.load(path)
+    assert loaded.neighbor_graph is None
+    name = rec.df["track_name"].iloc[5]
+    np.testing.assert_array_equal(
+        loaded.recommend_by_track(name, n=K)[1].rows, rec.recommend_by_track(name, n=K)[1].rows
+    )
+
+
+def test_graph_for_another_catalog_of_the_same_size_is_rebuilt(tmp_path):
+    recs = []
+    for seed in (1, 2):
+        csv_path = write_catalog_csv(str(tmp_path / f"tracks{seed}.csv"), 2000, seed=seed)
+        recs.append(VibeRecommender.from_csv(csv_path, backend="brute"))
+    first, second = recs
+    assert len(first.df) == len(second.df)
+
+    path = str(tmp_path / "g")
+    first.build_neighbor_graph(path, k=K)
+    got = second.build_neighbor_graph(path, k=K)
+    want = second.build_neighbor_graph(str(tmp_path / "fresh"), k=K)
+
+    np.testing.assert_array_equal(got.rows, want.rows)
+    np.testing.assert_array_equal(got.distances, want.distances)
+    assert not np.array_equal(got.rows, first.neighbor_graph.rows)
+    # The first catalog's graph on disk was replaced, so it no longer opens for it.
+    first_fingerprint = data_fingerprint(first.X_scaled, first.group_ids)
+    assert NeighborGraph.open(path, fingerprint=first_fingerprint) is None
@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pytest
+
+from out_of_core import OOC_RUNS_DIR, OOC_X_FILE, BlockScanIndex, OutOfCoreRecommender
+
+
+@pytest.fixture
+def ooc(catalog_csv, tmp_path):
+    # Small chunks and a tiny merge budget: many runs, many merge rounds.
+    return OutOfCoreRecommender.build(
+        catalog_csv, str(tmp_path / "ooc"), chunk_rows=250, block_bytes=16 * 64
+    )
+
+
+def test_name_index_is_sorted_permutation(ooc, catalog):
+    assert len(ooc.shard_offsets) > 10
+    assert not os.path.exists(os.path.join(ooc.path, OOC_RUNS_DIR))
+    assert np.all(ooc.name_keys[1:] >= ooc.name_keys[:-1])
+    np.testing.assert_array_equal(np.sort(ooc.name_rows), np.arange(ooc.n_rows))
+
+    names = catalog["track_name"].str.lower()
+    for name in catalog["track_name"].iloc[::173]:
+        expected = np.flatnonzero((names == name.lower()).to_numpy())
+        np.testing.assert_array_equal(ooc.find_track(name.upper()), expected)
+    assert len(ooc.find_track("no such track")) == 0
+
+
+def test_block_scan_matches_brute_force(ooc):
+    X = np.asarray(ooc.index.X, dtype=np.float64)
+    queries = np.random.default_rng(0).standard_normal((5, X.shape[1]))
+    # A budget this small forces many short blocks, the last one partial.
+    index = BlockScanIndex(X=ooc.index.X, block_bytes=4096)
+    distances, indices = index.kneighbors(queries, k=30)
+
+    d = np.sqrt(((queries[:, None, :] - X[None, :, :]) ** 2).sum(axis=2))
+    expected = np.sort(d, axis=1)[:, :30]
+    np.testing.assert_allclose(distances, expected, rtol=1e-4, atol=1e-4)
+    np.testing.assert_allclose(np.take_along_axis(d, indices, axis=1), expected, rtol=1e-4)
+
+
+def test_truncated_matrix_raises(ooc):
+    x_path = os.path.join(ooc.path, OOC_X_FILE)
+    index = BlockScanIndex(X=np.load(x_path, mmap_mode="r"), block_bytes=4096)
+    os.truncate(x_path, os.path.getsize(x_path) - 8)
+    with pytest.raises(ValueError, match="truncated"):
+        index.kneighbors(np.zeros((1, index.X.shape[1])), k=5)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from config import FEATURE_COLUMNS
+from preprocess import collapse_duplicates, preprocess_pipeline
+from recommender import VibeRecommender
+
+
+def _with_extra_columns(catalog, path):
+    df = catalog.copy()
+    df.insert(0, "Unnamed: 0", np.arange(len(df)))
+    df["album_name"] = "Album " + (df.index % 40).astype(str)
+    df["explicit"] = df.index % 3 == 0
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_ingest_keeps_every_csv_column(catalog, tmp_path):
+    path = str(tmp_path / "tracks.csv")
+    raw = _with_extra_columns(catalog, path)
+
+    for cache_dir in (None, str(tmp_path / "cache"), str(tmp_path / "cache")):
+        prep = preprocess_pipeline(path, FEATURE_COLUMNS, cache_dir=cache_dir)
+        assert list(prep.df.columns) == list(raw.columns)
+        pd.testing.assert_series_equal(prep.df["album_name"], raw["album_name"])
+        assert prep.df["explicit"].tolist() == raw["explicit"].tolist()
+        assert isinstance(prep.df["artists"].dtype, pd.CategoricalDtype)
+        assert prep.df[FEATURE_COLUMNS].dtypes.eq(np.float32).all()
+
+    rec = VibeRecommender.from_csv(path, dedupe="track_id", backend="brute")
+    assert {"album_name", "explicit"} <= set(rec.df.columns)
+    assert rec.recommend_by_mood(0.5, 0.5, 0.5).to_frame()["album_name"].notna().all()
+
+
+def test_add_tracks_keeps_categorical_columns(catalog, tmp_path):
+    path = str(tmp_path / "tracks.csv")
+    catalog.iloc[:2000].to_csv(path, index=False)
+    rec = VibeRecommender.from_csv(path, backend="brute")
+    assert isinstance(rec.df["artists"].dtype, pd.CategoricalDtype)
+
+    artists = rec.df["artists"].tolist()
+    for start, end in ((2000, 2300), (2300, 2600)):
+        new = catalog.iloc[start:end].copy()  # plain object columns
+        new.loc[new.index[:10], "artists"] = "Brand New Artist"
+        rec.add_tracks(new, compaction_threshold=10.0)
+        artists += new["artists"].tolist()
+
+        for column in ("artists", "track_genre"):
+            assert isinstance(rec.df[column].dtype, pd.CategoricalDtype), column
+        assert rec.df["artists"].tolist() == artists
+
+
+def test_collapse_keeps_one_row_per_track_with_all_its_genres(catalog):
+    collapsed = collapse_duplicates(catalog, "track_id")
+
+    first = catalog.drop_duplicates("track_id")
+    assert collapsed["track_id"].is_unique
+    assert collapsed.index.tolist() == first.index.tolist()
+    pd.testing.assert_frame_equal(collapsed[FEATURE_COLUMNS], first[FEATURE_COLUMNS])
+
+    expected = {}
+    for track_id, genre in zip(catalog["track_id"], catalog["track_genre"]):
+        genres = expected.setdefault(track_id, [])
+        if genre not in genres:
+            genres.append(genre)
+    assert len(expected) < len(catalog)  # the catalog does repeat tracks
+    assert collapsed["track_genres"].tolist() == [tuple(expected[t]) for t in first["track_id"]]
+    assert collapsed["track_genre"].tolist() == [
+        ", ".join(expected[t]) for t in first["track_id"]
+    ]
+
+
+def test_collapsed_catalog_recommends_like_query_time_dedupe(catalog, tmp_path):
+    # Every track twice, under two genres: the scaler sees the same mean and
+    # variance either way, so both catalogs share one feature space.
+    tracks = catalog.drop_duplicates(["track_name", "artists"]).iloc[:1000]
+    other = tracks.assign(track_genre="b-side")
+    path = str(tmp_path / "tracks.csv")
+    pd.concat([tracks, other]).sort_index(kind="stable").to_csv(path, index=False)
+
+    query_time = VibeRecommender.from_csv(path, backend="brute")
+    ingest = VibeRecommender.from_csv(path, dedupe="name_artist", backend="brute")
+    assert len(ingest.df) == len(tracks) and len(query_time.df) == 2 * len(tracks)
+    assert set(ingest.df["track_genres"]) >= {(g, "b-side") for g in tracks["track_genre"]}
+
+    for name in tracks["track_name"].iloc[::97]:
+        _, want = query_time.recommend_by_track(name, n=10)
+        _, got = ingest.recommend_by_track(name, n=10)
+        columns = ["track_name", "artists"]
+        assert got.to_frame(columns)[columns].values.tolist() == (
+            want.to_frame(columns)[columns].values.tolist()
+        )
+        np.testing.assert_allclose(got.distances, want.distances, rtol=1e-5, atol=1e-4)
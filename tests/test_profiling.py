@@ -0,0 +1,94 @@
+import math
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import profiling
+from profiling import HistogramSink, Sink, get_sink, set_sink, stage, timed
+
+
+class ListSink(Sink):
+    def __init__(self):
+        self.samples = []
+
+    def record(self, stage, seconds, alloc_bytes):
+        self.samples.append((stage, seconds, alloc_bytes))
+
+
+@pytest.fixture
+def no_sink():
+    previous = set_sink(None)
+    yield
+    set_sink(previous)
+
+
+@timed("test.double")
+def double(x):
+    return 2 * x
+
+
+def test_no_sink_is_a_shared_no_op(no_sink):
+    assert get_sink() is None
+    assert stage("a") is stage("b") is profiling._NULL_STAGE
+    with stage("a"):
+        pass
+    assert double(4) == 8
+    assert double.__name__ == "double"
+
+
+def test_stages_and_timed_calls_reach_the_installed_sink(no_sink):
+    sink = ListSink()
+    set_sink(sink, trace_memory=False)
+    with stage("outer"):
+        with stage("inner"):
+            double(1)
+    with pytest.raises(ValueError):
+        with stage("failing"):
+            raise ValueError("boom")
+    set_sink(None)
+    double(2)  # not recorded once the sink is removed
+
+    assert [s for s, _, _ in sink.samples] == ["test.double", "inner", "outer", "failing"]
+    assert all(seconds >= 0 and alloc is None for _, seconds, alloc in sink.samples)
+
+
+def test_memory_tracing_reports_allocations_and_stops_again(no_sink):
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc was already running")
+    sink = ListSink()
+    set_sink(sink, trace_memory=True)
+    try:
+        assert tracemalloc.is_tracing()
+        with stage("alloc"):
+            keep = np.ones(1 << 20)  # 8 MiB
+    finally:
+        set_sink(None)
+    assert not tracemalloc.is_tracing()
+    assert sink.samples[0][2] >= keep.nbytes
+
+
+def test_histogram_summary_over_the_window():
+    sink = HistogramSink(window=100)
+    for ms in range(1, 201):
+        sink.record("query", ms / 1000.0, None)
+    sink.record("load", 0.5, 1000)
+    sink.record("load", 0.25, 3000)
+
+    summary = sink.summary()
+    assert list(summary) == ["load", "query"]
+    query = summary["query"]
+    # The count covers every sample; the percentiles only the last 100.
+    assert query["count"] == 200
+    expected = np.percentile(np.arange(101, 201, dtype=float), [50, 95, 99])
+    np.testing.assert_allclose(
+        [query["p50_ms"], query["p95_ms"], query["p99_ms"]], expected
+    )
+    assert math.isnan(query["mean_alloc_bytes"])
+    assert summary["load"]["count"] == 2
+    assert summary["load"]["mean_alloc_bytes"] == 2000.0
+    np.testing.assert_allclose(sink.percentiles("load", [0, 100]), [250.0, 500.0])
+
+    assert sink.percentiles("missing") is None
+    sink.clear()
+    assert sink.summary() == {}
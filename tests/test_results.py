@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommender import VibeRecommender
+from results import Recommendations
+
+
+@pytest.fixture(scope="module")
+def rec(tmp_path_factory, catalog):
+    path = str(tmp_path_factory.mktemp("results") / "tracks.csv")
+    catalog.to_csv(path, index=False)
+    return VibeRecommender.from_csv(path)
+
+
+def _old_frame(df, rows, distances):
+    """The DataFrame single-query APIs returned before Recommendations."""
+    recs = df.iloc[list(rows)].copy()
+    recs["distance"] = list(distances)
+    return recs
+
+
+def test_matches_the_previous_dataframe_output(rec):
+    recs = rec.recommend_by_mood(energy=0.7, valence=0.4, danceability=0.6, n=12)
+    assert isinstance(recs, Recommendations) and len(recs) == 12
+    expected = _old_frame(rec.df, recs.rows, recs.distances)
+
+    pd.testing.assert_frame_equal(recs.to_frame(), expected)
+    pd.testing.assert_frame_equal(recs.head(5).to_frame(), expected.head(5))
+    columns = ["track_name", "artists", "track_genre"]
+    pd.testing.assert_frame_equal(
+        recs.to_frame(columns), expected[columns + ["distance"]]
+    )
+    for name in ["track_id", "artists", "popularity", "mood_cluster", "distance"]:
+        np.testing.assert_array_equal(recs.column(name), expected[name].to_numpy())
+    assert [r["track_name"] for r in recs] == expected["track_name"].tolist()
+    assert recs[3]["distance"] == expected["distance"].iloc[3]
+
+
+def test_seed_results_match_the_previous_dataframe_output(rec):
+    name = rec.df["track_name"].iloc[0]
+    seed, recs = rec.recommend_by_track(name, n=8)
+    assert seed is not None
+    pd.testing.assert_frame_equal(
+        recs.to_frame(), _old_frame(rec.df, recs.rows, recs.distances)
+    )
+    _, missing = rec.recommend_by_track("no such track")
+    assert missing.empty and missing.to_frame().empty
+
+
+def test_arrays_are_read_only_copies(rec):
+    rows = np.array([4, 2, 9])
+    distances = np.array([0.1, 0.2, 0.3])
+    recs = Recommendations(rec.df, rows, distances)
+    for arr in (recs.rows, recs.distances, recs.head(2).rows, recs.head(2).distances):
+        assert not arr.flags.writeable
+        with pytest.raises(ValueError):
+            arr[0] = 0
+    # The caller's arrays are copied, not frozen.
+    assert rows.flags.writeable and distances.flags.writeable
+    rows[0] = 7
+    assert recs.rows.tolist() == [4, 2, 9]
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import SEARCH_MAX_RESULTS
+from indexes import TrackNameIndex, TrackSearchIndex
+
+
+def _baseline_seed(df, track_name, artist_hint=None):
+    """Seed choice of the original DataFrame-scan recommend_by_track."""
+    indices = list(df[df["track_name"].str.lower() == track_name.lower()].index)
+    if not indices:
+        return None
+    if artist_hint:
+        candidates = df.loc[indices]
+        mask = candidates["artists"].str.contains(artist_hint, case=False, na=False)
+        if mask.any():
+            return int(candidates[mask].index[0])
+    return indices[0]
+
+
+@pytest.fixture
+def names():
+    return pd.DataFrame(
+        {
+            "track_name": ["Intro", "Song", "song", "Song", "SONG", "Other", "Song"],
+            "artists": ["X", "The Band Live", np.nan, "The Band", "Alt;Band", "The Band", "B.B."],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "track_name, artist_hint",
+    [
+        ("song", None),
+        ("Song", "the band"),  # an earlier substring match beats the exact artist
+        ("Song", "THE BAND LIVE"),
+        ("Song", "^the band$"),  # hints are regular expressions, as in str.contains
+        ("Song", "b.b"),
+        ("Song", "alt;band"),
+        ("Song", "nobody"),  # no match: first row with the name
+        ("Missing", "The Band"),
+        ("other", "band"),
+    ],
+)
+def test_resolve_seed_matches_the_dataframe_scan(names, track_name, artist_hint):
+    index = TrackNameIndex.build(names)
+    assert index.resolve_seed(track_name, artist_hint) == _baseline_seed(
+        names, track_name, artist_hint
+    )
+
+
+def test_resolve_seed_skips_removed_rows(names):
+    index = TrackNameIndex.build(names)
+    index.remove(names, np.array([1]))
+    assert index.resolve_seed("Song", "the band") == 3
+    index.add(names.iloc[[1]], start=len(names))
+    assert index.resolve_seed("Song", "band live") == len(names)
+
+
+def _baseline_search(df, name_query, artist_query, limit):
+    """The original page_seed_track scan, with its top matches ranked prefix-first."""
+    candidates = df[["track_name", "artists"]].drop_duplicates()
+    for column, query in (("track_name", name_query), ("artists", artist_query)):
+        if query:
+            hits = candidates[column].str.contains(query, case=False, na=False, regex=False)
+            candidates = candidates[hits]
+    ranked, query = ("track_name", name_query) if name_query else ("artists", artist_query)
+    if query:
+        prefixed = candidates[ranked].str.lower().str.startswith(query.lower())
+        candidates = pd.concat([candidates[prefixed], candidates[~prefixed]])
+    return candidates.head(limit), len(candidates)
+
+
+@pytest.mark.parametrize(
+    "name_query, artist_query",
+    [
+        ("", ""),
+        ("1", ""),  # 1-2 characters: below the trigram length
+        ("k 2", ""),
+        ("7", "artist 1"),
+        ("TR", ""),
+        ("track 12", ""),
+        ("rack 3", ""),
+        ("", "ARTIST 2"),
+        ("", "st"),
+        ("track 1", "tist 3"),
+        ("no such track", ""),
+    ],
+)
+def test_search_matches_the_dataframe_scan(catalog, name_query, artist_query):
+    index = TrackSearchIndex.build(catalog)
+    got, total = index.search(name_query, artist_query, limit=SEARCH_MAX_RESULTS)
+    want, want_total = _baseline_search(catalog, name_query, artist_query, SEARCH_MAX_RESULTS)
+
+    assert total == want_total
+    assert list(zip(got["track_name"], got["artists"])) == list(
+        zip(want["track_name"], want["artists"])
+    )
+
+    # Past the first page too: every match, in the same order.
+    all_got, _ = index.search(name_query, artist_query, limit=len(catalog))
+    all_want, _ = _baseline_search(catalog, name_query, artist_query, len(catalog))
+    assert list(zip(all_got["track_name"], all_got["artists"])) == list(
+        zip(all_want["track_name"], all_want["artists"])
+    )
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from config import SERVICE_MAX_N
+from recommender import VibeRecommender
+from service import HTTPError, MicroBatcher, RecommendationService
+
+
+def _run_batches(run_batch, items, **kwargs):
+    """Submit ``items`` concurrently; returns (results or exceptions, batcher)."""
+    async def go():
+        batcher = MicroBatcher(run_batch, executor, window_s=0.05, **kwargs)
+        results = await asyncio.gather(
+            *(batcher.submit(item) for item in items), return_exceptions=True
+        )
+        return results, batcher
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        return asyncio.run(go())
+
+
+def test_concurrent_items_share_one_batch_and_get_their_own_results():
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    results, batcher = _run_batches(run_batch, [1, 2, 3, 4, 5])
+    assert results == [10, 20, 30, 40, 50]
+    assert batches == [[1, 2, 3, 4, 5]]
+    assert (batcher.n_batches, batcher.n_items) == (1, 5)
+
+
+def test_failed_item_rejects_only_its_own_future():
+    def run_batch(items):
+        return [ValueError(f"bad {item}") if item == 3 else item for item in items]
+
+    results, _ = _run_batches(run_batch, [1, 2, 3, 4])
+    assert results[:2] == [1, 2] and results[3] == 4
+    assert isinstance(results[2], ValueError) and str(results[2]) == "bad 3"
+
+
+def test_batch_failure_rejects_every_item_in_that_batch():
+    def run_batch(items):
+        if 0 in items:
+            raise RuntimeError("boom")
+        return items
+
+    results, batcher = _run_batches(run_batch, [0, 1, 2, 3], max_batch=2)
+    assert [type(r) for r in results[:2]] == [RuntimeError, RuntimeError]
+    assert results[2:] == [2, 3]
+    assert batcher.n_batches == 2
+
+
+def test_full_batches_flush_and_later_items_wait_for_the_running_one():
+    started = threading.Event()
+    release = threading.Event()
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        started.set()
+        release.wait(5)
+        return items
+
+    async def go():
+        batcher = MicroBatcher(run_batch, executor, window_s=10.0, max_batch=3, max_in_flight=1)
+        first = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        later = [asyncio.ensure_future(batcher.submit(i)) for i in range(3, 5)]
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(*first, *later)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = asyncio.run(go())
+    assert results == [0, 1, 2, 3, 4]
+    # The window is long, so [0, 1, 2] went out on size alone and [3, 4]
+    # as soon as it finished.
+    assert batches == [[0, 1, 2], [3, 4]]
+
+
+def test_batches_run_concurrently_up_to_max_in_flight():
+    running = []
+    peak = []
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def run_batch(items):
+        with lock:
+            running.append(items)
+            peak.append(len(running))
+        release.wait(5)
+        with lock:
+            running.remove(items)
+        return items
+
+    async def go():
+        batcher = MicroBatcher(run_batch, executor, window_s=10.0, max_batch=2, max_in_flight=2)
+        futures = [asyncio.ensure_future(batcher.submit(i)) for i in range(6)]
+        await asyncio.sleep(0.05)
+        in_flight, queued = batcher._in_flight, len(batcher._pending)
+        release.set()
+        return await asyncio.gather(*futures), in_flight, queued, batcher.n_batches
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results, in_flight, queued, n_batches = asyncio.run(go())
+    assert results == list(range(6))
+    # Two full batches ran side by side; the third waited for a free slot.
+    assert (in_flight, queued) == (2, 2)
+    assert max(peak) == 2 and n_batches == 3
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory, catalog):
+    path = str(tmp_path_factory.mktemp("service") / "tracks.csv")
+    catalog.to_csv(path, index=False)
+    svc = RecommendationService(VibeRecommender.from_csv(path, dedupe="track_id"))
+    yield svc
+    svc.close()
+
+
+def _handle(service, method, target, body=b""):
+    return asyncio.run(service.handle(method, target, body))
+
+
+def test_requests_above_max_n_are_rejected(service):
+    status, payload = _handle(
+        service, "POST", "/recommend/mood", b'{"energy": 0.5, "valence": 0.5, "danceability": 0.5}'
+    )
+    assert status == 200 and len(payload["results"]) == 10
+
+    too_many = SERVICE_MAX_N + 1
+    for target, body in (
+        ("/recommend/mood", b'{"energy": 0.5, "valence": 0.5, "danceability": 0.5, "n": %d}'),
+        ("/recommend/track", b'{"track_name": "Track 1", "n": %d}'),
+    ):
+        with pytest.raises(HTTPError) as exc:
+            _handle(service, "POST", target, body % too_many)
+        assert exc.value.status == 400
+
+    label = int(service.rec.cluster_stats.labels[0])
+    with pytest.raises(HTTPError) as exc:
+        _handle(service, "GET", f"/clusters/{label}/sample?n={too_many}")
+    assert exc.value.status == 400
+    status, payload = _handle(service, "GET", f"/clusters/{label}/sample?n={SERVICE_MAX_N}")
+    assert status == 200
+
+
+def test_mood_requests_share_a_batcher_regardless_of_key_order(service):
+    first = b'{"energy": 0.4, "valence": 0.6, "danceability": 0.5, "tempo": 120}'
+    second = b'{"tempo": 120, "danceability": 0.5, "valence": 0.6, "energy": 0.4}'
+    before = set(service.mood_batchers)
+    _, a = _handle(service, "POST", "/recommend/mood", first)
+    _, b = _handle(service, "POST", "/recommend/mood", second)
+    assert a == b
+    added = set(service.mood_batchers) - before
+    assert added == {("danceability", "energy", "tempo", "valence")}
+
+
+class _Writer:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+
+def test_non_finite_values_are_sent_as_null():
+    payload = {
+        "results": [{"popularity": float("nan"), "distance": np.float32(np.inf)}],
+        "stats": np.array([1.0, -np.inf]),
+        "tracks": ("a", np.int64(3)),
+    }
+    writer = _Writer()
+    asyncio.run(RecommendationService._respond(writer, 200, payload, True))
+    body = writer.data.split(b"\r\n\r\n", 1)[1]
+
+    def reject(token):
+        raise ValueError(f"non-standard JSON: {token}")
+
+    assert json.loads(body, parse_constant=reject) == {
+        "results": [{"popularity": None, "distance": None}],
+        "stats": [1.0, None],
+        "tracks": ["a", 3],
+    }
@@ -0,0 +1,52 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from models import BruteForceIndex, ShardedIndex
+
+N_THREADS = 8
+
+
+@pytest.fixture
+def index():
+    X = np.random.default_rng(0).normal(size=(500, 6)).astype(np.float32)
+    index = ShardedIndex.build(X, n_shards=2)
+    yield index
+    index.close()
+
+
+def test_concurrent_first_queries_start_one_pool(index, monkeypatch):
+    X = index.X.copy()
+    started = []
+    start = ShardedIndex._start
+
+    def counting_start(self):
+        started.append(self)
+        start(self)
+
+    monkeypatch.setattr(ShardedIndex, "_start", counting_start)
+    queries = X[:N_THREADS]
+    with ThreadPoolExecutor(N_THREADS) as threads:
+        results = list(threads.map(lambda q: index.kneighbors(q, n_neighbors=5), queries))
+
+    assert len(started) == 1
+    want_d, want_i = BruteForceIndex.build(X).kneighbors(queries, n_neighbors=5)
+    np.testing.assert_array_equal(np.concatenate([i for _, i in results]), want_i)
+    np.testing.assert_allclose(np.concatenate([d for d, _ in results]), want_d, rtol=1e-5)
+
+
+def test_parent_keeps_only_the_shared_copy(index):
+    X = index.X.copy()
+    index.kneighbors(X[:2], n_neighbors=3)
+    assert index.X is None and index.n_rows == len(X)
+
+    # Pickling and close() copy the catalog back out of the segment.
+    restored = pickle.loads(pickle.dumps(index))
+    np.testing.assert_array_equal(restored.X, X)
+    index.close()
+    np.testing.assert_array_equal(index.X, X)
+    # ...and the next query restarts the workers.
+    _, rows = index.kneighbors(X[:1], n_neighbors=1)
+    assert rows[0, 0] == 0
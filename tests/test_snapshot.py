@@ -0,0 +1,183 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import recommender as recommender_module
+from indexes import TrackFilter
+from recommender import VibeRecommender
+from snapshot import MANIFEST_FILE, StaleSnapshotError, file_checksum, read_manifest
+
+BUILD = {"dedupe": "track_id", "backend": "brute"}
+MOODS = np.array([(0.2, 0.3, 0.4), (0.5, 0.5, 0.5), (0.9, 0.8, 0.7)])
+
+
+def _assert_same_answers(got, want):
+    for moods in MOODS:
+        a, b = got.recommend_by_mood(*moods, n=25), want.recommend_by_mood(*moods, n=25)
+        np.testing.assert_array_equal(a.column("track_id"), b.column("track_id"))
+        np.testing.assert_allclose(a.distances, b.distances)
+    for name in want.df["track_name"].iloc[::211]:
+        _, a = got.recommend_by_track(name, n=15)
+        _, b = want.recommend_by_track(name, n=15)
+        np.testing.assert_array_equal(a.column("track_id"), b.column("track_id"))
+    pd.testing.assert_frame_equal(
+        got.recommend_by_moods(MOODS, n=10), want.recommend_by_moods(MOODS, n=10)
+    )
+    pd.testing.assert_frame_equal(got.describe_clusters(), want.describe_clusters())
+    pd.testing.assert_frame_equal(got.cluster_overview(), want.cluster_overview())
+    pd.testing.assert_frame_equal(
+        got.search_tracks("Track 12")[0], want.search_tracks("Track 12")[0]
+    )
+
+
+def _edit(csv_path):
+    """Drop the last 100 rows of the CSV (a different catalog version)."""
+    df = pd.read_csv(csv_path)
+    df.iloc[:-100].to_csv(csv_path, index=False)
+
+
+def test_save_load_round_trip(catalog_csv, tmp_path):
+    rec = VibeRecommender.from_csv(catalog_csv, **BUILD)
+    rec.build_mood_lattice(top_k=10)
+    path = str(tmp_path / "snap")
+    rec.save(path)
+
+    loaded = VibeRecommender.load(path, csv_path=catalog_csv)
+    assert isinstance(loaded.X_scaled, np.memmap)
+    assert loaded.source_checksum == rec.source_checksum
+    assert loaded.build_params == rec.build_params
+    assert loaded.mood_lattice is not None
+    pd.testing.assert_frame_equal(loaded.df, rec.df)
+    _assert_same_answers(loaded, rec)
+
+
+def test_edited_csv_triggers_rebuild(catalog_csv, tmp_path):
+    path = str(tmp_path / "snap")
+    first = VibeRecommender.load_or_build(catalog_csv, path, **BUILD)
+    again = VibeRecommender.load_or_build(catalog_csv, path, **BUILD)
+    assert isinstance(again.X_scaled, np.memmap)  # loaded, not refitted
+
+    _edit(catalog_csv)
+    with pytest.raises(StaleSnapshotError):
+        VibeRecommender.load(path, csv_path=catalog_csv)
+
+    rebuilt = VibeRecommender.load_or_build(catalog_csv, path, **BUILD)
+    assert not isinstance(rebuilt.X_scaled, np.memmap)
+    assert rebuilt.source_checksum != first.source_checksum
+    assert len(rebuilt.df) < len(first.df)
+    # The rebuild replaced the snapshot.
+    assert VibeRecommender.load(path, csv_path=catalog_csv).source_checksum == (
+        rebuilt.source_checksum
+    )
+
+
+def test_from_csv_hashes_only_when_needed(catalog_csv, tmp_path, monkeypatch):
+    hashed = []
+
+    def counting_checksum(path):
+        hashed.append(path)
+        return file_checksum(path)
+
+    monkeypatch.setattr(recommender_module, "file_checksum", counting_checksum)
+    no_report = str(tmp_path / "none.json")
+    rec = VibeRecommender.from_csv(catalog_csv, cluster_report=no_report, **BUILD)
+    assert hashed == [] and rec.source_checksum is None
+
+    cache_dir = str(tmp_path / "ingest")
+    rec = VibeRecommender.from_csv(catalog_csv, ingest_cache_dir=cache_dir, **BUILD)
+    assert hashed == [catalog_csv]
+    assert rec.source_checksum == file_checksum(catalog_csv)
+
+
+def test_save_hashes_the_csv_a_build_skipped(catalog_csv, tmp_path):
+    rec = VibeRecommender.from_csv(catalog_csv, **BUILD)
+    assert rec.source_checksum is None
+    path = str(tmp_path / "snap")
+    rec.save(path)
+    assert read_manifest(path)["source_checksum"] == file_checksum(catalog_csv)
+    VibeRecommender.load(path, csv_path=catalog_csv)  # not stale
+
+    # A CSV edited between the build and the save is not hashed as its source.
+    stale = VibeRecommender.from_csv(catalog_csv, **BUILD)
+    _edit(catalog_csv)
+    with pytest.raises(StaleSnapshotError):
+        stale.save(str(tmp_path / "other"))
+    assert not os.path.exists(str(tmp_path / "other"))
+
+
+def test_changed_build_params_trigger_rebuild(catalog_csv, tmp_path):
+    path = str(tmp_path / "snap")
+    VibeRecommender.load_or_build(catalog_csv, path, **BUILD)
+    rec = VibeRecommender.load_or_build(catalog_csv, path, n_clusters=3, **BUILD)
+    assert len(rec.cluster_stats.labels) == 3
+    assert read_manifest(path)["build_params"]["n_clusters"] == 3
+
+
+def test_interrupted_save_leaves_previous_snapshot(catalog_csv, tmp_path, monkeypatch):
+    path = str(tmp_path / "snap")
+    original = VibeRecommender.from_csv(catalog_csv, **BUILD)
+    original.save(path)
+    files_before = sorted(os.listdir(path))
+
+    _edit(catalog_csv)
+    newer = VibeRecommender.from_csv(catalog_csv, **BUILD)
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("interrupted")
+
+    # The feature matrix, labels and catalog are written before the models.
+    monkeypatch.setattr(recommender_module.joblib, "dump", crash)
+    with pytest.raises(RuntimeError):
+        newer.save(path)
+    monkeypatch.undo()
+
+    loaded = VibeRecommender.load(path)
+    assert loaded.source_checksum == original.source_checksum
+    pd.testing.assert_frame_equal(loaded.df, original.df)
+    _assert_same_answers(loaded, original)
+
+    # The next complete save commits and removes the interrupted one's files.
+    newer.save(path)
+    assert VibeRecommender.load(path, csv_path=catalog_csv).source_checksum == (
+        newer.source_checksum
+    )
+    assert len(os.listdir(path)) == len(files_before)
+    assert MANIFEST_FILE in os.listdir(path)
+
+
+def test_filter_index_and_cluster_stats_survive_load_after_add(catalog, catalog_csv, tmp_path):
+    rec = VibeRecommender.from_csv(catalog_csv, **BUILD)
+    new = catalog.iloc[:200].copy()
+    new["track_id"] = "new-" + new["track_id"]
+    new["track_name"] = "New " + new["track_name"]
+    new["track_genre"] = np.where(np.arange(len(new)) % 2, "vaporwave", "Chiptune")
+    rec.add_tracks(new, compaction_threshold=10.0)
+    assert rec.models.n_delta > 0
+    assert {"vaporwave", "chiptune"} <= set(rec.filter_index.genres)
+
+    path = str(tmp_path / "snap")
+    rec.save(path)
+    loaded = VibeRecommender.load(path)
+
+    got, want = loaded.filter_index, rec.filter_index
+    assert got.n_rows == want.n_rows and got.n_sorted == want.n_sorted
+    assert got.genres == want.genres
+    for flt in (
+        TrackFilter(genres=("vaporwave",)),
+        TrackFilter(genres=("chiptune", "salsa"), ranges={"popularity": (30, 70)}),
+        TrackFilter(clusters=(int(rec.cluster_stats.labels[-1]),), ranges={"energy": (0.5, None)}),
+    ):
+        np.testing.assert_array_equal(got.mask(flt), want.mask(flt))
+        a = loaded.recommend_by_mood(0.5, 0.5, 0.5, n=20, filters=flt)
+        b = rec.recommend_by_mood(0.5, 0.5, 0.5, n=20, filters=flt)
+        np.testing.assert_array_equal(a.rows, b.rows)
+    only_new = TrackFilter(genres=("vaporwave",))
+    genres = loaded.recommend_by_mood(0.5, 0.5, 0.5, n=50, filters=only_new).column("track_genres")
+    assert len(genres) and all("vaporwave" in g for g in genres)
+
+    for name in ("labels", "offsets", "rows", "means", "stds", "medoid_rows"):
+        np.testing.assert_array_equal(
+            getattr(loaded.cluster_stats, name), getattr(rec.cluster_stats, name)
+        )
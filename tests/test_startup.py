@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommender import VibeRecommender
+from startup import StartupLoader, load_search_index
+
+
+@pytest.fixture
+def gappy_csv(catalog, tmp_path):
+    """The catalog with some track names, artists and features missing."""
+    df = catalog.copy()
+    # Metadata is missing for a track as a whole, on each of its rows.
+    ids = df["track_id"].unique()
+    df.loc[df["track_id"].isin(ids[::50]), "track_name"] = np.nan
+    df.loc[df["track_id"].isin(ids[7::60]), "artists"] = np.nan
+    df.loc[df.index[3::70], "energy"] = np.nan
+    path = str(tmp_path / "tracks.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+def _all_candidates(index):
+    matches, total = index.search("", limit=10**9)
+    assert total == len(matches)
+    return matches.sort_values(["track_name", "artists"]).reset_index(drop=True).astype(object)
+
+
+@pytest.mark.parametrize("dedupe", [None, "track_id"])
+def test_early_index_offers_what_the_recommender_offers(gappy_csv, tmp_path, dedupe):
+    early = load_search_index(gappy_csv, str(tmp_path / "no-snapshot"))
+    rec = VibeRecommender.from_csv(gappy_csv, dedupe=dedupe)
+    rec.search_tracks()
+
+    expected = _all_candidates(rec.search_index)
+    assert expected["track_name"].notna().all()
+    pd.testing.assert_frame_equal(_all_candidates(early), expected)
+    for name, artist in (("Track 1", ""), ("", "Artist 4"), ("track 25", "artist")):
+        assert early.search(name, artist)[1] == rec.search_tracks(name, artist)[1]
+
+
+def test_early_index_from_snapshot_matches(gappy_csv, tmp_path):
+    snapshot_dir = str(tmp_path / "snap")
+    VibeRecommender.load_or_build(gappy_csv, snapshot_dir, dedupe="track_id")
+
+    loader = StartupLoader(gappy_csv, snapshot_dir, dedupe="track_id").start()
+    rec = loader.wait(timeout=60)
+    early = loader.search_index
+    pd.testing.assert_frame_equal(
+        _all_candidates(early),
+        _all_candidates(load_search_index(gappy_csv, str(tmp_path / "no-snapshot"))),
+    )
+    fresh = VibeRecommender.load(snapshot_dir)
+    fresh.search_tracks()
+    pd.testing.assert_frame_equal(
+        _all_candidates(rec.search_index), _all_candidates(fresh.search_index)
+    )